@@ -1,19 +1,31 @@
-from flask import Flask, render_template, request, jsonify, send_file, Response
+from flask import Flask, render_template, request, jsonify, send_file, Response, make_response
 import requests
 import csv
 import io
 import os
-from typing import List, Dict, Optional, Generator
+import gzip
+import shutil
+from typing import List, Dict, Optional, Generator, Iterable, Mapping, Tuple, ItemsView, ValuesView
 import time
 import json
 import uuid
 import threading
 import sqlite3
+import atexit
+import pathlib
 from datetime import datetime, timedelta
 import hashlib
+import heapq
+import zlib
 import re
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import sys
 from bs4 import BeautifulSoup
 import urllib.parse
+from jinja2.utils import htmlsafe_json_dumps
+from markupsafe import Markup
 
 app = Flask(__name__)
 
@@ -21,8 +33,244 @@ app = Flask(__name__)
 import_progress = {}
 
 # Cache configuration
-CACHE_DB_PATH = 'mtg_cache.db'
+CACHE_DB_PATH = os.environ.get('MTG_CACHE_DB', 'mtg_cache.db')
 CACHE_EXPIRY_DAYS = 7  # Cache bulk data for 7 days
+BULK_STAGING_DIR = 'bulk_staging'  # Compressed copy of the last downloaded bulk file
+BULK_STREAM_CHUNK_SIZE = 64 * 1024  # Bytes read from the bulk data stream at a time
+BULK_INGEST_BATCH_SIZE = 1000  # Cards buffered before each write during bulk ingest
+CACHE_PAYLOAD_FORMATS = ('json', 'zlib')  # Plain JSON text, or zlib-compressed JSON stored as a BLOB
+CACHE_PAYLOAD_FORMAT = 'json'  # Format used when writing cards_cache.data_json, until a migration records another
+
+CARDS_CACHE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        set_code TEXT,
+        collector_number TEXT,
+        set_name TEXT,
+        rarity TEXT,
+        image_url TEXT,
+        price_usd TEXT,
+        price_usd_foil TEXT,
+        data_json TEXT,
+        content_hash TEXT,
+        updated_at TEXT,
+        image_url_normal TEXT,
+        set_type TEXT,
+        released_at TEXT,
+        mana_cost TEXT,
+        type_line TEXT,
+        name_lower TEXT,
+        collector_sort_key TEXT
+    )
+'''
+CARDS_CACHE_SHADOW_TABLE = 'cards_cache_shadow'  # Bulk refreshes load here before swapping in
+CARD_ROW_HASH_INDEX = 10  # Position of content_hash in rows built by BulkDataCache._card_to_row
+
+# Columns projected out of the Scryfall payload so hot paths can skip decoding data_json
+CARD_PROJECTED_COLUMNS = ('image_url_normal', 'set_type', 'released_at', 'mana_cost', 'type_line')
+CARD_ROW_COLUMNS = (
+    'id, name, set_code, collector_number, set_name, rarity, image_url, price_usd, price_usd_foil, '
+    'data_json, content_hash, updated_at, ' + ', '.join(CARD_PROJECTED_COLUMNS) + ', name_lower, collector_sort_key'
+)
+# Upsert rather than REPLACE so rows keep their rowid and fire update triggers
+CARD_ROW_UPSERT = 'ON CONFLICT(id) DO UPDATE SET ' + ', '.join(
+    f'{column} = excluded.{column}' for column in [column.strip() for column in CARD_ROW_COLUMNS.split(',')][1:]
+)
+CARD_SEARCH_LIMIT = 10  # Maximum cards returned by search_cards_in_cache
+CARD_PROJECTION_SELECT = (
+    'SELECT id, name, set_code, collector_number, set_name, rarity, image_url, price_usd, price_usd_foil, '
+    + ', '.join(CARD_PROJECTED_COLUMNS) + ', collector_sort_key FROM cards_cache'
+)
+
+# Secondary indexes on cards_cache; bulk loads build these after the data is in place
+CARD_CACHE_INDEXES = {
+    'idx_cards_name': 'CREATE INDEX IF NOT EXISTS idx_cards_name ON cards_cache(name)',
+    'idx_cards_set_order': 'CREATE INDEX IF NOT EXISTS idx_cards_set_order ON cards_cache(set_code, collector_sort_key, id)',
+    'idx_cards_set_name': 'CREATE INDEX IF NOT EXISTS idx_cards_set_name ON cards_cache(set_code, name_lower, collector_sort_key, id)',
+    'idx_cards_collector': 'CREATE INDEX IF NOT EXISTS idx_cards_collector ON cards_cache(collector_number)',
+    'idx_cards_lookup': 'CREATE INDEX IF NOT EXISTS idx_cards_lookup ON cards_cache(name, set_code, collector_number)',
+    'idx_cards_name_lower': 'CREATE INDEX IF NOT EXISTS idx_cards_name_lower ON cards_cache(name_lower, set_code)'
+}
+
+COLLECTOR_NUMBER_SORT_WIDTH = 6  # Digits each number run is zero-padded to in collector sort keys
+
+# Paged set listings for the virtualized set view
+SET_CARDS_PAGE_SIZE = 60  # Cards per page, and cards embedded in the set page itself
+SET_CARDS_MAX_PAGE_SIZE = 500  # Largest page a client may request
+# Sort name -> indexed columns; each ends in the card id, so tied names or numbers still page in a fixed order
+SET_CARD_SORT_COLUMNS = {'number': ('collector_sort_key', 'id'), 'name': ('name_lower', 'collector_sort_key', 'id')}
+
+# Trigram full-text index over card and set names, stored against cards_cache rowids.
+# Triggers keep it in sync with row-level writes; a full load rebuilds it after the swap.
+CARDS_FTS_SCHEMA = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS cards_fts USING fts5(
+        name, set_name, content='cards_cache', content_rowid='rowid', tokenize='trigram'
+    )
+'''
+CARDS_FTS_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS cards_fts_insert AFTER INSERT ON cards_cache BEGIN
+        INSERT INTO cards_fts (rowid, name, set_name) VALUES (new.rowid, new.name, new.set_name);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS cards_fts_delete AFTER DELETE ON cards_cache BEGIN
+        INSERT INTO cards_fts (cards_fts, rowid, name, set_name) VALUES ('delete', old.rowid, old.name, old.set_name);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS cards_fts_update AFTER UPDATE OF name, set_name ON cards_cache BEGIN
+        INSERT INTO cards_fts (cards_fts, rowid, name, set_name) VALUES ('delete', old.rowid, old.name, old.set_name);
+        INSERT INTO cards_fts (rowid, name, set_name) VALUES (new.rowid, new.name, new.set_name);
+    END'''
+)
+FTS_MIN_QUERY_LENGTH = 3  # Trigram queries need at least one full trigram
+
+# Offline fuzzy name matching used before falling back to the Scryfall API
+FUZZY_MATCH_MIN_CONFIDENCE = 0.75  # Below this a local fuzzy match is not trusted
+FUZZY_MATCH_REVIEW_CONFIDENCE = 0.9  # Matches below this are flagged for review in import results
+FUZZY_MATCH_CANDIDATES = 40  # Names sharing the most trigrams that get an edit-distance check
+
+# Materialized set listing, rebuilt whenever the card cache changes
+SETS_CACHE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS sets_cache (
+        code TEXT PRIMARY KEY,
+        name TEXT,
+        set_type TEXT,
+        released_at TEXT,
+        icon_svg_uri TEXT,
+        parent_set_code TEXT,
+        card_count INTEGER,
+        listed INTEGER,
+        updated_at TEXT
+    )
+'''
+SETS_CACHE_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_sets_listed ON sets_cache(listed, released_at DESC, name)',
+    'CREATE INDEX IF NOT EXISTS idx_sets_name ON sets_cache(lower(name))'
+)
+
+# Key-value settings kept with the cache
+CACHE_SETTINGS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS cache_settings (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    )
+'''
+
+# Set types offered for collection entry; tokens, art series, memorabilia and the like are left out
+RELEVANT_SET_TYPES = (
+    'core', 'expansion', 'masters', 'commander', 'planechase',
+    'archenemy', 'from_the_vault', 'spellbook', 'premium_deck',
+    'duel_deck', 'draft_innovation', 'treasure_chest', 'arsenal',
+    'box', 'funny', 'starter', 'supplemental'
+)
+
+# Pragmas applied to the connection used for a bulk load
+BULK_LOAD_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -65536',  # 64 MB page cache
+    'PRAGMA temp_store = MEMORY'
+)
+
+# Pragmas applied to every pooled cache connection
+CACHE_CONNECTION_PRAGMAS = (
+    'PRAGMA cache_size = -16384',  # 16 MB page cache
+    'PRAGMA mmap_size = 268435456',  # Map up to 256 MB of the database file
+    'PRAGMA temp_store = MEMORY'
+)
+CACHE_CONNECTION_TIMEOUT = 10  # Seconds a pooled connection waits on a locked database
+SET_CARDS_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Estimated memory held by decoded set card lists
+SET_REGISTRY_TTL = 60 * 60  # Seconds set metadata is reused before it is reloaded
+CACHE_STATUS_ETAG_WINDOW = 60  # Seconds a cache status ETag stays valid, so cache expiry shows up
+ETAG_STATE_RECHECK_SECONDS = 1  # Longest conditional GETs are answered from memory before another worker's writes are read
+
+# Local card image cache behind the /api/image proxy
+IMAGE_CACHE_DIR = 'image_cache'
+IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024  # Disk space for cached images before the least recently used are evicted
+IMAGE_MAX_BYTES = 5 * 1024 * 1024  # Largest single image the proxy will store
+IMAGE_MAX_REDIRECTS = 3  # Redirects followed per image download, each checked against the allowed hosts
+IMAGE_STREAM_CHUNK_SIZE = 64 * 1024  # Bytes read at a time while downloading an image
+IMAGE_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # Seconds browsers may reuse a proxied image; Scryfall image URLs change with the image
+IMAGE_CACHE_TOUCH_INTERVAL = 5 * 60  # Seconds between last-access updates of a cached image
+IMAGE_PREFETCH_WORKERS = 4  # Concurrent downloads when prefetching a set's thumbnails
+IMAGE_PROXY_HOSTS = ('cards.scryfall.io', 'c1.scryfall.com', 'c2.scryfall.com', 'img.scryfall.com')
+IMAGE_CACHE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS images (
+        url TEXT PRIMARY KEY,
+        content_hash TEXT NOT NULL,
+        content_type TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        last_access REAL NOT NULL
+    )
+'''
+IMAGE_CACHE_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_images_last_access ON images(last_access)',
+    'CREATE INDEX IF NOT EXISTS idx_images_hash ON images(content_hash)'
+)
+
+# Persistent collection store, shared by every worker process that opens the same file
+COLLECTION_DB_PATH = os.environ.get('MTG_COLLECTION_DB', 'mtg_collection.db')
+COLLECTION_CONNECTION_TIMEOUT = 10  # Seconds a write waits on another worker's transaction
+COLLECTION_IMPORT_FLUSH_ROWS = 500  # Imported entries written to the store per transaction
+COLLECTION_BATCH_MAX_UPDATES = 1000  # Quantity updates accepted in one batch request
+COLLECTION_SAVE_DELAY_MS = 500  # Quiet time after the last edit before the set views send a batch
+COLLECTION_SNAPSHOT_SHARDS = 128  # Shards of the in-memory collection; a write copies at most one shard a snapshot shares
+# Collection entry keys and the store columns that hold them
+COLLECTION_COLUMNS = (
+    ('name', 'name'),
+    ('set', 'set_code'),
+    ('set_name', 'set_name'),
+    ('collector_number', 'collector_number'),
+    ('quantity', 'quantity'),
+    ('foil_quantity', 'foil_quantity'),
+    ('condition', 'condition'),
+    ('language', 'language'),
+    ('rarity', 'rarity'),
+    ('image_url', 'image_url'),
+    ('price_usd_regular', 'price_usd_regular'),
+    ('price_usd_foil', 'price_usd_foil')
+)
+COLLECTION_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS collection (
+        card_id TEXT PRIMARY KEY,
+        name TEXT,
+        set_code TEXT,
+        set_name TEXT,
+        collector_number TEXT,
+        quantity INTEGER NOT NULL DEFAULT 0,
+        foil_quantity INTEGER NOT NULL DEFAULT 0,
+        condition TEXT,
+        language TEXT,
+        rarity TEXT,
+        image_url TEXT,
+        price_usd_regular TEXT,
+        price_usd_foil TEXT,
+        updated_seq INTEGER NOT NULL DEFAULT 0
+    )
+'''
+# Change tracking, so a worker can apply other workers' writes without reloading
+# everything: rows carry the sequence of the write that produced them, deleted
+# ids keep a tombstone, and 'cleared' records the last clear of the whole store
+COLLECTION_CHANGE_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS collection_deletions (
+        card_id TEXT PRIMARY KEY,
+        deleted_seq INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS collection_sequence (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )
+    ''',
+    "INSERT OR IGNORE INTO collection_sequence (name, value) VALUES ('last', 0), ('cleared', 0)",
+    'CREATE INDEX IF NOT EXISTS idx_collection_updated_seq ON collection(updated_seq)',
+    'CREATE INDEX IF NOT EXISTS idx_collection_deletions_seq ON collection_deletions(deleted_seq)'
+)
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - resource is unavailable on Windows
+    resource = None
 
 def sanitize_card_name(card_name: str) -> str:
     """
@@ -51,18 +299,512 @@ def sanitize_card_name(card_name: str) -> str:
     
     return sanitized
 
+def collector_number_sort_key(collector_number: str) -> str:
+    """
+    Build a key that orders collector numbers naturally under plain string comparison.
+    
+    Cards order by the first run of digits in their number, so variants such as
+    "12a", "★12" and "S12" sit next to card 12, then by the whole number with
+    every digit run zero-padded. Numbers without digits sort after the rest.
+    
+    Examples:
+    - "7" -> "000007000007"
+    - "12a" -> "000012000012a"
+    - "★45" -> "000045★000045"
+    
+    Args:
+        collector_number: The Scryfall collector number
+        
+    Returns:
+        A key that SQLite, Python and JavaScript all compare the same way
+    """
+    number = (collector_number or '').lower()
+    first_digits = re.search(r'\d+', number)
+    lead = first_digits.group().zfill(COLLECTOR_NUMBER_SORT_WIDTH) if first_digits else '9' * COLLECTOR_NUMBER_SORT_WIDTH
+    return lead + re.sub(r'\d+', lambda match: match.group().zfill(COLLECTOR_NUMBER_SORT_WIDTH), number)
+
+def normalize_card_name(card_name: str) -> str:
+    """
+    Fold a card name into the form used for fuzzy comparison.
+    
+    Examples:
+    - "Æther Vial" -> "aether vial"
+    - "Jötun Grunt" -> "jotun grunt"
+    - "Ach! Hans, Run!" -> "ach hans run"
+    
+    Args:
+        card_name: The card name to normalize
+        
+    Returns:
+        The lowercased name without accents or punctuation
+    """
+    folded = card_name.lower().replace('æ', 'ae')
+    folded = ''.join(char for char in unicodedata.normalize('NFKD', folded) if not unicodedata.combining(char))
+    folded = re.sub(r"[^\w\s/]", '', folded)
+    return ' '.join(folded.split())
+
+def edit_distance(first: str, second: str, max_distance: Optional[int] = None) -> int:
+    """
+    Compute the edit distance between two strings, counting adjacent transpositions as one edit.
+    
+    Args:
+        first: The first string
+        second: The second string
+        max_distance: Stop early once the distance is known to exceed this
+        
+    Returns:
+        The distance, or max_distance + 1 if it exceeds max_distance
+    """
+    if abs(len(first) - len(second)) > (max_distance if max_distance is not None else len(first) + len(second)):
+        return max_distance + 1
+    
+    previous_previous = None
+    previous = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, start=1):
+        current = [i] + [0] * len(second)
+        for j, second_char in enumerate(second, start=1):
+            cost = 0 if first_char == second_char else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and j > 1 and first_char == second[j - 2]
+                    and first[i - 2] == second_char):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return previous[-1]
+
+def iter_json_array(chunks: Iterable[str]) -> Generator[Dict, None, None]:
+    """
+    Incrementally parse a top-level JSON array, yielding one element at a time.
+    
+    Only the text of the element currently being decoded is held in memory, so
+    arbitrarily large arrays (such as Scryfall bulk files) can be processed with
+    a flat memory profile.
+    
+    Args:
+        chunks: Iterable of decoded text chunks making up the JSON document
+        
+    Returns:
+        Generator yielding each decoded array element in order
+        
+    Raises:
+        ValueError: If the document is not a JSON array or ends prematurely
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    started = False
+    
+    for chunk in chunks:
+        buffer = buffer[position:] + chunk
+        position = 0
+        
+        while True:
+            # Skip whitespace and element separators between values
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position >= len(buffer):
+                break
+            
+            if not started:
+                if buffer[position] != '[':
+                    raise ValueError('Expected a JSON array')
+                started = True
+                position += 1
+                continue
+            
+            if buffer[position] == ']':
+                return
+            
+            try:
+                element, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The element is incomplete; wait for the next chunk
+                break
+            
+            yield element
+    
+    raise ValueError('Unexpected end of JSON array')
+
+def chunked(iterable: Iterable, size: int) -> Generator[List, None, None]:
+    """Group an iterable into lists of at most `size` items without materializing it"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def timed_iter(iterable: Iterable, timings: Dict[str, float], phase: str) -> Generator:
+    """Yield from an iterable while adding the time spent producing each item to timings[phase]"""
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            timings[phase] += time.perf_counter() - started
+            return
+        timings[phase] += time.perf_counter() - started
+        yield item
+
+def encode_card_payload(data_json: str, payload_format: str = CACHE_PAYLOAD_FORMAT):
+    """
+    Encode a card's JSON text for storage in cards_cache.data_json.
+    
+    Args:
+        data_json: The card serialized as JSON text
+        payload_format: 'json' stores the text as-is, 'zlib' stores compressed bytes
+        
+    Returns:
+        A str for the json format, bytes for the zlib format
+    """
+    if payload_format == 'zlib':
+        return zlib.compress(data_json.encode('utf-8'))
+    if payload_format != 'json':
+        raise ValueError(f'Unknown card payload format: {payload_format}')
+    return data_json
+
+def decode_card_payload(payload) -> Dict:
+    """
+    Decode a stored cards_cache.data_json value in either payload format.
+    
+    Args:
+        payload: JSON text, or zlib-compressed JSON bytes
+        
+    Returns:
+        The card as a dictionary
+    """
+    if isinstance(payload, bytes):
+        payload = zlib.decompress(payload)
+    return json.loads(payload)
+
+def _file_sha256(path: str) -> Optional[str]:
+    """Compute the SHA-256 checksum of a file, or None if it cannot be read"""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+def get_peak_rss_mb() -> Optional[float]:
+    """Get the peak resident set size of this process in megabytes, if available"""
+    if resource is None:
+        return None
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == 'darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+class ProjectedDict(dict):
+    """A nested dict of a CachedCard, such as image_uris, holding only the projected keys.
+    
+    Reading any other key loads the card's full payload and answers from the
+    complete dict. Like CachedCard itself, iteration, keys() and JSON encoding
+    see only the keys present so far; CachedCard.to_dict() gives the whole card.
+    """
+    __slots__ = ('_card', '_field')
+    
+    def __init__(self, fields: Dict, card: 'CachedCard', field: str):
+        super().__init__(fields)
+        self._card = card
+        self._field = field
+    
+    def _full(self) -> Dict:
+        """The card's complete dict for this field, loading the payload if needed"""
+        self._card._load_full()
+        full = dict.get(self._card, self._field)
+        return full if isinstance(full, dict) and full is not self else {}
+    
+    def __missing__(self, key):
+        full = self._full()
+        if key in full:
+            return full[key]
+        raise KeyError(key)
+    
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self._full()
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class CachedCard(dict):
+    """A card built from the projected cards_cache columns.
+    
+    Holds the fields the set views, collection manager and importer read. The
+    first access to any other field decodes the full Scryfall payload once,
+    through `loader`, and merges it in. image_uris and prices are projected
+    partially (small and normal images, USD prices) as ProjectedDicts, which
+    load the payload the same way when asked for another key.
+    """
+    __slots__ = ('_loader', '_loaded', 'collector_sort_key')
+    
+    PROJECTED_FIELDS = frozenset((
+        'id', 'name', 'set', 'collector_number', 'set_name', 'rarity', 'image_uris', 'prices',
+        'set_type', 'released_at', 'mana_cost', 'type_line'
+    ))
+    
+    def __init__(self, fields: Dict, loader):
+        super().__init__(fields)
+        self._loader = loader
+        self._loaded = False
+        self.collector_sort_key = None
+    
+    @classmethod
+    def from_row(cls, row: tuple, loader) -> 'CachedCard':
+        """Build a card from a row selected with CARD_PROJECTION_SELECT"""
+        (card_id, name, set_code, collector_number, set_name, rarity, image_url, price_usd,
+         price_usd_foil, image_url_normal, set_type, released_at, mana_cost, type_line, collector_sort_key) = row
+        fields = {
+            'id': card_id,
+            'name': name,
+            'set': set_code,
+            'collector_number': collector_number,
+            'set_name': set_name,
+            'rarity': rarity,
+            'prices': {'usd': price_usd, 'usd_foil': price_usd_foil}
+        }
+        # Cards without top-level images (double-faced cards) keep image_uris unset
+        if image_url or image_url_normal:
+            fields['image_uris'] = {'small': image_url, 'normal': image_url_normal}
+        for key, value in (('set_type', set_type), ('released_at', released_at),
+                           ('mana_cost', mana_cost), ('type_line', type_line)):
+            if value is not None:
+                fields[key] = value
+        card = cls(fields, loader)
+        for key in ('image_uris', 'prices'):
+            if key in fields:
+                dict.__setitem__(card, key, ProjectedDict(fields[key], card, key))
+        card.collector_sort_key = collector_sort_key
+        return card
+    
+    def _load_full(self):
+        """Merge in the full payload, keeping any fields the caller has added"""
+        if self._loaded:
+            return
+        full_card = self._loader(dict.__getitem__(self, 'id')) or {}
+        for key, value in full_card.items():
+            if key in self.PROJECTED_FIELDS or not dict.__contains__(self, key):
+                dict.__setitem__(self, key, value)
+        # Set last: cards from the set list cache are shared between request threads, and
+        # one that reads mid-load must load too rather than miss the fields being merged
+        self._loaded = True
+    
+    def __missing__(self, key):
+        # Underscore keys are local annotations such as _source, never payload fields,
+        # and a projected field missing from the row is missing from the payload too
+        if isinstance(key, str) and key.startswith('_') or key in self.PROJECTED_FIELDS:
+            raise KeyError(key)
+        self._load_full()
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+    
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        if isinstance(key, str) and key.startswith('_') or key in self.PROJECTED_FIELDS:
+            return False
+        self._load_full()
+        return dict.__contains__(self, key)
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def to_dict(self) -> Dict:
+        """Return the full card as a plain dictionary"""
+        self._load_full()
+        return dict(self)
+
+
+class CardNameMatcher:
+    """Typo-tolerant matcher over every distinct card name in the cache.
+    
+    Candidates are the names sharing the most character trigrams with the
+    query; the closest by edit distance wins. Each face of a multi-faced card
+    is indexed too, so "Fire" finds "Fire // Ice".
+    """
+    
+    def __init__(self, names: Iterable[str]):
+        self._keys = []  # Normalized names (and faces) that can be matched
+        self._names = []  # Card name each key resolves to
+        self._exact = {}
+        self._trigrams = defaultdict(list)
+        for name in names:
+            faces = name.split(' // ')
+            for key in {normalize_card_name(text) for text in [name] + (faces if len(faces) > 1 else [])}:
+                if not key or key in self._exact:
+                    continue
+                position = len(self._keys)
+                self._keys.append(key)
+                self._names.append(name)
+                self._exact[key] = position
+                for trigram in self._key_trigrams(key):
+                    self._trigrams[trigram].append(position)
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    @staticmethod
+    def _key_trigrams(key: str) -> set:
+        """Character trigrams of a normalized name, padded so word edges count"""
+        padded = f'  {key} '
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    @staticmethod
+    def similarity(first: str, second: str) -> float:
+        """Score two card names from 0 to 1 by edit distance over their normalized forms"""
+        first_key, second_key = normalize_card_name(first), normalize_card_name(second)
+        longest = max(len(first_key), len(second_key))
+        if not longest:
+            return 0.0
+        return round(1 - edit_distance(first_key, second_key) / longest, 3)
+    
+    def match(self, name: str) -> Optional[Dict]:
+        """Find the closest card name, with its edit distance and a 0-1 confidence"""
+        key = normalize_card_name(name)
+        if not key:
+            return None
+        if key in self._exact:
+            return {'name': self._names[self._exact[key]], 'distance': 0, 'confidence': 1.0}
+        
+        shared = Counter()
+        for trigram in self._key_trigrams(key):
+            shared.update(self._trigrams.get(trigram, ()))
+        
+        best_position, best_distance = None, None
+        for position, _ in shared.most_common(FUZZY_MATCH_CANDIDATES):
+            limit = len(key) if best_distance is None else best_distance - 1
+            distance = edit_distance(key, self._keys[position], limit)
+            if distance <= limit:
+                best_position, best_distance = position, distance
+        
+        if best_position is None:
+            return None
+        longest = max(len(key), len(self._keys[best_position]))
+        return {
+            'name': self._names[best_position],
+            'distance': best_distance,
+            'confidence': round(1 - best_distance / longest, 3)
+        }
+
+
 class BulkDataCache:
     """Manages local caching of Scryfall bulk data for faster imports"""
     
-    def __init__(self, db_path: str = CACHE_DB_PATH):
+    def __init__(self, db_path: str = CACHE_DB_PATH, staging_dir: str = BULK_STAGING_DIR,
+                 payload_format: Optional[str] = None):
+        if payload_format is not None and payload_format not in CACHE_PAYLOAD_FORMATS:
+            raise ValueError(f'Unknown card payload format: {payload_format}')
         self.db_path = db_path
+        self.staging_dir = staging_dir
+        # None means the format recorded by the last migration, else CACHE_PAYLOAD_FORMAT
+        self.payload_format = payload_format
+        self._local = threading.local()
+        self._pool_lock = threading.Lock()
+        self._pool = {}  # Owning thread -> its pooled connections, for teardown
+        self._pool_generation = 0
+        self.fts_enabled = False  # Set by init_database when SQLite has FTS5 with the trigram tokenizer
+        self._name_matcher = None
+        self._name_matcher_generation = None
+        self._name_matcher_lock = threading.Lock()
+        self._known_generation = (0, None)  # Generation last read here and when, for conditional GETs
+        self.last_refresh_stats = {}
         self.init_database()
     
+    def _open_connection(self, read_only: bool) -> sqlite3.Connection:
+        """Open a cache connection with the pooled connection pragmas applied"""
+        conn = None
+        if read_only and self.db_path != ':memory:':
+            uri = pathlib.Path(os.path.abspath(self.db_path)).as_uri() + '?mode=ro'
+            try:
+                conn = sqlite3.connect(uri, uri=True, timeout=CACHE_CONNECTION_TIMEOUT, check_same_thread=False)
+                conn.execute('SELECT 1 FROM sqlite_master LIMIT 1')
+            except sqlite3.OperationalError:
+                # Read-only opens can fail before the WAL files exist; fall back to read-write
+                if conn is not None:
+                    conn.close()
+                conn = None
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=CACHE_CONNECTION_TIMEOUT, check_same_thread=False)
+            conn.execute('PRAGMA synchronous = NORMAL')
+        for pragma in CACHE_CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    def _connection(self, read_only: bool = True) -> sqlite3.Connection:
+        """Get this thread's pooled connection, opening it on first use.
+        
+        Lookups use a read-only connection; writes outside bulk refreshes share
+        a read-write one. Connections opened before the last reset_connections()
+        are replaced.
+        """
+        local = self._local
+        if getattr(local, 'generation', None) != self._pool_generation:
+            self._close_thread_connections(threading.current_thread())
+            local.connections = {}
+            local.generation = self._pool_generation
+        
+        conn = local.connections.get(read_only)
+        if conn is None:
+            conn = self._open_connection(read_only)
+            local.connections[read_only] = conn
+            with self._pool_lock:
+                # Close connections left behind by threads that have exited
+                for thread in [thread for thread in self._pool if not thread.is_alive()]:
+                    for stale_conn in self._pool.pop(thread):
+                        stale_conn.close()
+                self._pool.setdefault(threading.current_thread(), []).append(conn)
+        return conn
+    
+    def _close_thread_connections(self, thread: threading.Thread):
+        """Close and forget the pooled connections owned by a thread"""
+        with self._pool_lock:
+            connections = self._pool.pop(thread, [])
+        for conn in connections:
+            conn.close()
+    
+    def reset_connections(self):
+        """Retire pooled connections so every thread reconnects on its next lookup.
+        
+        Called after a refresh swaps in new data. The calling thread's connections
+        close immediately; other threads close theirs on next use, since a
+        connection may be mid-query in its owning thread.
+        """
+        self._pool_generation += 1
+        self._close_thread_connections(threading.current_thread())
+    
+    def close_connections(self):
+        """Close every pooled connection, e.g. at shutdown"""
+        self._pool_generation += 1
+        with self._pool_lock:
+            pooled, self._pool = self._pool, {}
+        for connections in pooled.values():
+            for conn in connections:
+                conn.close()
+    
     def init_database(self):
         """Initialize the SQLite database for caching"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # WAL lets readers keep using the current data while a refresh writes
+        cursor.execute('PRAGMA journal_mode = WAL')
+        
         # Create tables for caching
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS bulk_metadata (
@@ -71,25 +813,28 @@ class BulkDataCache:
                 download_url TEXT,
                 updated_at TEXT,
                 size INTEGER,
-                etag TEXT
+                etag TEXT,
+                last_modified TEXT,
+                source_updated_at TEXT
             )
         ''')
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cards_cache (
-                id TEXT PRIMARY KEY,
-                name TEXT,
-                set_code TEXT,
-                collector_number TEXT,
-                set_name TEXT,
-                rarity TEXT,
-                image_url TEXT,
-                price_usd TEXT,
-                price_usd_foil TEXT,
-                data_json TEXT,
-                updated_at TEXT
-            )
-        ''')
+        # Older databases stored content_encoding in etag and lack the HTTP validators
+        cursor.execute("PRAGMA table_info(bulk_metadata)")
+        metadata_columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'last_modified' not in metadata_columns:
+            cursor.execute('ALTER TABLE bulk_metadata ADD COLUMN last_modified TEXT')
+        
+        if 'source_updated_at' not in metadata_columns:
+            cursor.execute('ALTER TABLE bulk_metadata ADD COLUMN source_updated_at TEXT')
+        
+        # Settings that must survive a restart, such as the migrated payload format
+        cursor.execute(CACHE_SETTINGS_SCHEMA)
+        if self.payload_format is None:
+            self.payload_format = self._get_setting(cursor, 'payload_format') or CACHE_PAYLOAD_FORMAT
+        
+        cursor.execute(CARDS_CACHE_SCHEMA.format(table='cards_cache'))
         
         # Check if price columns exist and add them if not (for backwards compatibility)
         cursor.execute("PRAGMA table_info(cards_cache)")
@@ -101,26 +846,100 @@ class BulkDataCache:
         if 'price_usd_foil' not in columns:
             cursor.execute('ALTER TABLE cards_cache ADD COLUMN price_usd_foil TEXT')
         
+        if 'content_hash' not in columns:
+            cursor.execute('ALTER TABLE cards_cache ADD COLUMN content_hash TEXT')
+        
+        missing_projections = [column for column in CARD_PROJECTED_COLUMNS if column not in columns]
+        for column in missing_projections:
+            cursor.execute(f'ALTER TABLE cards_cache ADD COLUMN {column} TEXT')
+        if missing_projections:
+            self._backfill_projected_columns(cursor)
+        
+        # Lookups compare case-folded keys so they can use plain indexes
+        if 'name_lower' not in columns:
+            cursor.execute('ALTER TABLE cards_cache ADD COLUMN name_lower TEXT')
+            conn.create_function('fold_case', 1, lambda value: value.lower() if value else value, deterministic=True)
+            cursor.execute('UPDATE cards_cache SET name_lower = fold_case(name), set_code = fold_case(set_code)')
+        
+        # Set pages read cards in collector order straight off idx_cards_set_order
+        if 'collector_sort_key' not in columns:
+            cursor.execute('ALTER TABLE cards_cache ADD COLUMN collector_sort_key TEXT')
+            conn.create_function('collector_sort_key', 1, collector_number_sort_key, deterministic=True)
+            cursor.execute('UPDATE cards_cache SET collector_sort_key = collector_sort_key(collector_number)')
+        cursor.execute('DROP INDEX IF EXISTS idx_cards_set')
+        
+        # Indexes created with an older definition are rebuilt; SQLite stores the SQL without IF NOT EXISTS
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = 'cards_cache'")
+        for index_name, index_sql in cursor.fetchall():
+            if index_name in CARD_CACHE_INDEXES and index_sql != CARD_CACHE_INDEXES[index_name].replace(' IF NOT EXISTS', ''):
+                cursor.execute(f'DROP INDEX {index_name}')
+        
         # Create indexes for fast lookups
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cards_name ON cards_cache(name)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cards_set ON cards_cache(set_code)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cards_collector ON cards_cache(collector_number)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cards_lookup ON cards_cache(name, set_code, collector_number)')
+        for index_sql in CARD_CACHE_INDEXES.values():
+            cursor.execute(index_sql)
+        
+        # Older databases have cards but no materialized set listing yet
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sets_cache'")
+        has_sets_cache = cursor.fetchone() is not None
+        cursor.execute(SETS_CACHE_SCHEMA)
+        for index_sql in SETS_CACHE_INDEXES:
+            cursor.execute(index_sql)
+        if not has_sets_cache:
+            self._rebuild_sets_cache(cursor)
+        
+        self._init_search_index(cursor)
         
         conn.commit()
         conn.close()
     
+    def _init_search_index(self, cursor, rebuild: bool = False):
+        """Create the full-text search index and its sync triggers if SQLite supports them.
+        
+        The index is rebuilt from cards_cache when it is first created or when
+        rebuild is set, e.g. after a full load replaced the table.
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'cards_fts'")
+        rebuild = rebuild or cursor.fetchone() is None
+        try:
+            cursor.execute(CARDS_FTS_SCHEMA)
+        except sqlite3.OperationalError as e:
+            # Builds without FTS5 or the trigram tokenizer (SQLite < 3.34) fall back to index scans
+            print(f"Full-text card search unavailable, using name indexes only: {e}")
+            self.fts_enabled = False
+            return
+        for trigger_sql in CARDS_FTS_TRIGGERS:
+            cursor.execute(trigger_sql)
+        if rebuild:
+            cursor.execute("INSERT INTO cards_fts (cards_fts) VALUES ('rebuild')")
+        self.fts_enabled = True
+    
+    def _backfill_projected_columns(self, cursor):
+        """Fill projected columns for rows cached before they existed"""
+        cursor.execute('SELECT id FROM cards_cache')
+        card_ids = [row[0] for row in cursor.fetchall()]
+        for batch in chunked(card_ids, 500):
+            placeholders = ','.join('?' * len(batch))
+            cursor.execute(f'SELECT id, data_json FROM cards_cache WHERE id IN ({placeholders})', batch)
+            updates = [
+                self._project_card(decode_card_payload(payload)) + (card_id,)
+                for card_id, payload in cursor.fetchall()
+            ]
+            cursor.executemany(f'''
+                UPDATE cards_cache SET {', '.join(f'{column} = ?' for column in CARD_PROJECTED_COLUMNS)}
+                WHERE id = ?
+            ''', updates)
+        if card_ids:
+            print(f"Backfilled projected columns for {len(card_ids)} cached cards")
+    
     def is_cache_valid(self, data_type: str = 'default_cards') -> bool:
         """Check if cached data is still valid"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._connection().cursor()
         
         cursor.execute(
             'SELECT updated_at FROM bulk_metadata WHERE data_type = ?',
             (data_type,)
         )
         result = cursor.fetchone()
-        conn.close()
         
         if not result:
             return False
@@ -154,27 +973,40 @@ class BulkDataCache:
             print(f"Error fetching bulk data info: {e}")
             return None
     
-    def download_and_cache_bulk_data(self, progress_callback=None) -> bool:
-        """Download and cache bulk card data"""
+    def download_and_cache_bulk_data(self, progress_callback=None, delta: bool = False, force: bool = False) -> bool:
+        """Download and cache bulk card data.
+        
+        The download is skipped when Scryfall reports the same bulk `updated_at`
+        as the cached copy, and is made conditional on the stored HTTP ETag and
+        Last-Modified validators so an unchanged file answers 304. Pass
+        force=True to re-ingest regardless.
+        
+        The file is staged compressed on disk (resuming an interrupted transfer
+        where possible) and ingested from there; see ingest_staged_bulk_data.
+        """
         bulk_info = self.get_bulk_data_info()
         if not bulk_info:
             return False
         
+        conn = None
         try:
-            # Check if we need to download (based on etag/size)
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            cursor.execute(
-                'SELECT etag, size FROM bulk_metadata WHERE data_type = ?',
-                ('default_cards',)
+            cached_info = self._get_bulk_metadata(cursor)
+            cursor.execute('SELECT EXISTS (SELECT 1 FROM cards_cache)')
+            has_cards = bool(cursor.fetchone()[0])
+            
+            # Validators are only trusted for the same file that is already cached
+            conditional = (
+                not force and has_cards and cached_info is not None
+                and cached_info['source_updated_at'] is not None
+                and cached_info['download_url'] == bulk_info.get('download_uri')
             )
-            cached_info = cursor.fetchone()
             
-            # If we have the same etag and size, skip download
-            if cached_info and cached_info[0] == bulk_info.get('content_encoding') and cached_info[1] == bulk_info.get('size'):
-                conn.close()
-                return True
+            # Scryfall publishes a new updated_at whenever the bulk file changes
+            if conditional and cached_info['source_updated_at'] == bulk_info.get('updated_at'):
+                return self._mark_bulk_data_current(conn, bulk_info, progress_callback, 'bulk data updated_at is unchanged')
             
             if progress_callback:
                 progress_callback({
@@ -184,153 +1016,659 @@ class BulkDataCache:
                     'total': 100
                 })
             
-            # Download bulk data
-            response = requests.get(
-                bulk_info['download_uri'],
-                stream=True,
-                headers={
-                    'User-Agent': 'mtg-collection-builder/1.0 (+https://github.com/MattPicDev/mtg-collection-builder)',
-                    'Accept': 'application/json'
-                },
-                timeout=60
-            )
+            timings = {'download': 0.0, 'parse': 0.0, 'insert': 0.0, 'index': 0.0}
+            
+            # Reuse a verified staged copy of this exact file instead of downloading again
+            staged = None if force else self.get_staged_bulk_data()
+            if staged is None or staged.get('download_uri') != bulk_info.get('download_uri') \
+                    or staged.get('source_updated_at') != bulk_info.get('updated_at'):
+                staged = self._stage_bulk_download(bulk_info, cached_info if conditional else None, timings, progress_callback)
+                if staged is None:
+                    return self._mark_bulk_data_current(conn, bulk_info, progress_callback, 'bulk file not modified')
+            
+            try:
+                return self._ingest_staged_file(conn, staged, timings, progress_callback, delta)
+            except Exception:
+                # A file that cannot be ingested must not be reused by the next refresh
+                self._discard_staged_bulk_data()
+                raise
+            
+        except Exception as e:
+            print(f"Error downloading bulk data: {e}")
+            if progress_callback:
+                progress_callback({
+                    'status': 'error',
+                    'message': f'Error downloading bulk data: {str(e)}',
+                    'current': 0,
+                    'total': 0
+                })
+            return False
+        finally:
+            if conn is not None:
+                conn.close()
+    
+    def ingest_staged_bulk_data(self, progress_callback=None, delta: bool = False) -> bool:
+        """Re-ingest the staged bulk file without touching the network.
+        
+        Useful after a schema change, or to seed another worker by copying the
+        staging directory next to its database.
+        """
+        staged = self.get_staged_bulk_data()
+        if staged is None:
+            print("No verified staged bulk data available to ingest")
+            if progress_callback:
+                progress_callback({
+                    'status': 'error',
+                    'message': 'No staged bulk data available',
+                    'current': 0,
+                    'total': 0
+                })
+            return False
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            timings = {'download': 0.0, 'parse': 0.0, 'insert': 0.0, 'index': 0.0}
+            return self._ingest_staged_file(conn, staged, timings, progress_callback, delta, fetch_sets=False)
+        except Exception as e:
+            print(f"Error ingesting staged bulk data: {e}")
+            if progress_callback:
+                progress_callback({
+                    'status': 'error',
+                    'message': f'Error ingesting staged bulk data: {str(e)}',
+                    'current': 0,
+                    'total': 0
+                })
+            return False
+        finally:
+            conn.close()
+    
+    def _staging_path(self, suffix: str) -> str:
+        """Build the path of a file in the bulk staging directory"""
+        return os.path.join(self.staging_dir, f'default_cards{suffix}')
+    
+    def get_staged_bulk_data(self) -> Optional[Dict]:
+        """Get metadata for the staged bulk file if it exists and its checksum verifies"""
+        try:
+            with open(self._staging_path('.meta.json'), encoding='utf-8') as meta_file:
+                staged = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+        
+        if _file_sha256(self._staging_path('.json.gz')) != staged.get('sha256'):
+            print("Staged bulk data failed checksum verification")
+            return None
+        
+        staged['path'] = self._staging_path('.json.gz')
+        return staged
+    
+    def _discard_staged_bulk_data(self):
+        """Remove the staged bulk file and its metadata"""
+        for suffix in ('.meta.json', '.json.gz'):
+            try:
+                os.remove(self._staging_path(suffix))
+            except OSError:
+                pass
+    
+    def _stage_bulk_download(self, bulk_info: Dict, cached_info: Optional[Dict], timings: Dict[str, float], progress_callback=None) -> Optional[Dict]:
+        """Download the bulk file into the staging directory, resuming a partial transfer if possible.
+        
+        The body is requested with gzip transfer encoding and kept compressed on
+        disk. Returns the staged file metadata, or None when the server answered
+        304 for the cached validators.
+        """
+        os.makedirs(self.staging_dir, exist_ok=True)
+        part_path = self._staging_path('.part')
+        part_meta_path = self._staging_path('.part.json')
+        
+        # A partial download can only be resumed for the same file and validator
+        part_meta = None
+        try:
+            with open(part_meta_path, encoding='utf-8') as part_meta_file:
+                part_meta = json.load(part_meta_file)
+        except (OSError, ValueError):
+            pass
+        resume_from = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if not part_meta or part_meta.get('download_uri') != bulk_info['download_uri'] \
+                or not (part_meta.get('etag') or part_meta.get('last_modified')):
+            resume_from = 0
+        
+        headers = {
+            'User-Agent': 'mtg-collection-builder/1.0 (+https://github.com/MattPicDev/mtg-collection-builder)',
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip'
+        }
+        if resume_from:
+            headers['Range'] = f'bytes={resume_from}-'
+            headers['If-Range'] = part_meta.get('etag') or part_meta.get('last_modified')
+        elif cached_info:
+            if cached_info['etag']:
+                headers['If-None-Match'] = cached_info['etag']
+            if cached_info['last_modified']:
+                headers['If-Modified-Since'] = cached_info['last_modified']
+        
+        started = time.perf_counter()
+        response = requests.get(bulk_info['download_uri'], stream=True, headers=headers, timeout=60)
+        try:
+            if response.status_code == 304:
+                return None
+            
+            if response.status_code == 416 and resume_from:
+                # The partial file no longer lines up with the remote; start over
+                os.remove(part_path)
+                return self._stage_bulk_download(bulk_info, cached_info, timings, progress_callback)
+            
             response.raise_for_status()
             
-            # Parse JSON incrementally
-            cards_data = response.json()
-            total_cards = len(cards_data)
+            content_encoding = response.headers.get('Content-Encoding', '').lower()
+            resumed = response.status_code == 206 and resume_from > 0 \
+                and part_meta.get('content_encoding', '') == content_encoding
+            if not resumed:
+                resume_from = 0
+                part_meta = {
+                    'download_uri': bulk_info['download_uri'],
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'content_encoding': content_encoding
+                }
+                with open(part_meta_path, 'w', encoding='utf-8') as part_meta_file:
+                    json.dump(part_meta, part_meta_file)
+            
+            content_length = int(response.headers.get('Content-Length') or 0)
+            total_bytes = resume_from + content_length if content_length else 0
+            bytes_written = resume_from
+            last_reported = 0
             
-            # Clear existing cache
-            cursor.execute('DELETE FROM cards_cache')
+            # Write the body exactly as sent so gzip-encoded transfers stay compressed
+            with open(part_path, 'ab' if resumed else 'wb') as part_file:
+                for chunk in response.raw.stream(BULK_STREAM_CHUNK_SIZE, decode_content=False):
+                    part_file.write(chunk)
+                    bytes_written += len(chunk)
+                    
+                    if progress_callback and bytes_written - last_reported >= BULK_STREAM_CHUNK_SIZE * 16:
+                        last_reported = bytes_written
+                        progress_callback({
+                            'status': 'downloading',
+                            'message': f'Downloaded {bytes_written / (1024 * 1024):.1f} MB of bulk card data...',
+                            'current': bytes_written if total_bytes else 0,
+                            'total': total_bytes
+                        })
             
-            # Insert cards into cache
-            for i, card in enumerate(cards_data):
-                if progress_callback and i % 1000 == 0:
-                    progress_callback({
-                        'status': 'caching',
-                        'message': f'Caching card {i+1} of {total_cards}...',
-                        'current': i,
-                        'total': total_cards
-                    })
+            if total_bytes and bytes_written < total_bytes:
+                raise ValueError(f'Bulk download incomplete ({bytes_written} of {total_bytes} bytes)')
+        finally:
+            response.close()
+        
+        # Keep the staged copy gzip-compressed regardless of the transfer encoding
+        staged_path = self._staging_path('.json.gz')
+        if part_meta.get('content_encoding') == 'gzip':
+            os.replace(part_path, staged_path)
+        else:
+            with open(part_path, 'rb') as raw_file, gzip.open(staged_path, 'wb') as staged_file:
+                shutil.copyfileobj(raw_file, staged_file, BULK_STREAM_CHUNK_SIZE)
+            os.remove(part_path)
+        
+        staged = {
+            'download_uri': bulk_info['download_uri'],
+            'source_updated_at': bulk_info.get('updated_at'),
+            'size': bulk_info.get('size', 0),
+            'etag': part_meta.get('etag'),
+            'last_modified': part_meta.get('last_modified'),
+            'sha256': _file_sha256(staged_path),
+            'staged_at': datetime.now().isoformat()
+        }
+        with open(self._staging_path('.meta.json'), 'w', encoding='utf-8') as meta_file:
+            json.dump(staged, meta_file)
+        os.remove(part_meta_path)
+        
+        timings['download'] += time.perf_counter() - started
+        staged['path'] = staged_path
+        return staged
+    
+    def _ingest_staged_file(self, conn, staged: Dict, timings: Dict[str, float], progress_callback=None,
+                            delta: bool = False, fetch_sets: bool = True) -> bool:
+        """Parse the staged bulk file and load it into the cache.
+        
+        A full load fills a shadow table and swaps it in. A delta load compares
+        each card's content hash with the cached row and only writes cards that
+        are new or changed, deleting cards that no longer appear in the file.
+        Without fetch_sets the set list keeps the metadata already cached, so
+        nothing touches the network.
+        """
+        # Fetch set metadata before taking the write lock
+        scryfall_sets = self._fetch_scryfall_sets() if fetch_sets else None
+        
+        cursor = conn.cursor()
+        try:
+            # Apply load-time pragmas; journal_mode cannot change inside a transaction
+            for pragma in BULK_LOAD_PRAGMAS:
+                cursor.execute(pragma)
+            
+            with open(staged['path'], 'rb') as raw_file:
+                total_bytes = os.fstat(raw_file.fileno()).st_size
                 
-                cursor.execute('''
-                    INSERT OR REPLACE INTO cards_cache 
-                    (id, name, set_code, collector_number, set_name, rarity, image_url, price_usd, price_usd_foil, data_json, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    card['id'],
-                    card['name'],
-                    card['set'],
-                    card['collector_number'],
-                    card.get('set_name', ''),
-                    card.get('rarity', ''),
-                    card.get('image_uris', {}).get('small', ''),
-                    card.get('prices', {}).get('usd'),
-                    card.get('prices', {}).get('usd_foil'),
-                    json.dumps(card),
-                    datetime.now().isoformat()
-                ))
+                def report_progress(cards_processed):
+                    if progress_callback:
+                        progress_callback({
+                            'status': 'caching',
+                            'message': f'Cached {cards_processed} cards...',
+                            'current': min(raw_file.tell(), total_bytes),
+                            'total': total_bytes
+                        })
+                
+                with gzip.GzipFile(fileobj=raw_file) as compressed_file:
+                    text_file = io.TextIOWrapper(compressed_file, encoding='utf-8')
+                    text_chunks = iter(lambda: text_file.read(BULK_STREAM_CHUNK_SIZE), '')
+                    
+                    updated_at = datetime.now().isoformat()
+                    rows = (self._card_to_row(card, updated_at, self.payload_format) for card in iter_json_array(text_chunks))
+                    batches = timed_iter(chunked(rows, BULK_INGEST_BATCH_SIZE), timings, 'parse')
+                    
+                    if delta:
+                        counts = self._load_delta(conn, batches, timings, report_progress)
+                    else:
+                        counts = self._load_full(conn, batches, timings, report_progress, progress_callback)
+            
+            if progress_callback:
+                progress_callback({
+                    'status': 'indexing',
+                    'message': 'Building set list...',
+                    'current': counts['total'],
+                    'total': counts['total']
+                })
+            self._rebuild_sets_cache(cursor, scryfall_sets)
             
-            # Update bulk metadata
+            # Update bulk metadata as part of the transaction that published the cards
+            self._bump_generation(cursor)
             cursor.execute('''
                 INSERT OR REPLACE INTO bulk_metadata 
-                (data_type, download_url, updated_at, size, etag)
-                VALUES (?, ?, ?, ?, ?)
+                (data_type, download_url, updated_at, size, etag, last_modified, source_updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (
                 'default_cards',
-                bulk_info['download_uri'],
+                staged['download_uri'],
                 datetime.now().isoformat(),
-                bulk_info.get('size', 0),
-                bulk_info.get('content_encoding', '')
+                staged.get('size', 0),
+                staged.get('etag'),
+                staged.get('last_modified'),
+                staged.get('source_updated_at')
             ))
             
             conn.commit()
-            conn.close()
-            
-            if progress_callback:
-                progress_callback({
-                    'status': 'complete',
-                    'message': f'Cached {total_cards} cards successfully',
-                    'current': total_cards,
-                    'total': total_cards
-                })
+            self.generation  # Re-read, so conditional GETs here see the refresh at once
+        except Exception:
+            conn.rollback()
+            try:
+                conn.execute(f'DROP TABLE IF EXISTS {CARDS_CACHE_SHADOW_TABLE}')
+                conn.commit()
+            except sqlite3.Error:
+                pass
+            raise
+        
+        # Readers reconnect so none keeps statements prepared against the old table
+        self.reset_connections()
+        
+        total_cards = counts['total']
+        peak_rss_mb = get_peak_rss_mb()
+        self.last_refresh_stats = {
+            'mode': 'delta' if delta else 'full',
+            'total_cards': total_cards,
+            'inserted': counts['inserted'],
+            'updated': counts['updated'],
+            'unchanged': counts['unchanged'],
+            'deleted': counts['deleted'],
+            'staged_bytes': total_bytes,
+            'peak_rss_mb': peak_rss_mb,
+            'timings': timings
+        }
+        timing_text = ', '.join(f'{phase} {seconds:.2f}s' for phase, seconds in timings.items())
+        peak_rss_text = f', peak RSS {peak_rss_mb:.1f} MB' if peak_rss_mb is not None else ''
+        delta_text = (
+            f" ({counts['inserted']} inserted, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['deleted']} deleted)"
+        ) if delta else ''
+        print(f"Cached {total_cards} cards from bulk data{delta_text} ({timing_text}{peak_rss_text})")
+        
+        if progress_callback:
+            progress_callback({
+                'status': 'complete',
+                'message': f'Cached {total_cards} cards successfully{delta_text} ({timing_text}{peak_rss_text})',
+                'current': total_cards,
+                'total': total_cards
+            })
+        
+        return True
+    
+    def _get_bulk_metadata(self, cursor) -> Optional[Dict]:
+        """Get the stored metadata for the cached default_cards bulk file"""
+        cursor.execute('''
+            SELECT download_url, updated_at, size, etag, last_modified, source_updated_at
+            FROM bulk_metadata WHERE data_type = ?
+        ''', ('default_cards',))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        
+        keys = ('download_url', 'updated_at', 'size', 'etag', 'last_modified', 'source_updated_at')
+        return dict(zip(keys, row))
+    
+    def _mark_bulk_data_current(self, conn, bulk_info: Dict, progress_callback, reason: str) -> bool:
+        """Record that the cached bulk data is still current without re-ingesting it"""
+        conn.execute('''
+            UPDATE bulk_metadata SET updated_at = ?, source_updated_at = ?
+            WHERE data_type = ?
+        ''', (datetime.now().isoformat(), bulk_info.get('updated_at'), 'default_cards'))
+        conn.commit()
+        
+        self.last_refresh_stats = {'mode': 'skipped', 'reason': reason}
+        print(f"Bulk data is current ({reason}); skipping download")
+        
+        if progress_callback:
+            progress_callback({
+                'status': 'complete',
+                'message': f'Card database is already up to date ({reason})',
+                'current': 100,
+                'total': 100
+            })
+        
+        return True
+    
+    def _load_full(self, conn, batches: Iterable[List[tuple]], timings: Dict[str, float], report_progress, progress_callback=None) -> Dict[str, int]:
+        """Load every card into a shadow table and swap it in, leaving the swap transaction open"""
+        cursor = conn.cursor()
+        
+        # Build the new generation in an unindexed shadow table. Readers keep
+        # using cards_cache at full speed until the shadow is swapped in below.
+        cursor.execute(f'DROP TABLE IF EXISTS {CARDS_CACHE_SHADOW_TABLE}')
+        cursor.execute(CARDS_CACHE_SCHEMA.format(table=CARDS_CACHE_SHADOW_TABLE))
+        conn.commit()
+        
+        total_cards = 0
+        for batch in batches:
+            started = time.perf_counter()
+            self._insert_card_rows(cursor, batch, CARDS_CACHE_SHADOW_TABLE)
+            conn.commit()
+            timings['insert'] += time.perf_counter() - started
+            total_cards += len(batch)
+            report_progress(total_cards)
+        
+        if total_cards == 0:
+            raise ValueError('Bulk data contained no cards')
+        
+        if progress_callback:
+            progress_callback({
+                'status': 'indexing',
+                'message': f'Building indexes for {total_cards} cards...',
+                'current': total_cards,
+                'total': total_cards
+            })
+        
+        # Swap the shadow table in atomically; a failure before the commit
+        # leaves the previous generation untouched
+        started = time.perf_counter()
+        cursor.execute('BEGIN')
+        cursor.execute('DROP TABLE cards_cache')
+        cursor.execute(f'ALTER TABLE {CARDS_CACHE_SHADOW_TABLE} RENAME TO cards_cache')
+        for index_sql in CARD_CACHE_INDEXES.values():
+            cursor.execute(index_sql)
+        # The triggers went with the old table; the search index is rebuilt in one pass
+        self._init_search_index(cursor, rebuild=True)
+        timings['index'] = time.perf_counter() - started
+        
+        return {'total': total_cards, 'inserted': total_cards, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+    
+    def _load_delta(self, conn, batches: Iterable[List[tuple]], timings: Dict[str, float], report_progress) -> Dict[str, int]:
+        """Upsert only new or changed cards and delete vanished ones, leaving the transaction open.
+        
+        The file is first compared with the cache under a read snapshot, and the
+        new or changed rows are staged in a temp table, which takes no lock on
+        the cache. The write transaction then only copies the staged rows in and
+        deletes vanished cards, so other writers wait for that step alone, and
+        readers switch to the new cards at the caller's commit, together with
+        the set list, generation and metadata. A failure applies nothing.
+        """
+        cursor = conn.cursor()
+        counts = {'total': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0}
+        
+        # Staged rows can be most of the file, so they spill to disk rather than memory
+        cursor.execute('PRAGMA temp_store = FILE')
+        cursor.execute('DROP TABLE IF EXISTS temp.refresh_rows')
+        cursor.execute(f'CREATE TEMP TABLE refresh_rows AS SELECT {CARD_ROW_COLUMNS} FROM main.cards_cache WHERE 0')
+        cursor.execute('CREATE UNIQUE INDEX temp.idx_refresh_rows_id ON refresh_rows (id)')
+        cursor.execute('CREATE TEMP TABLE IF NOT EXISTS refresh_seen_ids (id TEXT PRIMARY KEY)')
+        
+        cursor.execute('BEGIN')
+        cursor.execute('DELETE FROM temp.refresh_seen_ids')
+        for batch in batches:
+            started = time.perf_counter()
+            cached_hashes = self._get_content_hashes(cursor, [row[0] for row in batch])
             
-            return True
+            changed_rows = []
+            for row in batch:
+                if row[0] not in cached_hashes:
+                    counts['inserted'] += 1
+                    changed_rows.append(row)
+                elif cached_hashes[row[0]] != row[CARD_ROW_HASH_INDEX]:
+                    counts['updated'] += 1
+                    changed_rows.append(row)
+                else:
+                    counts['unchanged'] += 1
             
-        except Exception as e:
-            print(f"Error downloading bulk data: {e}")
-            if progress_callback:
-                progress_callback({
-                    'status': 'error',
-                    'message': f'Error downloading bulk data: {str(e)}',
-                    'current': 0,
-                    'total': 0
-                })
-            return False
+            if changed_rows:
+                self._insert_card_rows(cursor, changed_rows, 'temp.refresh_rows')
+            cursor.executemany(
+                'INSERT OR IGNORE INTO temp.refresh_seen_ids (id) VALUES (?)',
+                [(row[0],) for row in batch]
+            )
+            timings['insert'] += time.perf_counter() - started
+            counts['total'] += len(batch)
+            report_progress(counts['total'])
+        # Ends the read snapshot; only temp tables were written
+        conn.commit()
+        
+        if counts['total'] == 0:
+            raise ValueError('Bulk data contained no cards')
+        
+        started = time.perf_counter()
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute(f'''
+            INSERT INTO cards_cache ({CARD_ROW_COLUMNS})
+            SELECT {CARD_ROW_COLUMNS} FROM temp.refresh_rows WHERE true
+            {CARD_ROW_UPSERT}
+        ''')
+        cursor.execute('DELETE FROM cards_cache WHERE id NOT IN (SELECT id FROM temp.refresh_seen_ids)')
+        counts['deleted'] = cursor.rowcount
+        cursor.execute('DROP TABLE temp.refresh_rows')
+        cursor.execute('DELETE FROM temp.refresh_seen_ids')
+        timings['insert'] += time.perf_counter() - started
+        
+        return counts
+    
+    @staticmethod
+    def _get_content_hashes(cursor, card_ids: List[str]) -> Dict[str, str]:
+        """Look up the stored content hash for each of the given card ids"""
+        hashes = {}
+        # Stay well below SQLite's bound-parameter limit
+        for id_batch in chunked(card_ids, 500):
+            placeholders = ', '.join('?' for _ in id_batch)
+            cursor.execute(
+                f'SELECT id, content_hash FROM cards_cache WHERE id IN ({placeholders})',
+                id_batch
+            )
+            hashes.update(cursor.fetchall())
+        return hashes
+    
+    @staticmethod
+    def _card_to_row(card: Dict, updated_at: str, payload_format: str = CACHE_PAYLOAD_FORMAT) -> tuple:
+        """Convert a Scryfall card into a cards_cache row"""
+        image_uris = card.get('image_uris') or {}
+        prices = card.get('prices') or {}
+        data_json = json.dumps(card)
+        return (
+            card['id'],
+            card['name'],
+            card['set'].lower(),
+            card['collector_number'],
+            card.get('set_name', ''),
+            card.get('rarity', ''),
+            image_uris.get('small', ''),
+            prices.get('usd'),
+            prices.get('usd_foil'),
+            encode_card_payload(data_json, payload_format),
+            hashlib.sha1(data_json.encode('utf-8')).hexdigest(),
+            updated_at
+        ) + BulkDataCache._project_card(card) + (card['name'].lower(), collector_number_sort_key(card['collector_number']))
+    
+    @staticmethod
+    def _project_card(card: Dict) -> tuple:
+        """Extract the values of CARD_PROJECTED_COLUMNS from a Scryfall card"""
+        return (
+            (card.get('image_uris') or {}).get('normal'),
+            card.get('set_type'),
+            card.get('released_at'),
+            card.get('mana_cost'),
+            card.get('type_line')
+        )
+    
+    def _insert_card_rows(self, cursor, rows: List[tuple], table: str = 'cards_cache'):
+        """Write a batch of prepared card rows to the cache table"""
+        cursor.executemany(f'''
+            INSERT INTO {table} ({CARD_ROW_COLUMNS})
+            VALUES ({', '.join('?' * len(rows[0]))})
+            {CARD_ROW_UPSERT}
+        ''', rows)
     
     def find_card_in_cache(self, name: str, set_code: str, collector_number: str = None) -> Optional[Dict]:
         """Find a card in the local cache"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._connection().cursor()
         
         # Normalize set code using the same logic as the CollectionManager
         set_code = self._normalize_set_identifier(set_code)
         
         # First try exact match with collector number
         if collector_number:
-            cursor.execute('''
-                SELECT data_json FROM cards_cache 
+            cursor.execute(f'''
+                {CARD_PROJECTION_SELECT}
                 WHERE name = ? AND set_code = ? AND collector_number = ?
             ''', (name, set_code, collector_number))
             result = cursor.fetchone()
             if result:
-                conn.close()
-                return json.loads(result[0])
+                return CachedCard.from_row(result, self.get_card_payload)
         
         # Try without collector number
-        cursor.execute('''
-            SELECT data_json FROM cards_cache 
+        cursor.execute(f'''
+            {CARD_PROJECTION_SELECT}
             WHERE name = ? AND set_code = ?
             ORDER BY collector_number
         ''', (name, set_code))
         result = cursor.fetchone()
         
-        conn.close()
-        
         if result:
-            return json.loads(result[0])
+            return CachedCard.from_row(result, self.get_card_payload)
         
         return None
     
+    def get_card_payload(self, card_id: str) -> Optional[Dict]:
+        """Decode the full cached Scryfall payload for a card id"""
+        result = self._connection().execute('SELECT data_json FROM cards_cache WHERE id = ?', (card_id,)).fetchone()
+        return decode_card_payload(result[0]) if result else None
+
+    def get_cards_by_ids(self, card_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Look up cached cards by id, returning those found keyed by id"""
+        conn = self._connection()
+        cards = {}
+        for batch in chunked(list(card_ids), 500):
+            placeholders = ','.join('?' * len(batch))
+            for row in conn.execute(f'{CARD_PROJECTION_SELECT} WHERE id IN ({placeholders})', batch):
+                cards[row[0]] = CachedCard.from_row(row, self.get_card_payload)
+        return cards
+
     def search_cards_in_cache(self, name: str, set_identifier: str = None) -> List[Dict]:
-        """Search for cards in cache with fuzzy matching"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        """Search for cards in cache with fuzzy matching.
         
+        Exact name matches come first, then names starting with the search
+        text, then names containing it, each stage reading through an index.
+        """
+        cursor = self._connection().cursor()
+        needle = name.strip().lower()
+        if not needle:
+            return []
+        
+        scope_sql, scope_params = '', []
         if set_identifier:
-            # Normalize set identifier
-            set_code = self._normalize_set_identifier(set_identifier)
-            cursor.execute('''
-                SELECT data_json FROM cards_cache 
-                WHERE (LOWER(name) LIKE LOWER(?) OR LOWER(name) = LOWER(?)) 
-                AND (LOWER(set_code) = LOWER(?) OR LOWER(set_name) LIKE LOWER(?))
-                ORDER BY 
-                    CASE WHEN LOWER(name) = LOWER(?) THEN 0 ELSE 1 END,
-                    CASE WHEN LOWER(set_code) = LOWER(?) THEN 0 ELSE 1 END
-                LIMIT 10
-            ''', (f'%{name}%', name, set_code, f'%{set_identifier}%', name, set_code))
+            set_codes = self._resolve_set_codes(cursor, set_identifier)
+            if not set_codes:
+                return []
+            scope_sql = f" AND set_code IN ({','.join('?' * len(set_codes))})"
+            scope_params = set_codes
+        
+        # The range [needle, next_prefix) holds every name starting with needle
+        next_prefix = needle[:-1] + chr(ord(needle[-1]) + 1)
+        stages = [
+            (f'WHERE name_lower = ?{scope_sql}', [needle] + scope_params),
+            (f'WHERE name_lower > ? AND name_lower < ?{scope_sql} ORDER BY name_lower',
+             [needle, next_prefix] + scope_params)
+        ]
+        if self.fts_enabled and len(needle) >= FTS_MIN_QUERY_LENGTH:
+            # Substring matches come from the trigram index, best bm25 rank first
+            match_sql = 'rowid IN (SELECT rowid FROM cards_fts WHERE cards_fts MATCH ? ORDER BY rank LIMIT ?)'
+            name_match = f'name : {self._fts_phrase(needle)}'
+            fts_limit = CARD_SEARCH_LIMIT * 4
+            if set_identifier:
+                stages.append((f'WHERE {match_sql}{scope_sql}', [name_match, fts_limit] + scope_params))
+                if len(set_identifier.strip()) >= FTS_MIN_QUERY_LENGTH:
+                    # Also accept cards whose set name contains the identifier
+                    set_match = f'{name_match} AND set_name : {self._fts_phrase(set_identifier.strip())}'
+                    stages.append((f'WHERE {match_sql}', [set_match, fts_limit]))
+            else:
+                stages.append((f'WHERE {match_sql}', [name_match, fts_limit]))
+        elif set_identifier:
+            stages.append((f'WHERE instr(name_lower, ?) > 0{scope_sql} ORDER BY name_lower', [needle] + scope_params))
+            # Also accept cards whose set name contains the identifier, resolved through the set list
+            partial_codes = [code for code in self._set_codes_named_like(cursor, set_identifier) if code not in set_codes]
+            if partial_codes:
+                stages.append((
+                    f"WHERE instr(name_lower, ?) > 0 AND set_code IN ({','.join('?' * len(partial_codes))}) "
+                    'ORDER BY name_lower != ?, name_lower',
+                    [needle] + partial_codes + [needle]
+                ))
         else:
-            cursor.execute('''
-                SELECT data_json FROM cards_cache 
-                WHERE LOWER(name) LIKE LOWER(?) OR LOWER(name) = LOWER(?)
-                ORDER BY CASE WHEN LOWER(name) = LOWER(?) THEN 0 ELSE 1 END
-                LIMIT 10
-            ''', (f'%{name}%', name, name))
+            # Unscoped substring matches read only the narrow name index, not the table
+            stages.append((
+                'WHERE rowid IN (SELECT rowid FROM cards_cache WHERE instr(name_lower, ?) > 0 LIMIT ?) ORDER BY name_lower',
+                [needle, CARD_SEARCH_LIMIT * 4]
+            ))
         
-        results = cursor.fetchall()
-        conn.close()
+        results = {}
+        for where_sql, params in stages:
+            cursor.execute(f'{CARD_PROJECTION_SELECT} {where_sql} LIMIT ?', params + [CARD_SEARCH_LIMIT])
+            for row in cursor.fetchall():
+                results.setdefault(row[0], row)
+            if len(results) >= CARD_SEARCH_LIMIT:
+                break
         
-        return [json.loads(result[0]) for result in results]
+        return [CachedCard.from_row(row, self.get_card_payload) for row in list(results.values())[:CARD_SEARCH_LIMIT]]
+    
+    @staticmethod
+    def _fts_phrase(text: str) -> str:
+        """Quote text as an FTS5 phrase so punctuation in card names is matched literally"""
+        return '"' + text.replace('"', '""') + '"'
+    
+    def resolve_set_codes(self, set_identifier: str) -> List[str]:
+        """Resolve a set code or set name to the matching cached set codes"""
+        return self._resolve_set_codes(self._connection().cursor(), set_identifier)
+    
+    def _resolve_set_codes(self, cursor, set_identifier: str) -> List[str]:
+        """Resolve a set code or set name to the matching cached set codes"""
+        set_codes = [self._normalize_set_identifier(set_identifier)]
+        cursor.execute('SELECT code FROM sets_cache WHERE lower(name) = ?', (set_identifier.strip().lower(),))
+        set_codes.extend(row[0] for row in cursor.fetchall() if row[0] not in set_codes)
+        return set_codes
+    
+    @staticmethod
+    def _set_codes_named_like(cursor, set_identifier: str) -> List[str]:
+        """Cached set codes whose set name contains the identifier, read from the small sets_cache table"""
+        cursor.execute('SELECT code FROM sets_cache WHERE instr(lower(name), ?) > 0', (set_identifier.strip().lower(),))
+        return [row[0] for row in cursor.fetchall()]
     
     def _normalize_set_identifier(self, set_identifier: str) -> str:
         """Convert full set names to 3-letter codes where possible"""
@@ -379,10 +1717,22 @@ class BulkDataCache:
         normalized = set_identifier.lower().strip()
         return set_mappings.get(normalized, set_identifier.lower())
     
+    def get_name_matcher(self) -> CardNameMatcher:
+        """Get the fuzzy name matcher for the current cache generation, building it if needed"""
+        with self._name_matcher_lock:
+            generation = self.generation
+            if self._name_matcher is None or self._name_matcher_generation != generation:
+                started = time.perf_counter()
+                cursor = self._connection().cursor()
+                cursor.execute('SELECT DISTINCT name FROM cards_cache')
+                self._name_matcher = CardNameMatcher(row[0] for row in cursor.fetchall() if row[0])
+                self._name_matcher_generation = generation
+                print(f"Built fuzzy name matcher over {len(self._name_matcher)} names in {time.perf_counter() - started:.2f}s")
+            return self._name_matcher
+    
     def get_cache_stats(self) -> Dict:
         """Get statistics about cached data"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._connection().cursor()
         
         cursor.execute('SELECT COUNT(*) FROM cards_cache')
         total_cards = cursor.fetchone()[0]
@@ -390,148 +1740,329 @@ class BulkDataCache:
         cursor.execute('SELECT COUNT(DISTINCT set_code) FROM cards_cache')
         total_sets = cursor.fetchone()[0]
         
-        cursor.execute('SELECT updated_at FROM bulk_metadata WHERE data_type = ?', ('default_cards',))
-        last_update = cursor.fetchone()
+        cursor.execute('SELECT updated_at FROM bulk_metadata WHERE data_type = ?', ('default_cards',))
+        last_update = cursor.fetchone()
+        
+        return {
+            'total_cards': total_cards,
+            'total_sets': total_sets,
+            'last_update': last_update[0] if last_update else None,
+            'cache_valid': self.is_cache_valid()
+        }
+    
+    @staticmethod
+    def _get_setting(cursor, key: str) -> Optional[str]:
+        """Read a persisted cache setting"""
+        cursor.execute('SELECT value FROM cache_settings WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+    
+    @staticmethod
+    def _set_setting(cursor, key: str, value: str):
+        """Persist a cache setting; the caller commits"""
+        cursor.execute('INSERT OR REPLACE INTO cache_settings (key, value) VALUES (?, ?)', (key, value))
+    
+    @staticmethod
+    def _bump_generation(cursor):
+        """Advance the persisted cache generation in the caller's transaction"""
+        cursor.execute('''
+            INSERT INTO cache_settings (key, value) VALUES ('generation', 1)
+            ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+        ''')
+    
+    @property
+    def generation(self) -> int:
+        """Counter bumped whenever cached cards change.
+        
+        It lives in the cache database and moves in the same transaction as
+        the cards, so every worker process sharing the file sees a refresh.
+        """
+        try:
+            value = self._get_setting(self._connection().cursor(), 'generation')
+        except sqlite3.OperationalError:
+            # Not initialized, e.g. a fresh connection to an in-memory database
+            return 0
+        generation = int(value) if value else 0
+        self._known_generation = (generation, time.monotonic())
+        return generation
+    
+    def known_generation(self) -> int:
+        """The generation as this process last read it, re-read once older than ETAG_STATE_RECHECK_SECONDS.
+        
+        Refreshes and batch writes here re-read it as they commit, so only
+        another worker's writes take up to the recheck interval to show.
+        """
+        generation, checked_at = self._known_generation
+        if checked_at is None or time.monotonic() - checked_at > ETAG_STATE_RECHECK_SECONDS:
+            return self.generation
+        return generation
+    
+    def migrate_payload_format(self, payload_format: str, vacuum: bool = True) -> int:
+        """Re-encode cached card payloads in the given format and make it the write format.
+        
+        Rows already stored in the target format are left alone, so the
+        migration can be re-run after an interruption. The format is recorded
+        in cache_settings, so later opens of the cache keep writing it. Returns
+        the number of rows rewritten.
+        """
+        if payload_format not in CACHE_PAYLOAD_FORMATS:
+            raise ValueError(f'Unknown card payload format: {payload_format}')
         
-        conn.close()
+        # zlib payloads are stored as BLOBs and plain payloads as TEXT
+        stored_type = 'blob' if payload_format == 'zlib' else 'text'
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT id FROM cards_cache WHERE typeof(data_json) != ?', (stored_type,))
+            card_ids = [row[0] for row in cursor.fetchall()]
+            migrated = 0
+            for batch in chunked(card_ids, 500):
+                placeholders = ','.join('?' * len(batch))
+                cursor.execute(f'SELECT id, data_json FROM cards_cache WHERE id IN ({placeholders})', batch)
+                updates = []
+                for card_id, payload in cursor.fetchall():
+                    data_json = zlib.decompress(payload).decode('utf-8') if isinstance(payload, bytes) else payload
+                    updates.append((encode_card_payload(data_json, payload_format), card_id))
+                conn.executemany('UPDATE cards_cache SET data_json = ? WHERE id = ?', updates)
+                migrated += len(updates)
+            self._set_setting(cursor, 'payload_format', payload_format)
+            conn.commit()
+            
+            # Hand the freed pages back to the filesystem
+            if vacuum and migrated:
+                conn.execute('VACUUM')
+                # VACUUM may renumber rowids, which the search index is keyed on
+                if self.fts_enabled:
+                    conn.execute("INSERT INTO cards_fts (cards_fts) VALUES ('rebuild')")
+                    conn.commit()
+        finally:
+            conn.close()
         
-        return {
-            'total_cards': total_cards,
-            'total_sets': total_sets,
-            'last_update': last_update[0] if last_update else None,
-            'cache_valid': self.is_cache_valid()
-        }
+        self.payload_format = payload_format
+        self.reset_connections()
+        print(f"Migrated {migrated} cached cards to the {payload_format} payload format")
+        return migrated
     
     def get_set_cards_from_cache(self, set_code: str) -> List[Dict]:
         """Get all cards from a specific set from cache"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._connection().cursor()
         
-        cursor.execute('''
-            SELECT data_json FROM cards_cache 
-            WHERE LOWER(set_code) = LOWER(?)
-            ORDER BY CAST(collector_number AS INTEGER), collector_number
-        ''', (set_code,))
+        cursor.execute(f'''
+            {CARD_PROJECTION_SELECT}
+            WHERE set_code = ?
+            ORDER BY collector_sort_key, id
+        ''', (set_code.lower(),))
         
         results = cursor.fetchall()
-        conn.close()
         
-        return [json.loads(result[0]) for result in results]
+        return [CachedCard.from_row(result, self.get_card_payload) for result in results]
     
-    def get_sets_from_cache(self) -> List[Dict]:
-        """Get all available sets from cache"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _set_page_filter(self, set_code: str, name_prefix: str = '') -> Tuple[str, List]:
+        """Build the WHERE clause selecting a set's cards whose names start with name_prefix"""
+        where_sql, params = 'WHERE set_code = ?', [set_code.lower()]
+        needle = (name_prefix or '').strip().lower()
+        if needle:
+            # The range [needle, next_prefix) holds every name starting with needle
+            next_prefix = needle[:-1] + chr(ord(needle[-1]) + 1)
+            where_sql += ' AND name_lower >= ? AND name_lower < ?'
+            params += [needle, next_prefix]
+        return where_sql, params
+    
+    def get_set_cards_page(self, set_code: str, offset: int = 0, limit: int = SET_CARDS_PAGE_SIZE,
+                           sort: str = 'number', name_prefix: str = '') -> Tuple[List[Dict], int]:
+        """Get one page of a set's cards in number or name order, with the total matching count"""
+        cursor = self._connection().cursor()
+        where_sql, params = self._set_page_filter(set_code, name_prefix)
+        
+        cursor.execute(f'SELECT COUNT(*) FROM cards_cache {where_sql}', params)
+        total = cursor.fetchone()[0]
+        
+        cursor.execute(f'''
+            {CARD_PROJECTION_SELECT}
+            {where_sql}
+            ORDER BY {', '.join(SET_CARD_SORT_COLUMNS[sort])}
+            LIMIT ? OFFSET ?
+        ''', params + [limit, offset])
+        
+        return [CachedCard.from_row(result, self.get_card_payload) for result in cursor.fetchall()], total
+    
+    def get_set_card_position(self, set_code: str, card_id: str, sort: str = 'number',
+                              name_prefix: str = '') -> Optional[int]:
+        """Get the offset of a card within get_set_cards_page results, or None if it is not listed"""
+        cursor = self._connection().cursor()
+        where_sql, params = self._set_page_filter(set_code, name_prefix)
+        columns = ', '.join(SET_CARD_SORT_COLUMNS[sort])
+        
+        cursor.execute(f'SELECT {columns} FROM cards_cache {where_sql} AND id = ?', params + [card_id])
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        # Compare on every sort column, so cards tied on name count only when they page in earlier
+        placeholders = ', '.join('?' * len(row))
+        cursor.execute(f'SELECT COUNT(*) FROM cards_cache {where_sql} AND ({columns}) < ({placeholders})',
+                       params + list(row))
+        return cursor.fetchone()[0]
+    
+    def _fetch_scryfall_sets(self) -> Optional[List[Dict]]:
+        """Fetch set metadata from Scryfall for building sets_cache, or None if unavailable"""
+        try:
+            response = requests.get(
+                f"{ScryfallAPI.BASE_URL}/sets",
+                headers={
+                    'User-Agent': 'mtg-collection-builder/1.0 (+https://github.com/MattPicDev/mtg-collection-builder)',
+                    'Accept': 'application/json'
+                },
+                timeout=30
+            )
+            response.raise_for_status()
+            data = response.json()
+            return [s for s in data['data'] if isinstance(s, dict) and s.get('code')]
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            print(f"Error fetching set data, building set list from cached cards: {e}")
+            return None
+    
+    @staticmethod
+    def _set_cache_row(code: str, name: str, set_type: str, released_at: str, icon_svg_uri: str,
+                       parent_set_code: Optional[str], card_count: int, updated_at: str) -> tuple:
+        """Build a sets_cache row, deciding at build time whether the set is listed"""
+        listed = int(bool(card_count) and set_type in RELEVANT_SET_TYPES)
+        return (
+            code, name or code.upper(), set_type or 'unknown', released_at or '1993-01-01',
+            icon_svg_uri or f"https://svgs.scryfall.io/sets/{code}.svg",
+            parent_set_code, card_count, listed, updated_at
+        )
+    
+    def _rebuild_sets_cache(self, cursor, scryfall_sets: Optional[List[Dict]] = None):
+        """Rebuild sets_cache from Scryfall set data, or offline from the set metadata already cached.
+        
+        Card counts always come from cards_cache so they match what the set pages
+        show. Runs inside the caller's transaction.
+        """
+        if scryfall_sets is None:
+            # Keep the names, icons and parent sets from the last refresh that reached Scryfall
+            cursor.execute('SELECT code, name, set_type, released_at, icon_svg_uri, parent_set_code FROM sets_cache')
+            keys = ('code', 'name', 'set_type', 'released_at', 'icon_svg_uri', 'parent_set_code')
+            scryfall_sets = [dict(zip(keys, row)) for row in cursor.fetchall()]
         
-        # Get distinct sets from cache with their basic information
         cursor.execute('''
-            SELECT DISTINCT set_code, set_name, MIN(data_json) as sample_card
-            FROM cards_cache 
+            SELECT set_code, MIN(set_name), MIN(set_type), MIN(released_at), COUNT(*)
+            FROM cards_cache
             WHERE set_code IS NOT NULL AND set_code != ''
-            GROUP BY set_code, set_name
-            ORDER BY set_code
+            GROUP BY set_code
         ''')
+        local_sets = {row[0]: row for row in cursor.fetchall()}
         
-        results = cursor.fetchall()
-        conn.close()
-        
-        sets = []
-        today = datetime.now().date()
+        updated_at = datetime.now().isoformat()
+        rows = []
+        for s in scryfall_sets:
+            local = local_sets.pop(s['code'], None)
+            rows.append(self._set_cache_row(
+                s['code'], s.get('name'), s.get('set_type'), s.get('released_at'), s.get('icon_svg_uri'),
+                s.get('parent_set_code'), local[4] if local else 0, updated_at
+            ))
+        # Sets Scryfall did not report (or all of them, offline) come from the cards
+        for set_code, set_name, set_type, released_at, card_count in local_sets.values():
+            rows.append(self._set_cache_row(
+                set_code, set_name, set_type, released_at, None, None, card_count, updated_at
+            ))
         
-        for row in results:
-            set_code, set_name, sample_card_json = row
-            try:
-                sample_card = json.loads(sample_card_json)
-                
-                # Create set info from the sample card
-                set_info = {
-                    'code': set_code,
-                    'name': set_name or sample_card.get('set_name', set_code.upper()),
-                    'set_type': sample_card.get('set_type', 'unknown'),
-                    'released_at': sample_card.get('released_at', '1993-01-01'),
-                    'card_count': 0,  # Will be calculated
-                    'icon_svg_uri': sample_card.get('set_uri', ''),
-                    'search_uri': f"https://api.scryfall.com/cards/search?q=set:{set_code}",
-                    'uri': f"https://api.scryfall.com/sets/{set_code}",
-                    '_source': 'cache'
-                }
-                
-                # Filter out future sets
-                try:
-                    release_date = datetime.strptime(set_info['released_at'], '%Y-%m-%d').date()
-                    if release_date > today:
-                        continue  # Skip future sets
-                except ValueError:
-                    # If date parsing fails, assume it's not a future set
-                    pass
-                
-                # Get card count for this set
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM cards_cache WHERE set_code = ?', (set_code,))
-                card_count = cursor.fetchone()[0]
-                set_info['card_count'] = card_count
-                conn.close()
-                
-                sets.append(set_info)
-            except Exception as e:
-                print(f"Error processing set {set_code}: {e}")
-                continue
+        cursor.execute('DELETE FROM sets_cache')
+        cursor.executemany('INSERT INTO sets_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    
+    def _refresh_set_counts(self, cursor, set_codes: Iterable[str]):
+        """Recount cards for the given sets, adding sets_cache rows for sets seen for the first time"""
+        set_codes = list(set_codes)
+        if not set_codes:
+            return
+        placeholders = ','.join('?' * len(set_codes))
+        cursor.execute(f'''
+            SELECT set_code, MIN(set_name), MIN(set_type), MIN(released_at), COUNT(*)
+            FROM cards_cache
+            WHERE set_code IN ({placeholders})
+            GROUP BY set_code
+        ''', set_codes)
+        updated_at = datetime.now().isoformat()
+        rows = [
+            self._set_cache_row(set_code, set_name, set_type, released_at, None, None, card_count, updated_at)
+            for set_code, set_name, set_type, released_at, card_count in cursor.fetchall()
+        ]
+        type_placeholders = ','.join('?' * len(RELEVANT_SET_TYPES))
+        cursor.executemany(f'''
+            INSERT INTO sets_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(code) DO UPDATE SET
+                card_count = excluded.card_count,
+                listed = sets_cache.set_type IN ({type_placeholders}) AND excluded.card_count > 0,
+                updated_at = excluded.updated_at
+        ''', [row + tuple(RELEVANT_SET_TYPES) for row in rows])
+    
+    def get_sets_from_cache(self) -> List[Dict]:
+        """Get all available sets from cache"""
+        cursor = self._connection().cursor()
         
-        # Sort by release date (newest first), then alphabetically by name
-        sets.sort(key=lambda x: (-time.mktime(time.strptime(x['released_at'], '%Y-%m-%d')), x['name']))
+        # Type filtering happens when sets_cache is built; release dates are
+        # checked here so sets appear on their release day
+        cursor.execute('''
+            SELECT code, name, set_type, released_at, icon_svg_uri, parent_set_code, card_count
+            FROM sets_cache
+            WHERE listed = 1 AND released_at <= ?
+            ORDER BY released_at DESC, name
+        ''', (datetime.now().date().isoformat(),))
         
-        return sets
+        return [
+            {
+                'code': code,
+                'name': name,
+                'set_type': set_type,
+                'released_at': released_at,
+                'card_count': card_count,
+                'icon_svg_uri': icon_svg_uri,
+                'parent_set_code': parent_set_code,
+                'search_uri': f"https://api.scryfall.com/cards/search?q=set:{code}",
+                'uri': f"https://api.scryfall.com/sets/{code}",
+                '_source': 'cache'
+            }
+            for code, name, set_type, released_at, icon_svg_uri, parent_set_code, card_count in cursor.fetchall()
+        ]
     
     def cache_cards_batch(self, cards: List[Dict]) -> int:
         """Cache a batch of cards from API responses"""
         if not cards:
             return 0
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cached_count = 0
+        updated_at = datetime.now().isoformat()
+        rows = []
         for card in cards:
             try:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO cards_cache 
-                    (id, name, set_code, collector_number, set_name, rarity, image_url, price_usd, price_usd_foil, data_json, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    card['id'],
-                    card['name'],
-                    card['set'],
-                    card['collector_number'],
-                    card.get('set_name', ''),
-                    card.get('rarity', ''),
-                    card.get('image_uris', {}).get('small', ''),
-                    card.get('prices', {}).get('usd'),
-                    card.get('prices', {}).get('usd_foil'),
-                    json.dumps(card),
-                    datetime.now().isoformat()
-                ))
-                cached_count += 1
+                rows.append(self._card_to_row(card, updated_at, self.payload_format))
             except Exception as e:
                 print(f"Error caching card {card.get('name', 'unknown')}: {e}")
         
-        conn.commit()
-        conn.close()
+        conn = self._connection(read_only=False)
+        cursor = conn.cursor()
+        
+        try:
+            for batch in chunked(rows, BULK_INGEST_BATCH_SIZE):
+                self._insert_card_rows(cursor, batch)
+            self._refresh_set_counts(cursor, {row[2] for row in rows})
+            self._bump_generation(cursor)
+            conn.commit()
+            self.generation  # Re-read, so conditional GETs here see the write at once
+        except Exception:
+            conn.rollback()
+            raise
         
-        return cached_count
+        return len(rows)
     
     def get_set_completion_stats(self, set_code: str) -> Dict:
         """Get cache completion statistics for a specific set"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._connection().cursor()
         
         cursor.execute('''
             SELECT COUNT(*) FROM cards_cache 
-            WHERE LOWER(set_code) = LOWER(?)
-        ''', (set_code,))
+            WHERE set_code = ?
+        ''', (set_code.lower(),))
         
         cached_count = cursor.fetchone()[0]
-        conn.close()
         
         return {
             'set_code': set_code,
@@ -539,8 +2070,362 @@ class BulkDataCache:
             'cache_available': cached_count > 0
         }
 
+def slim_card(card: Dict) -> Dict:
+    """
+    Project a card down to the fields the set pages and /api/update_card_quantities use.
+    
+    Args:
+        card: A Scryfall card, cached or from the API
+        
+    Returns:
+        A small dict that can stand in for the card in the browser and in updates
+    """
+    image_uris = card.get('image_uris') or {}
+    prices = card.get('prices') or {}
+    return {
+        'id': card['id'],
+        'name': card.get('name'),
+        'set': card.get('set'),
+        'set_name': card.get('set_name', ''),
+        'collector_number': card.get('collector_number'),
+        'rarity': card.get('rarity', ''),
+        'mana_cost': card.get('mana_cost'),
+        'type_line': card.get('type_line'),
+        'image_uris': {'small': image_uris.get('small'), 'normal': image_uris.get('normal')},
+        'prices': {'usd': prices.get('usd'), 'usd_foil': prices.get('usd_foil')},
+        '_collector_sort_key': card.get('_collector_sort_key')
+    }
+
+def serialize_slim_cards(cards: List[Dict]) -> Markup:
+    """
+    Serialize the slim form of a set's cards for embedding in a page, like the tojson filter.
+    
+    Args:
+        cards: The cards of one set
+        
+    Returns:
+        HTML-safe JSON for a <script type="application/json"> block
+    """
+    return htmlsafe_json_dumps([slim_card(card) for card in cards], dumps=app.json.dumps)
+
+class SetCardsLRU:
+    """Bounded in-memory cache of the card lists served to the set views.
+    
+    Entries are keyed by set code and tagged with the BulkDataCache generation
+    they were read at; a lookup at a newer generation drops the entry. Each
+    entry can also hold serialized forms of its cards embedded in the set
+    pages, one per serializer. The least recently used sets are evicted once the estimated size of
+    all cached cards exceeds max_bytes.
+    """
+    
+    def __init__(self, max_bytes: int = SET_CARDS_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # set code -> [generation, cards, estimated bytes, {serializer: serialized cards}]
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, set_code: str, generation: int) -> Optional[List[Dict]]:
+        """Return the cached cards for a set if they were read at this generation"""
+        key = set_code.lower()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != generation:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, set_code: str, generation: int, cards: List[Dict]):
+        """Cache a set's cards, evicting least recently used sets to stay within max_bytes"""
+        key = set_code.lower()
+        size = self.estimate_size(cards)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = [generation, cards, size, {}]
+            self.current_bytes += size
+            self._evict()
+    
+    def get_serialized(self, set_code: str, generation: int, cards: List[Dict], serialize) -> str:
+        """Return serialize(cards), reusing the copy kept with the cached entry for these cards"""
+        key = set_code.lower()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation and entry[1] is cards and serialize in entry[3]:
+                return entry[3][serialize]
+        serialized = serialize(cards)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation and entry[1] is cards and serialize not in entry[3]:
+                entry[2] += sys.getsizeof(serialized)
+                entry[3][serialize] = serialized
+                self.current_bytes += sys.getsizeof(serialized)
+                self._evict()
+        return serialized
+    
+    def _evict(self):
+        """Evict least recently used sets until within max_bytes; the caller holds the lock"""
+        while self.current_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+    
+    def _remove(self, key: str):
+        """Drop an entry; the caller holds the lock"""
+        entry = self._entries.pop(key)
+        self.current_bytes -= entry[2]
+    
+    def clear(self):
+        """Drop every entry, keeping the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+    
+    def stats(self) -> Dict:
+        """Return the hit, miss and eviction counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'sets': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': (self.hits / lookups * 100) if lookups else 0
+            }
+    
+    @staticmethod
+    def estimate_size(cards: List[Dict]) -> int:
+        """Estimate the memory held by a card list from its dicts and their values"""
+        size = sys.getsizeof(cards)
+        for card in cards:
+            size += sys.getsizeof(card)
+            for key, value in card.items():
+                size += sys.getsizeof(key) + sys.getsizeof(value)
+                if isinstance(value, dict):
+                    size += sum(sys.getsizeof(item) for item in value.values())
+        return size
+
+class ImageCache:
+    """Content-addressed on-disk cache of the card images served by /api/image.
+    
+    Image bytes are stored once per SHA-256 digest under blobs/, and index.db
+    maps each source URL to its blob. Once the blobs exceed max_bytes the least
+    recently served URLs are dropped, along with blobs no URL refers to any
+    more. Only URLs on allowed_hosts are fetched, so the proxy cannot be
+    pointed at arbitrary servers.
+    """
+    
+    def __init__(self, cache_dir: str = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+                 allowed_hosts: Iterable[str] = IMAGE_PROXY_HOSTS):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.db_path = os.path.join(cache_dir, 'index.db')
+        self.max_bytes = max_bytes
+        self.allowed_hosts = frozenset(allowed_hosts)
+        self._lock = threading.Lock()
+        self._conn = None  # Opened on first use so importing the app creates no directories
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Open the index on first use; the caller holds the lock"""
+        if self._conn is None:
+            os.makedirs(self.blob_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode = WAL')
+            self._conn.execute(IMAGE_CACHE_SCHEMA)
+            for index_sql in IMAGE_CACHE_INDEXES:
+                self._conn.execute(index_sql)
+            self._conn.commit()
+            self.total_bytes = self._conn.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM (SELECT size FROM images GROUP BY content_hash)'
+            ).fetchone()[0]
+        return self._conn
+    
+    def _blob_path(self, content_hash: str) -> str:
+        """Path of the blob holding an image with this digest"""
+        return os.path.join(self.blob_dir, content_hash[:2], content_hash)
+    
+    def is_allowed(self, url: str) -> bool:
+        """Check that a URL points at an image host the proxy may fetch from"""
+        parsed = urllib.parse.urlparse(url or '')
+        return parsed.scheme in ('http', 'https') and parsed.netloc in self.allowed_hosts
+    
+    def get(self, url: str) -> Optional[Tuple[bytes, str, str]]:
+        """Return (data, content type, digest) for a cached image, or None"""
+        # Only the index is used under the lock; concurrent requests read their blobs in parallel
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                'SELECT content_hash, content_type, last_access FROM images WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            content_hash, content_type, last_access = row
+            now = time.time()
+            if now - last_access > IMAGE_CACHE_TOUCH_INTERVAL:
+                conn.execute('UPDATE images SET last_access = ? WHERE url = ?', (now, url))
+                conn.commit()
+            self.hits += 1
+        
+        try:
+            with open(self._blob_path(content_hash), 'rb') as blob:
+                data = blob.read()
+        except OSError:
+            # The blob was evicted meanwhile or removed outside the cache; forget it and fetch again
+            with self._lock:
+                conn = self._connection()
+                if conn.execute('SELECT 1 FROM images WHERE url = ? AND content_hash = ?', (url, content_hash)).fetchone():
+                    self._delete_url(conn, url)
+                    conn.commit()
+                self.hits -= 1
+                self.misses += 1
+            return None
+        return data, content_type, content_hash
+    
+    def store(self, url: str, data: bytes, content_type: str) -> str:
+        """Store an image under its digest and evict old images if over budget; returns the digest"""
+        content_hash = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(content_hash)
+        with self._lock:
+            conn = self._connection()
+            if conn.execute('SELECT 1 FROM images WHERE url = ?', (url,)).fetchone():
+                self._delete_url(conn, url)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                temp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+                with open(temp_path, 'wb') as blob:
+                    blob.write(data)
+                os.replace(temp_path, path)
+            if not conn.execute('SELECT 1 FROM images WHERE content_hash = ?', (content_hash,)).fetchone():
+                self.total_bytes += len(data)
+            conn.execute(
+                'INSERT INTO images (url, content_hash, content_type, size, last_access) VALUES (?, ?, ?, ?, ?)',
+                (url, content_hash, content_type, len(data), time.time())
+            )
+            self._evict(conn, keep_url=url)
+            conn.commit()
+        return content_hash
+    
+    def _delete_url(self, conn: sqlite3.Connection, url: str):
+        """Drop a URL, and its blob if no other URL shares it; the caller holds the lock"""
+        row = conn.execute('SELECT content_hash, size FROM images WHERE url = ?', (url,)).fetchone()
+        if row is None:
+            return
+        conn.execute('DELETE FROM images WHERE url = ?', (url,))
+        if not conn.execute('SELECT 1 FROM images WHERE content_hash = ?', (row[0],)).fetchone():
+            try:
+                os.remove(self._blob_path(row[0]))
+            except OSError:
+                pass
+            self.total_bytes -= row[1]
+    
+    def _evict(self, conn: sqlite3.Connection, keep_url: str):
+        """Drop least recently served URLs until within max_bytes; the caller holds the lock"""
+        while self.total_bytes > self.max_bytes:
+            row = conn.execute(
+                'SELECT url FROM images WHERE url != ? ORDER BY last_access LIMIT 1', (keep_url,)
+            ).fetchone()
+            if row is None:
+                break
+            self._delete_url(conn, row[0])
+            self.evictions += 1
+    
+    def fetch(self, url: str) -> Optional[Tuple[bytes, str, str]]:
+        """Return (data, content type, digest) for an image, downloading it on a cache miss"""
+        cached = self.get(url)
+        if cached is not None:
+            return cached
+        
+        response = None
+        try:
+            # Redirects are followed by hand so every hop has to be on an allowed host
+            target = url
+            for _ in range(IMAGE_MAX_REDIRECTS + 1):
+                response = requests.get(
+                    target,
+                    headers={'User-Agent': 'mtg-collection-builder/1.0 (+https://github.com/MattPicDev/mtg-collection-builder)'},
+                    timeout=10,
+                    allow_redirects=False,
+                    stream=True
+                )
+                if not response.is_redirect:
+                    break
+                response.close()
+                target = urllib.parse.urljoin(target, response.headers['Location'])
+                if not self.is_allowed(target):
+                    print(f"Not caching {url}: redirected to {target}, which is not an allowed host")
+                    return None
+            else:
+                print(f"Not caching {url}: more than {IMAGE_MAX_REDIRECTS} redirects")
+                return None
+            response.raise_for_status()
+            
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+            if not content_type.startswith('image/'):
+                print(f"Not caching {url}: {content_type or 'unknown type'}")
+                return None
+            
+            # Stop reading as soon as the image is over the size cap
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(IMAGE_STREAM_CHUNK_SIZE):
+                size += len(chunk)
+                if size > IMAGE_MAX_BYTES:
+                    print(f"Not caching {url}: larger than {IMAGE_MAX_BYTES} bytes")
+                    return None
+                chunks.append(chunk)
+            data = b''.join(chunks)
+        except requests.RequestException as e:
+            print(f"Error fetching image {url}: {e}")
+            return None
+        finally:
+            if response is not None:
+                response.close()
+        return data, content_type, self.store(url, data, content_type)
+    
+    def prefetch(self, urls: List[str], progress_callback=None) -> int:
+        """Download images not cached yet, a few at a time; returns how many are now cached"""
+        cached = 0
+        with ThreadPoolExecutor(max_workers=IMAGE_PREFETCH_WORKERS) as executor:
+            for done, result in enumerate(executor.map(self.fetch, urls), start=1):
+                if result is not None:
+                    cached += 1
+                if progress_callback:
+                    progress_callback(done, cached)
+        return cached
+    
+    def stats(self) -> Dict:
+        """Return usage and the hit, miss and eviction counters"""
+        with self._lock:
+            if self._conn is None and os.path.isdir(self.cache_dir):
+                self._connection()
+            return {
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
 # Global cache instance
 bulk_cache = BulkDataCache()
+atexit.register(bulk_cache.close_connections)
+set_cards_cache = SetCardsLRU()
+image_cache = ImageCache()
 
 def generate_import_id():
     """Generate a unique ID for import operations"""
@@ -558,6 +2443,56 @@ def cleanup_import_progress(import_id: str):
     """Clean up progress data for completed import"""
     import_progress.pop(import_id, None)
 
+def make_etag(*state) -> Optional[str]:
+    """
+    Build the strong ETag for a response rendered from the given state.
+    
+    The state is persisted counters (the cache generation and the collection
+    change sequence), so every worker process tags the same content alike.
+    
+    Args:
+        state: Values that together determine the response body
+        
+    Returns:
+        The ETag value, without quotes, or None if a part is unknown and the
+        response cannot be tagged
+    """
+    if any(part is None for part in state):
+        return None
+    return '-'.join(str(part) for part in state)
+
+def not_modified(etag: Optional[str]) -> Optional[Response]:
+    """
+    Answer a conditional GET whose If-None-Match already has the current ETag.
+    
+    Args:
+        etag: The ETag of the current representation, from make_etag
+        
+    Returns:
+        A 304 response, or None if the client needs the full response
+    """
+    if etag is not None and request.if_none_match.contains(etag):
+        return with_etag(Response(status=304), etag)
+    return None
+
+def with_etag(body, etag: Optional[str]) -> Response:
+    """
+    Attach an ETag to a response so the next request can be conditional.
+    
+    Args:
+        body: Anything a view may return, e.g. rendered HTML or a jsonify() response
+        etag: The ETag of the representation, from make_etag; None sends no ETag
+        
+    Returns:
+        The response carrying the ETag
+    """
+    response = make_response(body)
+    if etag is not None:
+        response.set_etag(etag)
+    # Browsers revalidate on every visit rather than reusing the page unchecked
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 class ScryfallAPI:
     """Handler for Scryfall API interactions"""
     
@@ -580,21 +2515,13 @@ class ScryfallAPI:
             data = response.json()
             
             # Filter for Magic: The Gathering expansions and relevant sets
-            # Include main expansions, core sets, masters sets, commander sets, etc.
-            # Exclude tokens, art series, memorabilia, and other non-playable sets
-            relevant_set_types = [
-                'core', 'expansion', 'masters', 'commander', 'planechase', 
-                'archenemy', 'from_the_vault', 'spellbook', 'premium_deck',
-                'duel_deck', 'draft_innovation', 'treasure_chest', 'arsenal',
-                'box', 'funny', 'starter', 'supplemental'
-            ]
-            
+            # (see RELEVANT_SET_TYPES); tokens, art series and memorabilia are excluded
             sets = []
             today = datetime.now().date()
             
             for s in data['data']:
                 # Filter by set type and ensure it has cards
-                if (s['set_type'] in relevant_set_types and 
+                if (s['set_type'] in RELEVANT_SET_TYPES and 
                     s.get('card_count', 0) > 0 and
                     s['set_type'] not in ['token', 'memorabilia', 'art_series']):
                     
@@ -622,17 +2549,41 @@ class ScryfallAPI:
                 return cached_sets
             return []
     
+    @staticmethod
+    def get_set_cards_page(set_code: str, offset: int = 0, limit: int = SET_CARDS_PAGE_SIZE,
+                           sort: str = 'number', name_prefix: str = '') -> Tuple[List[Dict], int]:
+        """Fetch one page of a set's cards, sorted by number or name and filtered by name prefix"""
+        cards, total = bulk_cache.get_set_cards_page(set_code, offset, limit, sort, name_prefix)
+        if total or bulk_cache.get_set_completion_stats(set_code)['cache_available']:
+            return cards, total
+        
+        # Sets missing from the cache are fetched whole once; get_set_cards caches them
+        needle = (name_prefix or '').strip().lower()
+        matching = [card for card in ScryfallAPI.get_set_cards(set_code) if card['name'].lower().startswith(needle)]
+        if sort == 'name':
+            matching.sort(key=lambda card: (card['name'].lower(), card.get('_collector_sort_key') or '', card['id']))
+        return matching[offset:offset + limit], len(matching)
+    
     @staticmethod
     def get_set_cards(set_code: str) -> List[Dict]:
         """Fetch all cards from a specific set using hybrid cache approach"""
-        # First try to get cards from cache
+        # Set views are revisited constantly; reuse the decoded list until the cache changes
+        generation = bulk_cache.generation
+        cached_cards = set_cards_cache.get(set_code, generation)
+        if cached_cards is not None:
+            return cached_cards
+        
+        # Then try to get cards from the bulk cache
         cached_cards = bulk_cache.get_set_cards_from_cache(set_code)
         
         if cached_cards:
-            # Mark as cache source and return
+            # Mark as cache source and hand the stored sort key to the templates
             for card in cached_cards:
                 card['_source'] = 'cache'
+                card['_collector_sort_key'] = (getattr(card, 'collector_sort_key', None)
+                                               or collector_number_sort_key(card.get('collector_number')))
             print(f"Retrieved {len(cached_cards)} cards for set {set_code} from cache")
+            set_cards_cache.put(set_code, generation, cached_cards)
             return cached_cards
         
         # If not in cache, fetch from API
@@ -671,11 +2622,70 @@ class ScryfallAPI:
                 for card in cards:
                     card['_source'] = 'api'
             
+            # Match the collector order and sort keys of cache-backed set pages
+            for card in cards:
+                card['_collector_sort_key'] = collector_number_sort_key(card.get('collector_number'))
+            cards.sort(key=lambda card: card['_collector_sort_key'])
+            
             return cards
         except requests.RequestException as e:
             print(f"Error fetching cards for set {set_code}: {e}")
             return []
 
+class SetRegistry:
+    """Set metadata loaded once and indexed by set code and set name.
+    
+    The list comes from ScryfallAPI.get_sets() and is reloaded when the bulk
+    cache generation changes or after ttl seconds. An empty result is not
+    kept, so an offline start retries on the next request.
+    """
+    
+    def __init__(self, ttl: int = SET_REGISTRY_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sets = []
+        self._by_code = {}
+        self._by_name = {}
+        self._generation = None
+        self._loaded_at = None
+    
+    def _ensure_loaded(self):
+        """Reload the set list if it is missing, expired or from an older cache generation"""
+        with self._lock:
+            generation = bulk_cache.generation
+            if (self._loaded_at is not None and self._generation == generation
+                    and time.monotonic() - self._loaded_at < self.ttl):
+                return
+            sets = ScryfallAPI.get_sets()
+            self._sets = sets
+            self._by_code = {s['code'].lower(): s for s in sets}
+            self._by_name = {s['name'].lower(): s for s in sets}
+            self._generation = generation
+            self._loaded_at = time.monotonic() if sets else None
+    
+    def all_sets(self) -> List[Dict]:
+        """Return every listed set, newest first"""
+        self._ensure_loaded()
+        return self._sets
+    
+    def get_by_code(self, set_code: str) -> Optional[Dict]:
+        """Find a set by its code"""
+        self._ensure_loaded()
+        return self._by_code.get(set_code.lower())
+    
+    def get_by_name(self, set_name: str) -> Optional[Dict]:
+        """Find a set by its full name"""
+        self._ensure_loaded()
+        return self._by_name.get(set_name.lower())
+    
+    def invalidate(self):
+        """Force the next lookup to reload the set list"""
+        with self._lock:
+            self._loaded_at = None
+
+# Global set metadata registry
+set_registry = SetRegistry()
+
 class PreconDeckListAPI:
     """Handles PreconDeckList.com Commander precon deck scraping and parsing."""
     
@@ -944,49 +2954,565 @@ class PreconDeckListAPI:
     @staticmethod
     def search_decks(query: str) -> List[Dict]:
         """
-        Search for decks by name, commander, or expansion.
-        
-        Args:
-            query: Search query
-            
-        Returns:
-            List of matching decks
+        Search for decks by name, commander, or expansion.
+        
+        Args:
+            query: Search query
+            
+        Returns:
+            List of matching decks
+        """
+        all_expansions = PreconDeckListAPI.get_all_decks()
+        matching_decks = []
+        
+        query_lower = query.lower()
+        
+        for expansion in all_expansions:
+            for deck in expansion['decks']:
+                # Search in deck name, commander name, and expansion name
+                if (query_lower in deck['name'].lower() or
+                    query_lower in deck['commander'].lower() or
+                    query_lower in deck['expansion'].lower()):
+                    matching_decks.append(deck)
+        
+        return matching_decks
+
+def price_to_cents(price) -> Optional[int]:
+    """
+    Convert a Scryfall price string to whole cents.
+    
+    Args:
+        price: Price such as "12.34", or None when Scryfall has no price
+        
+    Returns:
+        The price in cents, or None if there is no usable price
+    """
+    if not price:
+        return None
+    try:
+        return round(float(price) * 100)
+    except (ValueError, TypeError):
+        return None
+
+def collection_entry_totals(entry: Dict) -> Tuple[int, int, int]:
+    """
+    Work out what one collection entry adds to the collection summary.
+    
+    Only prices of $1 or more count towards the value. A foil-only entry
+    without a foil price is valued at its regular price.
+    
+    Args:
+        entry: Collection entry with quantities and price strings
+        
+    Returns:
+        Tuple of (cards owned, value in cents, 1 if the entry is priced else 0)
+    """
+    regular_qty = entry.get('quantity', 0) or 0
+    foil_qty = entry.get('foil_quantity', 0) or 0
+    regular_cents = price_to_cents(entry.get('price_usd_regular'))
+    value_cents = 0
+    priced = False
+    
+    if regular_qty > 0 and regular_cents is not None:
+        priced = True
+        if regular_cents >= 100:
+            value_cents += regular_cents * regular_qty
+    
+    if foil_qty > 0:
+        if entry.get('price_usd_foil'):
+            foil_cents = price_to_cents(entry.get('price_usd_foil'))
+            if foil_cents is not None:
+                priced = True
+                if foil_cents >= 100:
+                    value_cents += foil_cents * foil_qty
+        elif regular_qty == 0 and regular_cents is not None:
+            # No foil price; fall back to the regular price
+            priced = True
+            if regular_cents >= 100:
+                value_cents += regular_cents * foil_qty
+    
+    return regular_qty + foil_qty, value_cents, int(priced)
+
+class ShardedEntries(Mapping[str, Dict]):
+    """Read-only mapping of card id -> entry over a fixed list of shard dicts.
+
+    Snapshots of the collection are ShardedEntries sharing the manager's
+    shards, which are never modified once shared. Each shard maps a card id
+    to (position, entry), where positions grow with every new card, so
+    iterating merges the shards back into insertion order, as a dict would.
+    """
+
+    def __init__(self, shards: List[Dict[str, Tuple[int, Dict]]], length: int):
+        self._shards = shards
+        self._length = length
+
+    @staticmethod
+    def _shard_index(card_id: str) -> int:
+        """Shard holding a card id"""
+        return zlib.crc32(card_id.encode('utf-8')) % COLLECTION_SNAPSHOT_SHARDS
+
+    def __getitem__(self, card_id: str) -> Dict:
+        return self._shards[self._shard_index(card_id)][card_id][1]
+
+    def get(self, card_id: str, default=None) -> Optional[Dict]:
+        positioned = self._shards[self._shard_index(card_id)].get(card_id)
+        return default if positioned is None else positioned[1]
+
+    def __contains__(self, card_id) -> bool:
+        return isinstance(card_id, str) and card_id in self._shards[self._shard_index(card_id)]
+
+    def _ordered_items(self):
+        """(card id, entry) pairs in insertion order"""
+        # Each shard is already in position order: new cards are appended and updates keep their place
+        shard_orders = (
+            ((position, card_id, entry) for card_id, (position, entry) in shard.items()) for shard in self._shards
+        )
+        # Positions are unique, so the merge never goes on to compare card ids or entries
+        for _, card_id, entry in heapq.merge(*shard_orders):
+            yield card_id, entry
+
+    def __iter__(self):
+        for card_id, _ in self._ordered_items():
+            yield card_id
+
+    def __len__(self) -> int:
+        return self._length
+
+    def items(self) -> ItemsView:
+        return ShardedItemsView(self)
+
+    def values(self) -> ValuesView:
+        return ShardedValuesView(self)
+
+
+class ShardedItemsView(ItemsView):
+    """items() of a ShardedEntries, read in one merge rather than a lookup per card"""
+
+    def __iter__(self):
+        return self._mapping._ordered_items()
+
+
+class ShardedValuesView(ValuesView):
+    """values() of a ShardedEntries, read in one merge rather than a lookup per card"""
+
+    def __iter__(self):
+        for _, entry in self._mapping._ordered_items():
+            yield entry
+
+
+class CollectionEntries(ShardedEntries):
+    """
+    The manager's writable card id -> entry mapping.
+
+    snapshot() hands out the current shards without copying anything; the
+    next write to a shard a snapshot holds copies that one shard first. A
+    snapshot costs O(COLLECTION_SNAPSHOT_SHARDS) and a write at most one
+    shard copy, however large the collection is.
+    """
+
+    def __init__(self, entries: Optional[Dict[str, Dict]] = None):
+        super().__init__([{} for _ in range(COLLECTION_SNAPSHOT_SHARDS)], 0)
+        self._shared = set()  # Indexes of shards referenced by a snapshot
+        self._next_position = 0
+        for card_id, entry in (entries or {}).items():
+            self._shards[self._shard_index(card_id)][card_id] = (self._next_position, entry)
+            self._next_position += 1
+        self._length = sum(len(shard) for shard in self._shards)
+
+    def _writable_shard(self, card_id: str) -> Dict[str, Tuple[int, Dict]]:
+        """The card's shard, copied first if a snapshot shares it"""
+        index = self._shard_index(card_id)
+        if index in self._shared:
+            self._shards[index] = dict(self._shards[index])
+            self._shared.discard(index)
+        return self._shards[index]
+
+    def __setitem__(self, card_id: str, entry: Dict):
+        shard = self._writable_shard(card_id)
+        positioned = shard.get(card_id)
+        if positioned is None:
+            self._length += 1
+            shard[card_id] = (self._next_position, entry)
+            self._next_position += 1
+        else:
+            shard[card_id] = (positioned[0], entry)
+
+    def pop(self, card_id: str, default=None) -> Optional[Dict]:
+        """Remove a card's entry, returning it or default"""
+        if card_id not in self:
+            return default
+        self._length -= 1
+        return self._writable_shard(card_id).pop(card_id)[1]
+
+    def snapshot(self) -> ShardedEntries:
+        """Read-only view of the current entries that later writes leave untouched"""
+        self._shared = set(range(COLLECTION_SNAPSHOT_SHARDS))
+        return ShardedEntries(tuple(self._shards), self._length)
+
+
+class CollectionStore:
+    """
+    SQLite table holding one row per collection entry.
+
+    The database runs in WAL mode, so several worker processes can open the
+    same file: readers never block the single writer, and writers wait up to
+    COLLECTION_CONNECTION_TIMEOUT for each other. PRAGMA data_version tells a
+    process when another connection has committed, and the change sequence
+    stamped on every write tells it which rows to read back.
+    """
+
+    def __init__(self, db_path: str = COLLECTION_DB_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=COLLECTION_CONNECTION_TIMEOUT, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.execute(COLLECTION_SCHEMA)
+
+        # Stores created before change tracking lack the sequence column
+        store_columns = [column[1] for column in self._conn.execute('PRAGMA table_info(collection)')]
+        if 'updated_seq' not in store_columns:
+            self._conn.execute('ALTER TABLE collection ADD COLUMN updated_seq INTEGER NOT NULL DEFAULT 0')
+        for statement in COLLECTION_CHANGE_SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+        columns = ', '.join(column for _, column in COLLECTION_COLUMNS)
+        self._select_sql = f'SELECT card_id, {columns} FROM collection'
+        # Upsert rather than REPLACE so an entry keeps its rowid, which loads read back in insertion order
+        self._upsert_sql = (
+            f'INSERT INTO collection (card_id, {columns}, updated_seq) '
+            f'VALUES ({", ".join("?" * (len(COLLECTION_COLUMNS) + 2))}) '
+            'ON CONFLICT (card_id) DO UPDATE SET '
+            + ', '.join(f'{column} = excluded.{column}' for column in [column for _, column in COLLECTION_COLUMNS] + ['updated_seq'])
+        )
+
+    def _entries(self, rows) -> Dict[str, Dict]:
+        """Entries keyed by card id from rows selected with _select_sql"""
+        keys = [key for key, _ in COLLECTION_COLUMNS]
+        return {row[0]: dict(zip(keys, row[1:])) for row in rows}
+
+    def _sequence(self, name: str) -> int:
+        """Read 'last' (the newest write) or 'cleared' (the last clear) from the change sequence"""
+        return self._conn.execute('SELECT value FROM collection_sequence WHERE name = ?', (name,)).fetchone()[0]
+
+    def _next_sequence(self) -> int:
+        """Take the next change sequence, which also takes the write lock; the caller commits"""
+        self._conn.execute("UPDATE collection_sequence SET value = value + 1 WHERE name = 'last'")
+        return self._sequence('last')
+
+    def data_version(self) -> int:
+        """Counter that changes whenever another connection commits to the store"""
+        with self._lock:
+            return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def load(self) -> Tuple[Dict[str, Dict], int, int]:
+        """Return every entry keyed by card id, with the data version and change sequence they were read at"""
+        with self._lock:
+            # Read the version first: a commit that lands mid-read only causes a redundant sync
+            data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+            # One read transaction, so the rows and the sequence match
+            self._conn.execute('BEGIN')
+            try:
+                sequence = self._sequence('last')
+                rows = self._conn.execute(f'{self._select_sql} ORDER BY rowid').fetchall()
+            finally:
+                self._conn.commit()
+        return self._entries(rows), data_version, sequence
+
+    def changes_since(self, sequence: int) -> Optional[Tuple[Dict[str, Dict], List[str], int, int]]:
+        """
+        Read the writes made after a change sequence.
+
+        Returns (written entries keyed by card id, deleted card ids, data
+        version, change sequence read at), or None when the store has been
+        cleared since and must be loaded in full.
         """
-        all_expansions = PreconDeckListAPI.get_all_decks()
-        matching_decks = []
-        
-        query_lower = query.lower()
+        with self._lock:
+            data_version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+            self._conn.execute('BEGIN')
+            try:
+                if self._sequence('cleared') > sequence:
+                    return None
+                latest = self._sequence('last')
+                rows = self._conn.execute(f'{self._select_sql} WHERE updated_seq > ? ORDER BY rowid', (sequence,)).fetchall()
+                deleted_ids = [row[0] for row in self._conn.execute(
+                    'SELECT card_id FROM collection_deletions WHERE deleted_seq > ?', (sequence,)
+                )]
+            finally:
+                self._conn.commit()
+        return self._entries(rows), deleted_ids, data_version, latest
+
+    def upsert_many(self, entries: Iterable[Tuple[str, Dict]]) -> Optional[int]:
+        """Write (card id, entry) pairs in a single transaction"""
+        return self.apply_changes(entries, ())
+
+    def upsert(self, card_id: str, entry: Dict) -> Optional[int]:
+        """Write one collection entry"""
+        return self.upsert_many([(card_id, entry)])
+
+    def apply_changes(self, entries: Iterable[Tuple[str, Dict]], deleted_ids: Iterable[str]) -> Optional[int]:
+        """
+        Write (card id, entry) pairs and delete entries in a single transaction.
+
+        Returns the change sequence of the write, or None when there was nothing to write.
+        """
+        rows = [
+            (card_id,) + tuple(entry.get(key) for key, _ in COLLECTION_COLUMNS)
+            for card_id, entry in entries
+        ]
+        deleted_ids = list(deleted_ids)
+        if not rows and not deleted_ids:
+            return None
+        with self._lock, self._conn:
+            sequence = self._next_sequence()
+            # A card id is either stored or tombstoned, never both
+            self._conn.executemany(self._upsert_sql, [row + (sequence,) for row in rows])
+            self._conn.executemany('DELETE FROM collection_deletions WHERE card_id = ?', [row[:1] for row in rows])
+            self._conn.executemany('DELETE FROM collection WHERE card_id = ?', [(card_id,) for card_id in deleted_ids])
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO collection_deletions (card_id, deleted_seq) VALUES (?, ?)',
+                [(card_id, sequence) for card_id in deleted_ids]
+            )
+        return sequence
+
+    def delete(self, card_id: str) -> Optional[int]:
+        """Remove one collection entry"""
+        return self.apply_changes((), [card_id])
+
+    def clear(self) -> int:
+        """Remove every collection entry"""
+        with self._lock, self._conn:
+            sequence = self._next_sequence()
+            self._conn.execute('DELETE FROM collection')
+            self._conn.execute('DELETE FROM collection_deletions')
+            self._conn.execute("UPDATE collection_sequence SET value = ? WHERE name = 'cleared'", (sequence,))
+        return sequence
+
+    def close(self):
+        """Close the store's connection"""
+        with self._lock:
+            self._conn.close()
+
+class CollectionManager:
+    """Manages collection data and CSV export with separate foil and regular quantities.
+
+    Every change happens under one re-entrant writer lock and replaces the
+    card's entry dict rather than editing it, so an entry handed out is never
+    modified afterwards. Readers get a read-only snapshot of the whole
+    collection, taken once per version by sharing the CollectionEntries
+    shards, which they can iterate while an import keeps writing.
+    """
+
+    def __init__(self, store: Optional[CollectionStore] = None):
+        self.store = store  # None keeps the collection in memory only
+        self._lock = threading.RLock()
+        self._collection = CollectionEntries()
+        self._version = 0  # Bumped on every change
+        self._snapshot = self._collection.snapshot()
+        self._snapshot_version = 0
+        self._unsaved = set()  # Card ids changed in memory but not yet written to the store
+        self._data_version = None
+        self._sequence = 0  # Store change sequence the in-memory collection includes
+        self._sequence_state = (None, None, None)  # (version, sequence, checked at) when the two last matched
+        self.load_seconds = None  # Time taken by the last load from the store
+        self._reset_totals()
+        if store is not None:
+            self._load_from_store()
+
+    def _load_from_store(self):
+        """Replace the in-memory collection with the store's contents; the caller holds the lock"""
+        start_time = time.perf_counter()
+        self._flush_unsaved()
+        entries, self._data_version, self._sequence = self.store.load()
+        self._collection = CollectionEntries(entries)
+        self._reset_totals()
+        for card_id in self._collection:
+            self._track(card_id)
+        self.load_seconds = time.perf_counter() - start_time
+        self._version += 1
+        self._note_sequence()
+
+    def _reset_totals(self):
+        """Empty the running summary totals and the set indexes"""
+        self._entry_totals = {}  # Card id -> (cards, value in cents, priced, set, number) counted for its entry
+        self._total_cards = 0
+        self._value_cents = 0
+        self._priced_cards = 0
+        self._set_index = {}  # Lowercase set code -> {card id: entry} for owned entries in that set
+        self._number_index = {}  # (lowercase set code, collector number) -> card id
+
+    def _track(self, card_id: str):
+        """Update the running summary totals and set indexes after a card's entry changed or was removed"""
+        previous = self._entry_totals.pop(card_id, None)
+        if previous is not None:
+            cards, value_cents, priced, set_key, collector_number = previous
+            self._total_cards -= cards
+            self._value_cents -= value_cents
+            self._priced_cards -= priced
+            set_entries = self._set_index[set_key]
+            del set_entries[card_id]
+            if not set_entries:
+                del self._set_index[set_key]
+            if self._number_index.get((set_key, collector_number)) == card_id:
+                del self._number_index[(set_key, collector_number)]
         
-        for expansion in all_expansions:
-            for deck in expansion['decks']:
-                # Search in deck name, commander name, and expansion name
-                if (query_lower in deck['name'].lower() or
-                    query_lower in deck['commander'].lower() or
-                    query_lower in deck['expansion'].lower()):
-                    matching_decks.append(deck)
+        entry = self._collection.get(card_id)
+        if entry is None:
+            return
+        cards, value_cents, priced = collection_entry_totals(entry)
+        if cards <= 0:
+            return
+        set_key = entry['set'].lower()
+        collector_number = entry.get('collector_number') or ''
+        self._entry_totals[card_id] = (cards, value_cents, priced, set_key, collector_number)
+        self._total_cards += cards
+        self._value_cents += value_cents
+        self._priced_cards += priced
+        self._set_index.setdefault(set_key, {})[card_id] = entry
+        self._number_index[(set_key, collector_number)] = card_id
+
+    def get_set_entries(self, set_code: str) -> Dict[str, Dict]:
+        """Owned entries in one set, keyed by card id"""
+        return self.get_versioned_set_entries(set_code)[1]
+
+    def get_versioned_set_entries(self, set_code: str) -> Tuple[int, Dict[str, Dict]]:
+        """The collection version and one set's owned entries, read together under the lock.
         
-        return matching_decks
+        sequence_at(version) gives the store change sequence for the ETag.
+        """
+        with self._lock:
+            self._sync()
+            return self._version, dict(self._set_index.get(set_code.lower(), {}))
 
-class CollectionManager:
-    """Manages collection data and CSV export with separate foil and regular quantities."""
-    
-    def __init__(self):
-        self.collection = {}
-    
-    def add_card(self, card_data: Dict, quantity: int, foil: bool = False):
-        """Add or update a card in the collection.
+    def find_entry(self, set_code: str, collector_number: str) -> Optional[Tuple[str, Dict]]:
+        """Find the owned entry for a set and collector number, as (card id, entry)"""
+        with self._lock:
+            self._sync()
+            card_id = self._number_index.get((set_code.lower(), collector_number))
+            return (card_id, self._collection[card_id]) if card_id else None
 
-        This stores a single entry per card (keyed by card id) and keeps
-        separate counts for regular and foil quantities.
+    def _sync(self):
+        """Apply the writes another worker process has made to the store since the last sync"""
+        with self._lock:
+            if self.store is None:
+                return
+            if self.store.data_version() != self._data_version:
+                self._flush_unsaved()
+                changes = self.store.changes_since(self._sequence)
+                if changes is None:
+                    # Cleared since the last sync, so there are no tombstones to go by
+                    self._load_from_store()
+                    return
+                entries, deleted_ids, self._data_version, self._sequence = changes
+                for card_id, entry in entries.items():
+                    self._set_entry(card_id, entry)
+                for card_id in deleted_ids:
+                    self._set_entry(card_id, None)
+                if entries or deleted_ids:
+                    self._version += 1
+            # Imported entries not yet written match no store sequence
+            if not self._unsaved:
+                self._note_sequence()
 
-        The method replaces the stored quantity for the given type (foil vs regular)
-        rather than adding to it, preserving the existing UX where input fields
-        set absolute values.
+    def _saved(self, sequence: Optional[int]):
+        """Note the change sequence of this manager's own write; the caller holds the lock and has bumped the version"""
+        # Only a write directly after the last sequence seen can be skipped by the next sync;
+        # after a gap, the next sync reads this write back along with the others
+        if sequence is not None and sequence == self._sequence + 1:
+            self._sequence = sequence
+            self._note_sequence()
+        else:
+            self._sequence_state = (None, None, None)
+
+    def _note_sequence(self):
+        """Record that the current version holds exactly the store at the current sequence; the caller holds the lock"""
+        self._sequence_state = (self._version, self._sequence, time.monotonic())
+
+    def sequence_at(self, version: int) -> Optional[int]:
+        """The store change sequence matching a collection version, or None if none is known to.
+        
+        Versions are local to this process; the sequence is shared by every
+        worker on the store, so ETags are built from it.
         """
-        card_id = card_data['id']
+        noted_version, sequence, _ = self._sequence_state
+        return sequence if noted_version == version else None
+
+    def etag_sequence(self) -> Optional[int]:
+        """The store change sequence the collection is at, answered from memory while fresh.
+        
+        This manager's own writes record it as they commit; writes by another
+        worker are synced at most ETAG_STATE_RECHECK_SECONDS after the last
+        check. None while the collection matches no stored state, e.g. during
+        an import.
+        """
+        version, sequence, checked_at = self._sequence_state
+        if checked_at is None or time.monotonic() - checked_at > ETAG_STATE_RECHECK_SECONDS:
+            with self._lock:
+                self._sync()
+                version, sequence, checked_at = self._sequence_state
+        return sequence if version == self._version else None
+
+    @property
+    def collection(self) -> Mapping[str, Dict]:
+        """Read-only snapshot of the collection entries, keyed by card id"""
+        with self._lock:
+            self._sync()
+            return self._current_snapshot()
+
+    def _current_snapshot(self) -> Mapping[str, Dict]:
+        """Snapshot for the current version, built on first use; the caller holds the lock"""
+        if self._snapshot_version != self._version:
+            self._snapshot = self._collection.snapshot()
+            self._snapshot_version = self._version
+        return self._snapshot
+
+    def get_versioned_collection(self) -> Tuple[int, Mapping[str, Dict], Dict]:
+        """The version, snapshot and summary read together, so a page shows a single version.
         
-        # Get existing entry or create new one
-        entry = self.collection.get(card_id, {
+        sequence_at(version) gives the store change sequence for the ETag.
+        """
+        with self._lock:
+            self._sync()
+            return self._version, self._current_snapshot(), self._summary()
+
+    @property
+    def version(self) -> int:
+        """Change counter for the collection"""
+        with self._lock:
+            self._sync()
+            return self._version
+
+    def _set_entry(self, card_id: str, entry: Optional[Dict]):
+        """Replace or remove a card's entry in memory; the caller holds the lock and bumps the version"""
+        if entry is None:
+            self._collection.pop(card_id, None)
+        else:
+            self._collection[card_id] = entry
+        self._track(card_id)
+
+    def _save_entry(self, card_id: str, entry: Optional[Dict]):
+        """Write one entry through to the store, deleting it when entry is None; the caller holds the lock"""
+        self._unsaved.discard(card_id)
+        if self.store is None:
+            return
+        if entry is None:
+            self._saved(self.store.delete(card_id))
+        else:
+            self._saved(self.store.upsert(card_id, entry))
+
+    def _flush_unsaved(self):
+        """Write entries changed by an import to the store in one transaction; the caller holds the lock"""
+        if self.store is not None and self._unsaved:
+            self._saved(self.store.upsert_many(
+                (card_id, self._collection[card_id]) for card_id in self._unsaved if card_id in self._collection
+            ))
+        self._unsaved.clear()
+
+    @staticmethod
+    def _new_entry(card_data: Dict) -> Dict:
+        """Build an empty collection entry for a Scryfall card"""
+        return {
             'name': card_data['name'],
             'set': card_data['set'].upper(),
             'set_name': card_data['set_name'],
@@ -999,53 +3525,134 @@ class CollectionManager:
             'image_url': card_data.get('image_uris', {}).get('small', ''),
             'price_usd_regular': card_data.get('prices', {}).get('usd'),
             'price_usd_foil': card_data.get('prices', {}).get('usd_foil')
-        })
-        
-        # Update the appropriate quantity field
-        if foil:
-            entry['foil_quantity'] = quantity
-        else:
-            entry['quantity'] = quantity
-        
-        # If both quantities are now 0, remove the card from collection
-        if entry['quantity'] == 0 and entry['foil_quantity'] == 0:
-            if card_id in self.collection:
-                del self.collection[card_id]
-            return
-        
-        self.collection[card_id] = entry
+        }
+    
+    def add_card(self, card_data: Dict, quantity: int, foil: bool = False):
+        """Add or update a card in the collection.
+
+        This stores a single entry per card (keyed by card id) and keeps
+        separate counts for regular and foil quantities.
+
+        The method replaces the stored quantity for the given type (foil vs regular)
+        rather than adding to it, preserving the existing UX where input fields
+        set absolute values.
+        """
+        card_id = card_data['id']
+        with self._lock:
+            self._sync()
+            
+            # Copy the existing entry or create a new one
+            existing = self._collection.get(card_id)
+            entry = dict(existing) if existing else self._new_entry(card_data)
+            
+            # Update the appropriate quantity field
+            if foil:
+                entry['foil_quantity'] = quantity
+            else:
+                entry['quantity'] = quantity
+            
+            # If both quantities are now 0, remove the card from collection
+            if entry['quantity'] == 0 and entry['foil_quantity'] == 0:
+                if existing is not None:
+                    self._set_entry(card_id, None)
+                    self._version += 1
+                    self._save_entry(card_id, None)
+                return
+            
+            self._set_entry(card_id, entry)
+            self._version += 1
+            self._save_entry(card_id, entry)
     
     def update_card_quantities(self, card_data: Dict, regular_quantity: int = 0, foil_quantity: int = 0):
         """Update both regular and foil quantities for a card simultaneously."""
         card_id = card_data['id']
+        with self._lock:
+            self._sync()
+            
+            # If both quantities are 0, remove the card from collection
+            if regular_quantity == 0 and foil_quantity == 0:
+                if card_id in self._collection:
+                    self._set_entry(card_id, None)
+                    self._version += 1
+                    self._save_entry(card_id, None)
+                return
+            
+            # Copy the existing entry or create a new one
+            existing = self._collection.get(card_id)
+            entry = dict(existing) if existing else self._new_entry(card_data)
+            
+            # Update both quantities
+            entry['quantity'] = regular_quantity
+            entry['foil_quantity'] = foil_quantity
+            
+            self._set_entry(card_id, entry)
+            self._version += 1
+            self._save_entry(card_id, entry)
+    
+    def update_quantities_batch(self, updates: List[Dict]) -> Dict:
+        """
+        Set regular and foil quantities for many cards in one operation.
         
-        # If both quantities are 0, remove the card from collection
-        if regular_quantity == 0 and foil_quantity == 0:
-            if card_id in self.collection:
-                del self.collection[card_id]
-            return
+        Cards already in the collection get updated copies of their entries;
+        new cards are looked up in the bulk cache by id, or built from the update's optional
+        'card' data when the cache does not have them. All changes reach the
+        store in a single transaction.
         
-        # Get existing entry or create new one
-        entry = self.collection.get(card_id, {
-            'name': card_data['name'],
-            'set': card_data['set'].upper(),
-            'set_name': card_data['set_name'],
-            'collector_number': card_data['collector_number'],
-            'quantity': 0,
-            'foil_quantity': 0,
-            'condition': 'Near Mint',
-            'language': 'English',
-            'rarity': card_data['rarity'],
-            'image_url': card_data.get('image_uris', {}).get('small', ''),
-            'price_usd_regular': card_data.get('prices', {}).get('usd'),
-            'price_usd_foil': card_data.get('prices', {}).get('usd_foil')
-        })
+        Args:
+            updates: Dicts with card_id, regular and foil quantities and an
+                optional card; later updates to the same card win
+            
+        Returns:
+            Dict with the resulting quantities keyed by card id, and the ids
+            of new cards that could not be found (left unchanged)
+        """
+        latest = {update['card_id']: update for update in updates}
+        with self._lock:
+            self._sync()
+            unknown_ids = [
+                card_id for card_id, update in latest.items()
+                if card_id not in self._collection and (update['regular'] > 0 or update['foil'] > 0)
+            ]
+        # The cache lookup runs outside the lock so it does not hold up other writers
+        found_cards = bulk_cache.get_cards_by_ids(unknown_ids) if unknown_ids else {}
         
-        # Update both quantities
-        entry['quantity'] = regular_quantity
-        entry['foil_quantity'] = foil_quantity
+        changed, deleted_ids, unresolved, cards = {}, [], [], {}
+        with self._lock:
+            self._sync()
+            for card_id, update in latest.items():
+                if update['regular'] == 0 and update['foil'] == 0:
+                    if card_id in self._collection:
+                        self._set_entry(card_id, None)
+                        deleted_ids.append(card_id)
+                    cards[card_id] = {'regular': 0, 'foil': 0}
+                    continue
+                
+                existing = self._collection.get(card_id)
+                if existing is not None:
+                    entry = dict(existing)
+                else:
+                    card_data = found_cards.get(card_id) or update.get('card')
+                    try:
+                        entry = self._new_entry(card_data) if card_data else None
+                    except (KeyError, AttributeError, TypeError):
+                        entry = None  # Card data from the client without the fields an entry needs
+                    if entry is None:
+                        unresolved.append(card_id)
+                        continue
+                entry['quantity'] = update['regular']
+                entry['foil_quantity'] = update['foil']
+                self._set_entry(card_id, entry)
+                changed[card_id] = entry
+                cards[card_id] = {'regular': entry['quantity'], 'foil': entry['foil_quantity']}
+            
+            if changed or deleted_ids:
+                self._version += 1
+            self._unsaved.difference_update(changed)
+            self._unsaved.difference_update(deleted_ids)
+            if self.store is not None:
+                self._saved(self.store.apply_changes(changed.items(), deleted_ids))
         
-        self.collection[card_id] = entry
+        return {'cards': cards, 'unresolved': unresolved}
     
     def export_to_csv(self, format_type: str = 'mtggoldfish') -> str:
         """Export collection to CSV format compatible with MTGGoldfish or DeckBox.
@@ -1054,6 +3661,8 @@ class CollectionManager:
         two rows (one for regular, one for foil) so both are represented
         in the exported file.
         """
+        # One snapshot for the whole export, so a running import cannot tear it
+        collection = self.collection
         output = io.StringIO()
         
         if format_type.lower() == 'deckbox':
@@ -1063,7 +3672,7 @@ class CollectionManager:
             writer = csv.DictWriter(output, fieldnames=fieldnames)
             writer.writeheader()
             
-            for card in self.collection.values():
+            for card in collection.values():
                 reg_qty = card.get('quantity', 0) or 0
                 foil_qty = card.get('foil_quantity', 0) or 0
                 
@@ -1111,7 +3720,7 @@ class CollectionManager:
             writer = csv.DictWriter(output, fieldnames=fieldnames)
             writer.writeheader()
             
-            for card in self.collection.values():
+            for card in collection.values():
                 reg_qty = card.get('quantity', 0) or 0
                 foil_qty = card.get('foil_quantity', 0) or 0
                 
@@ -1145,68 +3754,26 @@ class CollectionManager:
     
     def get_collection_summary(self) -> Dict:
         """Get summary statistics of the collection (counts include foil + regular)."""
-        total_cards = sum(((card.get('quantity', 0) or 0) + (card.get('foil_quantity', 0) or 0)) for card in self.collection.values())
-        total_unique = len([card for card in self.collection.values() if ((card.get('quantity', 0) or 0) + (card.get('foil_quantity', 0) or 0)) > 0])
-        
-        # Calculate total estimated value (excluding bulk cards < $1)
-        total_value = 0.0
-        priced_cards = 0
-        
-        for card in self.collection.values():
-            reg_qty = card.get('quantity', 0) or 0
-            foil_qty = card.get('foil_quantity', 0) or 0
-            
-            # Regular quantity value
-            if reg_qty > 0:
-                reg_price_str = card.get('price_usd_regular')
-                if reg_price_str:
-                    try:
-                        reg_price = float(reg_price_str)
-                        # Only include cards worth $1 or more
-                        if reg_price >= 1.0:
-                            total_value += reg_price * reg_qty
-                        if priced_cards == 0:  # Only count each card once for priced_cards
-                            priced_cards += 1
-                    except (ValueError, TypeError):
-                        pass
-            
-            # Foil quantity value
-            if foil_qty > 0:
-                foil_price_str = card.get('price_usd_foil')
-                if foil_price_str:
-                    try:
-                        foil_price = float(foil_price_str)
-                        # Only include cards worth $1 or more
-                        if foil_price >= 1.0:
-                            total_value += foil_price * foil_qty
-                        if reg_qty == 0:  # Only count if we didn't already count for regular
-                            priced_cards += 1
-                    except (ValueError, TypeError):
-                        pass
-                elif reg_qty == 0:  # No foil price but has foil quantity, try regular price
-                    reg_price_str = card.get('price_usd_regular')
-                    if reg_price_str:
-                        try:
-                            reg_price = float(reg_price_str)
-                            # Only include cards worth $1 or more
-                            if reg_price >= 1.0:
-                                total_value += reg_price * foil_qty  # Use regular price as fallback
-                            priced_cards += 1
-                        except (ValueError, TypeError):
-                            pass
-        
+        with self._lock:
+            self._sync()
+            return self._summary()
+
+    def _summary(self) -> Dict:
+        """Summary from the running totals; the caller holds the lock"""
+        # Kept up to date by _track on every change, so no entries are walked here
         return {
-            'total_cards': total_cards,
-            'unique_cards': total_unique,
-            'sets_represented': len({card['set'] for card in self.collection.values() if ((card.get('quantity', 0) or 0) + (card.get('foil_quantity', 0) or 0)) > 0}),
-            'total_value': total_value,
-            'priced_cards': priced_cards
+            'total_cards': self._total_cards,
+            'unique_cards': len(self._entry_totals),
+            'sets_represented': len(self._set_index),
+            'total_value': self._value_cents / 100,
+            'priced_cards': self._priced_cards
         }
     
     def import_from_csv(self, csv_content: str, progress_callback=None) -> Dict:
         """Import collection from CSV format - supports both MTGGoldfish and DeckBox formats with bulk cache optimization"""
         imported_count = 0
         errors = []
+        low_confidence_matches = []
         cache_hits = 0
         api_calls = 0
         
@@ -1279,42 +3846,74 @@ class CollectionManager:
                     if not sanitized_name or not set_code or quantity <= 0:
                         continue  # Skip invalid rows
                     
-                    # Try to find the card using hybrid approach (cache first, then API)
-                    card_data = self._find_card_by_details_hybrid(sanitized_name, set_code, collector_number)
+                    # Rows for cards already in the collection need no lookup. The set column may
+                    # hold a code or a set name, and the check and the update share one lock, so an
+                    # entry deleted in between sends the row to the lookup instead
+                    owned_id = None
+                    if collector_number:
+                        set_codes = bulk_cache.resolve_set_codes(set_code)
+                        with self._lock:
+                            self._sync()
+                            owned_id = self._owned_card_id(set_codes, collector_number, sanitized_name)
+                            if owned_id:
+                                self._import_quantity(owned_id, dict(self._collection[owned_id]), quantity, foil)
+                    if owned_id:
+                        card_data = {'id': owned_id, '_source': 'collection'}
+                    else:
+                        # Try to find the card using hybrid approach (cache first, then API)
+                        card_data = self._find_card_by_details_hybrid(sanitized_name, set_code, collector_number)
                     
                     if card_data:
-                        if card_data.get('_source') == 'cache':
+                        if card_data.get('_source') in ('cache', 'collection'):
                             cache_hits += 1
                         else:
                             api_calls += 1
+                        
+                        confidence = card_data.get('_match_confidence', 1.0)
+                        if confidence < FUZZY_MATCH_REVIEW_CONFIDENCE:
+                            low_confidence_matches.append({
+                                'row': row_num,
+                                'name': sanitized_name,
+                                'matched_name': card_data.get('name', ''),
+                                'set': card_data.get('set', set_code).upper(),
+                                'confidence': confidence
+                            })
                     
-                    if card_data:
+                    if card_data and card_data.get('_source') == 'collection':
+                        imported_count += 1
+                        if progress_callback:
+                            progress_callback({
+                                'current': row_num - 1,
+                                'total': total_rows,
+                                'card_name': sanitized_name,
+                                'status': 'imported'
+                            })
+                    elif card_data:
                         # Create or update collection entry keyed by card id
                         card_id = card_data['id']
                         
-                        # Get existing entry or create new one
-                        entry = self.collection.get(card_id, {
-                            'name': sanitized_name,
-                            'set': card_data.get('set', set_code).upper(),
-                            'set_name': card_data.get('set_name', ''),
-                            'collector_number': collector_number,
-                            'quantity': 0,
-                            'foil_quantity': 0,
-                            'condition': condition,
-                            'language': language,
-                            'rarity': card_data.get('rarity', 'unknown'),
-                            'image_url': card_data.get('image_uris', {}).get('small', ''),
-                            'price_usd_regular': card_data.get('prices', {}).get('usd'),
-                            'price_usd_foil': card_data.get('prices', {}).get('usd_foil')
-                        })
-                        
-                        # Update the appropriate quantity field
-                        if foil:
-                            entry['foil_quantity'] = quantity
-                        else:
-                            entry['quantity'] = quantity
-                        
-                        self.collection[card_id] = entry
+                        # The lock is held per row, so readers and other writers get in between rows
+                        with self._lock:
+                            self._sync()
+                            
+                            # Copy the existing entry or create a new one
+                            existing = self._collection.get(card_id)
+                            entry = dict(existing) if existing else {
+                                # Fuzzy matches take the real card name rather than the typo
+                                'name': sanitized_name if confidence == 1.0 else card_data.get('name', sanitized_name),
+                                'set': card_data.get('set', set_code).upper(),
+                                'set_name': card_data.get('set_name', ''),
+                                'collector_number': collector_number,
+                                'quantity': 0,
+                                'foil_quantity': 0,
+                                'condition': condition,
+                                'language': language,
+                                'rarity': card_data.get('rarity', 'unknown'),
+                                'image_url': card_data.get('image_uris', {}).get('small', ''),
+                                'price_usd_regular': card_data.get('prices', {}).get('usd'),
+                                'price_usd_foil': card_data.get('prices', {}).get('usd_foil')
+                            }
+                            self._import_quantity(card_id, entry, quantity, foil)
                         imported_count += 1
                         
                         # Update progress with success
@@ -1361,6 +3960,9 @@ class CollectionManager:
                     
         except Exception as e:
             errors.append(f"CSV parsing error: {str(e)}")
+        finally:
+            with self._lock:
+                self._flush_unsaved()
         
         return {
             'imported_count': imported_count,
@@ -1368,7 +3970,8 @@ class CollectionManager:
             'success': imported_count > 0,
             'cache_hits': cache_hits,
             'api_calls': api_calls,
-            'cache_hit_rate': (cache_hits / max(1, cache_hits + api_calls)) * 100
+            'cache_hit_rate': (cache_hits / max(1, cache_hits + api_calls)) * 100,
+            'low_confidence_matches': low_confidence_matches
         }
     
     def _find_card_by_details(self, name: str, set_identifier: str, collector_number: str) -> Optional[Dict]:
@@ -1448,30 +4051,76 @@ class CollectionManager:
         
         return None
     
+    def _owned_card_id(self, set_codes: List[str], collector_number: str, name: str) -> Optional[str]:
+        """The id of an owned card with this name and collector number in one of the sets; the caller holds the lock"""
+        for set_code in set_codes:
+            card_id = self._number_index.get((set_code.lower(), collector_number))
+            if card_id and self._collection[card_id].get('name', '').lower() == name.lower():
+                return card_id
+        return None
+    
+    def _import_quantity(self, card_id: str, entry: Dict, quantity: int, foil: bool):
+        """Set an imported row's quantity on a card's new entry and queue it for the store; the caller holds the lock"""
+        if foil:
+            entry['foil_quantity'] = quantity
+        else:
+            entry['quantity'] = quantity
+        
+        self._set_entry(card_id, entry)
+        self._version += 1
+        
+        # Imported entries reach the store in batches rather than per row
+        self._unsaved.add(card_id)
+        if len(self._unsaved) >= COLLECTION_IMPORT_FLUSH_ROWS:
+            self._flush_unsaved()
+    
     def _find_card_by_details_hybrid(self, name: str, set_identifier: str, collector_number: str) -> Optional[Dict]:
-        """Find a card using hybrid approach: cache first, then API fallback"""
+        """Find a card using hybrid approach: cache first, then API fallback.
+        
+        The returned card carries `_match_confidence`, 1.0 when its name matches
+        and lower for fuzzy matches, so callers can flag doubtful rows.
+        """
         # First try the bulk cache
         card_data = bulk_cache.find_card_in_cache(name, set_identifier, collector_number)
         if card_data:
-            card_data['_source'] = 'cache'
-            return card_data
+            return self._annotate_match(card_data, name, 'cache')
         
         # If not in cache, try fuzzy search in cache
         cached_results = bulk_cache.search_cards_in_cache(name, set_identifier)
         if cached_results:
             # Return the best match from cache
-            card_data = cached_results[0]
-            card_data['_source'] = 'cache'
-            return card_data
+            return self._annotate_match(cached_results[0], name, 'cache')
+        
+        # Tolerate typos against every cached name before going to the network
+        name_match = bulk_cache.get_name_matcher().match(name)
+        if name_match and name_match['confidence'] >= FUZZY_MATCH_MIN_CONFIDENCE:
+            card_data = bulk_cache.find_card_in_cache(name_match['name'], set_identifier, collector_number)
+            if not card_data:
+                matched_results = bulk_cache.search_cards_in_cache(name_match['name'], set_identifier)
+                card_data = matched_results[0] if matched_results else None
+            if card_data:
+                return self._annotate_match(card_data, name, 'cache')
         
         # Fallback to API if cache miss
         card_data = self._find_card_by_details(name, set_identifier, collector_number)
         if card_data:
-            card_data['_source'] = 'api'
-            return card_data
+            return self._annotate_match(card_data, name, 'api')
         
         return None
     
+    @staticmethod
+    def _annotate_match(card_data: Dict, name: str, source: str) -> Dict:
+        """Record where a card came from and how closely its name matches the one asked for"""
+        card_name = card_data.get('name', '')
+        if normalize_card_name(card_name) == normalize_card_name(name):
+            confidence = 1.0
+        else:
+            # Naming one face of a multi-faced card is as good as naming the card
+            confidence = max(CardNameMatcher.similarity(name, text) for text in [card_name] + card_name.split(' // '))
+        card_data['_source'] = source
+        card_data['_match_confidence'] = confidence
+        return card_data
+    
     def _normalize_set_identifier(self, set_identifier: str) -> str:
         """Convert full set names to 3-letter codes where possible"""
         # Common set name mappings for DeckBox format
@@ -1524,33 +4173,30 @@ class CollectionManager:
         Get collection statistics for all sets efficiently.
         Returns a dictionary mapping set codes to stats: {count, total, percentage}
         """
-        stats = {}
-        
-        # Group collection cards by set
-        for card in self.collection.values():
-            regular_qty = card.get('quantity', 0) or 0
-            foil_qty = card.get('foil_quantity', 0) or 0
-            
-            # Only count cards that are actually in collection (qty > 0)
-            if regular_qty > 0 or foil_qty > 0:
-                set_code = card['set'].lower()
-                if set_code not in stats:
-                    stats[set_code] = {'owned': 0}
-                stats[set_code]['owned'] += 1
-        
-        return stats
+        with self._lock:
+            self._sync()
+            # The set index only holds entries with a quantity, so its sizes are the owned counts
+            return {set_key: {'owned': len(entries)} for set_key, entries in self._set_index.items()}
     
     def clear_collection(self):
         """Clear the entire collection"""
-        self.collection = {}
+        with self._lock:
+            sequence = self.store.clear() if self.store is not None else None
+            self._unsaved.clear()
+            self._collection = CollectionEntries()
+            self._reset_totals()
+            self._version += 1
+            self._saved(sequence)
 
-# Global collection manager
-collection_manager = CollectionManager()
+# Global collection manager, loaded from the persistent store
+collection_manager = CollectionManager(CollectionStore())
+print(f"Loaded {len(collection_manager.collection)} collection entries from {COLLECTION_DB_PATH} "
+      f"in {collection_manager.load_seconds * 1000:.1f} ms")
 
 @app.route('/')
 def index():
     """Main page - show set selection"""
-    sets = ScryfallAPI.get_sets()
+    sets = set_registry.all_sets()
     cache_stats = bulk_cache.get_cache_stats()
     
     # Get collection statistics by set for display
@@ -1561,38 +4207,78 @@ def index():
 @app.route('/set/<set_code>')
 def set_view(set_code: str):
     """View cards in a specific set for collection entry"""
-    cards = ScryfallAPI.get_set_cards(set_code)
-    set_info = next((s for s in ScryfallAPI.get_sets() if s['code'] == set_code), None)
+    # The page depends only on the cached cards and the collection, so a
+    # revalidation is answered from the counters held in memory, before any read
+    cached_response = not_modified(make_etag(bulk_cache.known_generation(), collection_manager.etag_sequence()))
+    if cached_response:
+        return cached_response
+    
+    # The generation is read before the cards and the owned entries with their
+    # version, so the ETag never runs ahead of what the page embeds
+    generation = bulk_cache.generation
+    collection_version, set_entries = collection_manager.get_versioned_set_entries(set_code)
+    etag = make_etag(generation, collection_manager.sequence_at(collection_version))
+    
+    set_info = set_registry.get_by_code(set_code)
     
     if not set_info:
         return "Set not found", 404
     
+    # Only the first page and the count are read, so rendering costs the same for any set
+    # size; the grid pages in the rest from /api/set/<code>/cards
+    cached_before = bulk_cache.get_set_completion_stats(set_code)['cache_available']
+    first_page, total_cards = ScryfallAPI.get_set_cards_page(set_code, 0, SET_CARDS_PAGE_SIZE)
+    
     # Get cache statistics for this set
     cache_stats = bulk_cache.get_set_completion_stats(set_code)
     
-    # Count cache hits vs API calls
-    cache_hits = sum(1 for card in cards if card.get('_source') == 'cache')
-    api_calls = sum(1 for card in cards if card.get('_source') == 'api')
+    # A set is served from the cache whole, or fetched whole from the API once
+    cache_hits = total_cards if cached_before else 0
+    api_calls = total_cards - cache_hits
     
     performance_stats = {
         'cache_hits': cache_hits,
         'api_calls': api_calls,
-        'total_cards': len(cards),
-        'cache_hit_rate': (cache_hits / len(cards) * 100) if cards else 0
+        'total_cards': total_cards,
+        'cache_hit_rate': (cache_hits / total_cards * 100) if total_cards else 0
+    }
+    
+    owned = {
+        card_id: {
+            'regular': entry.get('quantity', 0) or 0,
+            'foil': entry.get('foil_quantity', 0) or 0,
+            'name': entry.get('name', '')
+        }
+        for card_id, entry in set_entries.items()
     }
     
-    return render_template('set_view.html', 
-                         cards=cards, 
-                         set_info=set_info,
-                         cache_stats=cache_stats,
-                         performance_stats=performance_stats,
-                         collection=collection_manager.collection)
+    return with_etag(render_template('set_view.html', 
+                                     total_cards=total_cards, 
+                                     cards_json=serialize_slim_cards(first_page), 
+                                     owned=owned,
+                                     page_size=SET_CARDS_PAGE_SIZE, 
+                                     max_page_size=SET_CARDS_MAX_PAGE_SIZE, 
+                                     set_info=set_info,
+                                     cache_stats=cache_stats,
+                                     performance_stats=performance_stats), etag)
 
 @app.route('/set/<set_code>/rapid')
 def set_rapid_view(set_code: str):
     """Rapid input mode for a specific set"""
+    # The page depends only on the cached cards and the collection, so a
+    # revalidation is answered from the counters held in memory, before any read
+    cached_response = not_modified(make_etag(bulk_cache.known_generation(), collection_manager.etag_sequence()))
+    if cached_response:
+        return cached_response
+    
+    # The generation is read before the cards and the owned entries with their
+    # version, so the ETag never runs ahead of what the page embeds
+    generation = bulk_cache.generation
+    collection_version, set_entries = collection_manager.get_versioned_set_entries(set_code)
+    etag = make_etag(generation, collection_manager.sequence_at(collection_version))
+    
     cards = ScryfallAPI.get_set_cards(set_code)
-    set_info = next((s for s in ScryfallAPI.get_sets() if s['code'] == set_code), None)
+    set_info = set_registry.get_by_code(set_code)
     
     if not set_info:
         return "Set not found", 404
@@ -1611,12 +4297,118 @@ def set_rapid_view(set_code: str):
         'cache_hit_rate': (cache_hits / len(cards) * 100) if cards else 0
     }
     
-    return render_template('rapid_view.html', 
-                         cards=cards, 
-                         set_info=set_info,
-                         cache_stats=cache_stats,
-                         performance_stats=performance_stats,
-                         collection=collection_manager.collection)
+    return with_etag(render_template('rapid_view.html', 
+                                     cards=cards, 
+                                     cards_json=set_cards_cache.get_serialized(
+                                         set_code, generation, cards, serialize_slim_cards
+                                     ), 
+                                     set_info=set_info,
+                                     cache_stats=cache_stats,
+                                     performance_stats=performance_stats,
+                                     # Only this set's owned entries are embedded in the page
+                                     collection=set_entries), etag)
+
+@app.route('/api/set/<set_code>/cards')
+def set_cards_page(set_code: str):
+    """API endpoint serving a page of a set's cards to the virtualized set view"""
+    sort = request.args.get('sort', 'number')
+    if sort not in SET_CARD_SORT_COLUMNS:
+        sort = 'number'
+    name_prefix = request.args.get('q', '').strip()
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', SET_CARDS_PAGE_SIZE, type=int), 1), SET_CARDS_MAX_PAGE_SIZE)
+    locate = request.args.get('locate')
+    
+    # Pages hold card data only, so they change only with the cache
+    cached_response = not_modified(make_etag(bulk_cache.known_generation()))
+    if cached_response:
+        return cached_response
+    
+    etag = make_etag(bulk_cache.generation)
+    cards, total = ScryfallAPI.get_set_cards_page(set_code, offset, limit, sort, name_prefix)
+    payload = {
+        'cards': [slim_card(card) for card in cards],
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'sort': sort,
+        'q': name_prefix
+    }
+    if locate:
+        payload['position'] = bulk_cache.get_set_card_position(set_code, locate, sort, name_prefix)
+    return with_etag(jsonify(payload), etag)
+
+@app.template_filter('image_proxy')
+def image_proxy_url(url: Optional[str]) -> Optional[str]:
+    """Template filter routing a card image URL through the local image cache"""
+    if url and image_cache.is_allowed(url):
+        return f"/api/image?url={urllib.parse.quote(url, safe='')}"
+    return url
+
+@app.context_processor
+def image_proxy_context() -> Dict:
+    """Expose the proxied image hosts so page scripts can route images through /api/image"""
+    return {'image_proxy_hosts': sorted(image_cache.allowed_hosts)}
+
+@app.route('/api/image')
+def image_proxy():
+    """Serve a card image from the local image cache, downloading it on first use"""
+    url = request.args.get('url', '')
+    if not image_cache.is_allowed(url):
+        return jsonify({'error': 'Image host not allowed'}), 400
+    
+    image = image_cache.fetch(url)
+    if image is None:
+        response = jsonify({'error': 'Image unavailable'})
+        response.status_code = 502
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    
+    data, content_type, content_hash = image
+    # The digest identifies the bytes, so it doubles as a strong ETag
+    response = Response(data, mimetype=content_type)
+    response.set_etag(content_hash)
+    response.headers['Cache-Control'] = f'public, max-age={IMAGE_CACHE_MAX_AGE}, immutable'
+    return response.make_conditional(request)
+
+@app.route('/api/images/prefetch/<set_code>', methods=['POST'])
+def prefetch_set_images(set_code: str):
+    """API endpoint to download a set's card thumbnails into the image cache in the background"""
+    urls = []
+    for card in ScryfallAPI.get_set_cards(set_code):
+        url = (card.get('image_uris') or {}).get('small')
+        if image_cache.is_allowed(url):
+            urls.append(url)
+    
+    # Progress is reported like imports and can be followed at /import_progress/<prefetch_id>
+    prefetch_id = generate_import_id()
+    update_import_progress(prefetch_id, {
+        'status': 'processing',
+        'current': 0,
+        'total': len(urls),
+        'message': f'Downloading {len(urls)} card images...'
+    })
+    
+    def run_prefetch():
+        def report(done, cached):
+            update_import_progress(prefetch_id, {
+                'status': 'processing',
+                'current': done,
+                'total': len(urls),
+                'message': f'Downloaded {done} of {len(urls)} card images'
+            })
+        cached = image_cache.prefetch(urls, report)
+        update_import_progress(prefetch_id, {
+            'status': 'complete',
+            'current': len(urls),
+            'total': len(urls),
+            'cached': cached,
+            'message': f'{cached} of {len(urls)} card images available offline'
+        })
+        print(f"Prefetched {cached} of {len(urls)} images for set {set_code}")
+    
+    threading.Thread(target=run_prefetch, daemon=True).start()
+    return jsonify({'status': 'started', 'prefetch_id': prefetch_id, 'total': len(urls)})
 
 @app.route('/api/add_card', methods=['POST'])
 def add_card():
@@ -1649,13 +4441,55 @@ def update_card_quantities():
     
     return jsonify({'status': 'success'})
 
+@app.route('/api/update_card_quantities/batch', methods=['POST'])
+def update_card_quantities_batch():
+    """API endpoint to set regular and foil quantities for many cards at once"""
+    data = request.get_json(silent=True)
+    raw_updates = data.get('updates') if isinstance(data, dict) else data
+    if not isinstance(raw_updates, list):
+        return jsonify({'error': 'Expected a list of updates'}), 400
+    if len(raw_updates) > COLLECTION_BATCH_MAX_UPDATES:
+        return jsonify({'error': f'At most {COLLECTION_BATCH_MAX_UPDATES} updates per batch'}), 400
+    
+    updates = []
+    for index, raw_update in enumerate(raw_updates):
+        try:
+            update = {
+                'card_id': str(raw_update['card_id']),
+                'regular': int(raw_update.get('regular', 0)),
+                'foil': int(raw_update.get('foil', 0)),
+                'card': raw_update.get('card')
+            }
+        except (TypeError, ValueError, KeyError, AttributeError):
+            return jsonify({'error': f'Invalid update at index {index}'}), 400
+        if update['regular'] < 0 or update['foil'] < 0:
+            return jsonify({'error': f'Negative quantity at index {index}'}), 400
+        if update['card'] is not None and not isinstance(update['card'], dict):
+            return jsonify({'error': f'Invalid card at index {index}'}), 400
+        updates.append(update)
+    
+    result = collection_manager.update_quantities_batch(updates)
+    return jsonify({'status': 'success', **result})
+
+@app.context_processor
+def collection_batch_context() -> Dict:
+    """Expose the batch size and save delay that page scripts use when saving quantities"""
+    return {'batch_max_updates': COLLECTION_BATCH_MAX_UPDATES, 'save_delay_ms': COLLECTION_SAVE_DELAY_MS}
+
 @app.route('/collection')
 def collection_view():
     """View current collection"""
-    summary = collection_manager.get_collection_summary()
-    return render_template('collection.html', 
-                         collection=collection_manager.collection,
-                         summary=summary)
+    cached_response = not_modified(make_etag(collection_manager.etag_sequence()))
+    if cached_response:
+        return cached_response
+    
+    # One locked read, so the entries, the summary and the ETag share a version
+    version, collection, summary = collection_manager.get_versioned_collection()
+    etag = make_etag(collection_manager.sequence_at(version))
+    
+    return with_etag(render_template('collection.html', 
+                                     collection=collection,
+                                     summary=summary), etag)
 
 @app.route('/export')
 def export_collection():
@@ -1830,14 +4664,26 @@ def import_progress_stream(import_id):
 @app.route('/api/cache/status')
 def cache_status():
     """API endpoint to get cache status and statistics"""
+    # Cache validity expires with time alone, so the tag also rolls over every window.
+    # The set list counters move with every set view and are left out of the tag,
+    # so a revalidated response shows them as of the last full response
+    window = int(time.time() // CACHE_STATUS_ETAG_WINDOW)
+    cached_response = not_modified(make_etag(bulk_cache.known_generation(), window))
+    if cached_response:
+        return cached_response
+    
+    etag = make_etag(bulk_cache.generation, window)
+    set_cards_stats = set_cards_cache.stats()
     stats = bulk_cache.get_cache_stats()
-    return jsonify({
+    return with_etag(jsonify({
         'cache_valid': stats['cache_valid'],
         'total_cards': stats['total_cards'],
         'total_sets': stats['total_sets'],
         'last_update': stats['last_update'],
-        'cache_size_mb': os.path.getsize(CACHE_DB_PATH) / (1024 * 1024) if os.path.exists(CACHE_DB_PATH) else 0
-    })
+        'cache_size_mb': os.path.getsize(CACHE_DB_PATH) / (1024 * 1024) if os.path.exists(CACHE_DB_PATH) else 0,
+        'set_cards_cache': set_cards_stats,
+        'collection_load_ms': round(collection_manager.load_seconds * 1000, 1)
+    }), etag)
 
 @app.route('/api/cache/set/<set_code>')
 def set_cache_status(set_code: str):
@@ -1860,6 +4706,13 @@ def refresh_cache():
             'message': 'Starting cache refresh...'
         })
         
+        # A delta refresh only rewrites cards whose content changed; force skips
+        # the unchanged-file check
+        delta = request.args.get('mode', 'full').lower() == 'delta'
+        force = request.args.get('force', '').lower() in ['1', 'true', 'yes']
+        # source=staged re-ingests the compressed file on disk without downloading
+        from_staged = request.args.get('source', '').lower() == 'staged'
+        
         # Create progress callback
         def progress_callback(progress_data):
             update_import_progress(refresh_id, progress_data)
@@ -1867,11 +4720,15 @@ def refresh_cache():
         # Start refresh in background thread
         def run_refresh():
             try:
-                success = bulk_cache.download_and_cache_bulk_data(progress_callback)
+                if from_staged:
+                    success = bulk_cache.ingest_staged_bulk_data(progress_callback, delta=delta)
+                else:
+                    success = bulk_cache.download_and_cache_bulk_data(progress_callback, delta=delta, force=force)
                 if success:
                     update_import_progress(refresh_id, {
                         'status': 'complete',
                         'message': 'Cache refresh completed successfully',
+                        'stats': bulk_cache.last_refresh_stats,
                         'current': 100,
                         'total': 100
                     })
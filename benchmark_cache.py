@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Benchmark script for the bulk cache
+
+Builds one cache per payload format from the same cards and reports the
+database size of each and how long a set takes to load with every card's full
+payload decoded, then compares per-lookup latency
+with a fresh connection per lookup against the pooled connections. By default
+the cards are synthetic; pass the path of an existing cache database to
+benchmark real data. Finally it times how long a restart takes to load a
+large collection back from the persistent collection store, and how long
+another worker takes to pick up a single edit:
+
+    python benchmark_cache.py [mtg_cache.db]
+
+The benchmark works in a scratch directory and never writes to the app's own
+databases.
+"""
+
+import os
+import time
+import shutil
+import atexit
+import sqlite3
+import argparse
+import tempfile
+
+# Importing app opens its default databases; keep them in a scratch directory
+# rather than creating mtg_cache.db and mtg_collection.db where the benchmark runs
+SCRATCH_DIR = tempfile.mkdtemp(prefix='mtg_benchmark_')
+atexit.register(shutil.rmtree, SCRATCH_DIR, True)
+os.environ['MTG_CACHE_DB'] = os.path.join(SCRATCH_DIR, 'mtg_cache.db')
+os.environ['MTG_COLLECTION_DB'] = os.path.join(SCRATCH_DIR, 'mtg_collection.db')
+
+from app import BulkDataCache, CACHE_PAYLOAD_FORMATS, decode_card_payload, CollectionManager, CollectionStore  # noqa: E402
+
+SYNTHETIC_SETS = 40
+SYNTHETIC_CARDS_PER_SET = 250
+SET_LOAD_ROUNDS = 5
+LOOKUP_COUNT = 5000
+COLLECTION_ENTRIES = 40000
+
+def make_synthetic_cards():
+    """Build Scryfall-shaped cards with realistic payload sizes"""
+    cards = []
+    for set_index in range(SYNTHETIC_SETS):
+        set_code = f's{set_index:02d}'
+        for number in range(1, SYNTHETIC_CARDS_PER_SET + 1):
+            card_id = f'{set_code}-{number}'
+            cards.append({
+                'object': 'card',
+                'id': card_id,
+                'oracle_id': f'oracle-{card_id}',
+                'name': f'Synthetic Card {set_index}-{number}',
+                'set': set_code,
+                'set_name': f'Synthetic Set {set_index}',
+                'set_type': 'expansion',
+                'released_at': '2020-01-01',
+                'collector_number': str(number),
+                'rarity': ('common', 'uncommon', 'rare', 'mythic')[number % 4],
+                'mana_cost': '{2}{U}{U}',
+                'type_line': 'Creature — Human Wizard',
+                'oracle_text': 'When this creature enters, draw a card. ' * 3,
+                'flavor_text': 'A line of flavor text that reads like the real thing.',
+                'colors': ['U'],
+                'legalities': {fmt: 'legal' for fmt in (
+                    'standard', 'pioneer', 'modern', 'legacy', 'vintage',
+                    'commander', 'pauper', 'historic', 'brawl', 'oathbreaker'
+                )},
+                'image_uris': {
+                    size: f'https://cards.scryfall.io/{size}/front/{card_id}.jpg'
+                    for size in ('small', 'normal', 'large', 'png', 'art_crop', 'border_crop')
+                },
+                'prices': {'usd': '0.25', 'usd_foil': '1.10', 'eur': '0.20', 'tix': '0.03'},
+                'purchase_uris': {
+                    'tcgplayer': f'https://example.com/tcgplayer/{card_id}',
+                    'cardmarket': f'https://example.com/cardmarket/{card_id}'
+                },
+                'artist': 'Synthetic Artist'
+            })
+    return cards
+
+def load_cards_from_database(db_path):
+    """Read every cached card out of an existing cache database"""
+    conn = sqlite3.connect(db_path)
+    try:
+        return [decode_card_payload(row[0]) for row in conn.execute('SELECT data_json FROM cards_cache')]
+    finally:
+        conn.close()
+
+def benchmark_format(cards, payload_format, work_dir):
+    """Build a cache in the given payload format and time full-payload set loads against it"""
+    db_path = os.path.join(work_dir, f'cache_{payload_format}.db')
+    cache = BulkDataCache(db_path=db_path, staging_dir=work_dir, payload_format=payload_format)
+    cache.cache_cards_batch(cards)
+    cache.close_connections()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('VACUUM')
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.close()
+    db_size = os.path.getsize(db_path)
+
+    # Set loads read only the projected columns; decoding every card's payload
+    # is what the stored format changes, so each card is expanded in full
+    set_codes = sorted({card['set'] for card in cards})
+    start_time = time.perf_counter()
+    for _ in range(SET_LOAD_ROUNDS):
+        for set_code in set_codes:
+            for card in cache.get_set_cards_from_cache(set_code):
+                card.to_dict()
+    set_load_ms = (time.perf_counter() - start_time) * 1000 / (SET_LOAD_ROUNDS * len(set_codes))
+
+    return db_size, set_load_ms
+
+def benchmark_lookups(cards, work_dir):
+    """Time card lookups with a connection per lookup and with pooled connections"""
+    cache = BulkDataCache(db_path=os.path.join(work_dir, 'cache_json.db'), staging_dir=work_dir)
+    lookups = [(card['name'], card['set'], card['collector_number']) for card in cards[:LOOKUP_COUNT]]
+
+    # The pre-pooling pattern: open, query and close a connection per lookup
+    start_time = time.perf_counter()
+    for name, set_code, collector_number in lookups:
+        conn = sqlite3.connect(cache.db_path)
+        conn.execute(
+            'SELECT data_json FROM cards_cache WHERE name = ? AND set_code = ? AND collector_number = ?',
+            (name, set_code, collector_number)
+        ).fetchone()
+        conn.close()
+    per_connection_us = (time.perf_counter() - start_time) * 1_000_000 / len(lookups)
+
+    start_time = time.perf_counter()
+    for name, set_code, collector_number in lookups:
+        cache.find_card_in_cache(name, set_code, collector_number)
+    pooled_us = (time.perf_counter() - start_time) * 1_000_000 / len(lookups)
+
+    cache.close_connections()
+    return per_connection_us, pooled_us
+
+def benchmark_collection_startup(work_dir):
+    """Time writing a large collection to the store, loading it on restart and syncing one edit"""
+    db_path = os.path.join(work_dir, 'collection.db')
+    entries = [
+        (f'card-{number}', {
+            'name': f'Synthetic Card {number}',
+            'set': f'S{number % SYNTHETIC_SETS:02d}',
+            'set_name': f'Synthetic Set {number % SYNTHETIC_SETS}',
+            'collector_number': str(number),
+            'quantity': 1 + number % 4,
+            'foil_quantity': number % 2,
+            'condition': 'Near Mint',
+            'language': 'English',
+            'rarity': 'common',
+            'image_url': f'https://cards.scryfall.io/small/front/card-{number}.jpg',
+            'price_usd_regular': '0.25',
+            'price_usd_foil': '1.10'
+        })
+        for number in range(COLLECTION_ENTRIES)
+    ]
+    store = CollectionStore(db_path)
+    start_time = time.perf_counter()
+    store.upsert_many(entries)
+    write_ms = (time.perf_counter() - start_time) * 1000
+    store.close()
+
+    # A restart: open the store and load every entry
+    start_time = time.perf_counter()
+    store = CollectionStore(db_path)
+    manager = CollectionManager(store)
+    ready_ms = (time.perf_counter() - start_time) * 1000
+    loaded = len(manager.collection)
+
+    # Another worker saves one edit; this manager reads back only that row
+    other_store = CollectionStore(db_path)
+    other_store.upsert('card-0', dict(entries[0][1], quantity=9))
+    start_time = time.perf_counter()
+    manager.version
+    sync_ms = (time.perf_counter() - start_time) * 1000
+    other_store.close()
+    store.close()
+    return write_ms, ready_ms, sync_ms, loaded
+
+def parse_args():
+    """Read the optional cache database to benchmark from the command line"""
+    parser = argparse.ArgumentParser(description='Benchmark payload formats, cache connections and the collection store.')
+    parser.add_argument('db_path', nargs='?', help='existing cache database to take cards from (default: synthetic cards)')
+    args = parser.parse_args()
+    if args.db_path and not os.path.isfile(args.db_path):
+        parser.error(f"{args.db_path} is not a file")
+    return parser, args
+
+def run_benchmark():
+    """Compare payload formats and connection handling on the same cards"""
+    parser, args = parse_args()
+    print("=== MTG Collection Tool - Bulk Cache Benchmark ===\n")
+
+    if args.db_path:
+        print(f"Loading cards from {args.db_path}...")
+        try:
+            cards = load_cards_from_database(args.db_path)
+        except sqlite3.DatabaseError as e:
+            parser.error(f"{args.db_path} is not a card cache database ({e})")
+    else:
+        cards = make_synthetic_cards()
+    print(f"Benchmarking {len(cards)} cards across {len({card['set'] for card in cards})} sets")
+    print("=" * 60)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for payload_format in CACHE_PAYLOAD_FORMATS:
+            results[payload_format] = benchmark_format(cards, payload_format, work_dir)
+        per_connection_us, pooled_us = benchmark_lookups(cards, work_dir)
+        collection_write_ms, collection_ready_ms, collection_sync_ms, collection_size = benchmark_collection_startup(work_dir)
+
+    print(f"\n{'Format':<10}{'DB size':>14}{'Full set load':>18}")
+    for payload_format, (db_size, set_load_ms) in results.items():
+        print(f"{payload_format:<10}{db_size / (1024 * 1024):>11.1f} MB{set_load_ms:>15.2f} ms")
+
+    baseline_size, baseline_ms = results['json']
+    for payload_format, (db_size, set_load_ms) in results.items():
+        if payload_format != 'json':
+            print(f"\n{payload_format}: {db_size / baseline_size:.0%} of plain size, "
+                  f"{set_load_ms / baseline_ms:.2f}x plain set-load time")
+
+    print(f"\nCard lookups ({min(len(cards), LOOKUP_COUNT)} by name, set and number):")
+    print(f"  Connection per lookup: {per_connection_us:8.1f} µs/lookup")
+    print(f"  Pooled connections:    {pooled_us:8.1f} µs/lookup ({per_connection_us / pooled_us:.1f}x faster)")
+
+    print(f"\nCollection store ({collection_size} entries):")
+    print(f"  Write all entries:  {collection_write_ms:8.1f} ms")
+    print(f"  Restart to ready:   {collection_ready_ms:8.1f} ms")
+    print(f"  Sync another worker's edit: {collection_sync_ms:8.2f} ms")
+
+    print("\n=== Benchmark Complete ===")
+    print("Switch formats with BulkDataCache.migrate_payload_format() or CACHE_PAYLOAD_FORMAT in app.py")
+
+if __name__ == "__main__":
+    run_benchmark()
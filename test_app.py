@@ -3,9 +3,23 @@ from unittest.mock import patch, MagicMock, mock_open
 import json
 import io
 import csv
+import gzip
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import requests
 from flask import Flask
-from app import app, ScryfallAPI, CollectionManager, collection_manager, sanitize_card_name, BulkDataCache
+
+# Keep the suite's collection writes out of the collection store in the working directory
+os.environ['MTG_COLLECTION_DB'] = ':memory:'
+
+from app import app, ScryfallAPI, CollectionManager, CollectionStore, CollectionEntries, COLLECTION_BATCH_MAX_UPDATES, COLLECTION_SNAPSHOT_SHARDS, collection_manager, sanitize_card_name, BulkDataCache, iter_json_array, CARD_CACHE_INDEXES, CardNameMatcher, edit_distance, collector_number_sort_key, CARD_PROJECTION_SELECT, SetCardsLRU, set_cards_cache, SET_CARD_SORT_COLUMNS, SetRegistry, set_registry, serialize_slim_cards, SET_CARDS_MAX_PAGE_SIZE, ImageCache, IMAGE_CACHE_TOUCH_INTERVAL, get_import_progress
 
 
 class TestCardNameSanitization(unittest.TestCase):
@@ -52,6 +66,9 @@ class TestCardNameSanitization(unittest.TestCase):
 class TestScryfallAPI(unittest.TestCase):
     """Test cases for ScryfallAPI class"""
 
+    def setUp(self):
+        set_cards_cache.clear()
+
     @patch('app.requests.get')
     def test_get_bulk_data_info_uses_scryfall_headers(self, mock_get):
         """Test that bulk data requests use the headers required by Scryfall."""
@@ -186,6 +203,1229 @@ class TestScryfallAPI(unittest.TestCase):
             
             # Verify cache was checked first
             mock_cache.get_set_cards_from_cache.assert_called_once_with('testset')
+    
+    @patch('app.ScryfallAPI.get_set_cards')
+    @patch('app.bulk_cache')
+    def test_get_set_cards_page_falls_back_to_full_set_fetch(self, mock_cache, mock_get_set_cards):
+        """Sets missing from the cache are fetched whole, then sorted, filtered and sliced"""
+        mock_cache.get_set_cards_page.return_value = ([], 0)
+        mock_cache.get_set_completion_stats.return_value = {'cache_available': False}
+        mock_get_set_cards.return_value = [
+            make_bulk_card('card1', 'Shock', collector_number='1'),
+            make_bulk_card('card2', 'Abrade', collector_number='2'),
+            make_bulk_card('card3', 'Shatter', collector_number='3')
+        ]
+        
+        cards, total = ScryfallAPI.get_set_cards_page('neo', offset=0, limit=1, sort='name', name_prefix='sh')
+        
+        self.assertEqual(([card['name'] for card in cards], total), (['Shatter'], 2))
+    
+    @patch('app.bulk_cache')
+    def test_get_set_cards_reuses_list_until_generation_changes(self, mock_cache):
+        """Repeat visits are served from memory until the bulk cache generation moves on"""
+        mock_cache.generation = 1
+        mock_cache.get_set_cards_from_cache.side_effect = lambda code: [make_bulk_card('card1', 'Lightning Bolt')]
+        
+        first = ScryfallAPI.get_set_cards('NEO')
+        self.assertIs(ScryfallAPI.get_set_cards('neo'), first)
+        self.assertEqual(mock_cache.get_set_cards_from_cache.call_count, 1)
+        
+        mock_cache.generation = 2
+        self.assertIsNot(ScryfallAPI.get_set_cards('neo'), first)
+        self.assertEqual(mock_cache.get_set_cards_from_cache.call_count, 2)
+
+
+def make_bulk_card(card_id, name, set_code='neo', collector_number='1', **extra):
+    """Build a minimal Scryfall-style card dict for bulk cache tests"""
+    card = {
+        'id': card_id,
+        'name': name,
+        'set': set_code,
+        'set_name': 'Kamigawa: Neon Dynasty',
+        'collector_number': collector_number,
+        'rarity': 'common',
+        'set_type': 'expansion',
+        'released_at': '2022-02-18',
+        'image_uris': {'small': f'http://example.com/{card_id}.jpg'},
+        'prices': {'usd': '0.10', 'usd_foil': '0.50'}
+    }
+    card.update(extra)
+    return card
+
+
+class StandInHTTPServer:
+    """Local HTTP server standing in for remote hosts such as Scryfall in tests.
+    
+    Each entry in `files` maps a request path to a dict with a `body` (bytes) and
+    optional `etag`, `last_modified`, `content_type` and `gzip` keys, or to a
+    dict with just a `location` to answer with a 302 redirect. Conditional
+    requests are answered with 304, byte ranges with 206, and every request is
+    recorded in `requests`.
+    """
+    
+    def __init__(self):
+        self.files = {}
+        self.requests = []
+        stand_in = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stand_in.requests.append((self.path, dict(self.headers)))
+                entry = stand_in.files.get(self.path)
+                if entry is None:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if 'location' in entry:
+                    self.send_response(302)
+                    self.send_header('Location', entry['location'])
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                
+                etag = entry.get('etag')
+                last_modified = entry.get('last_modified')
+                if (etag and self.headers.get('If-None-Match') == etag) or (
+                        not self.headers.get('If-None-Match') and last_modified
+                        and self.headers.get('If-Modified-Since') == last_modified):
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                
+                body = entry['body']
+                if entry.get('gzip') and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, mtime=0)
+                
+                status = 200
+                range_header = self.headers.get('Range')
+                if range_header and self.headers.get('If-Range') in (etag, last_modified):
+                    start = int(range_header.split('=')[1].rstrip('-'))
+                    if start >= len(body):
+                        self.send_response(416)
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    status, body = 206, body[start:]
+                
+                self.send_response(status)
+                self.send_header('Content-Type', entry.get('content_type', 'application/json'))
+                self.send_header('Content-Length', str(len(body)))
+                if entry.get('gzip') and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    self.send_header('Content-Encoding', 'gzip')
+                if etag:
+                    self.send_header('ETag', etag)
+                if last_modified:
+                    self.send_header('Last-Modified', last_modified)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def requests_for(self, path):
+        """Return the recorded request headers for a path"""
+        return [headers for request_path, headers in self.requests if request_path == path]
+    
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestImageCache(unittest.TestCase):
+    """Test cases for the local card image cache and proxy, against a stand-in image server"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.server = StandInHTTPServer()
+        self.addCleanup(self.server.close)
+        for name in ('bolt', 'shock', 'spike'):
+            self.server.files[f'/small/{name}.jpg'] = {'body': name.encode() * 100, 'content_type': 'image/jpeg'}
+        # A reprint served from a second URL with identical bytes
+        self.server.files['/small/bolt-reprint.jpg'] = self.server.files['/small/bolt.jpg']
+        self.server.files['/page.html'] = {'body': b'<html></html>', 'content_type': 'text/html'}
+        self.image_cache = ImageCache(
+            cache_dir=os.path.join(self.temp_dir.name, 'images'),
+            max_bytes=1000,
+            allowed_hosts=[urllib.parse.urlparse(self.server.url).netloc]
+        )
+    
+    def test_fetches_once_and_stores_identical_images_once(self):
+        """Images are downloaded on the first request and kept under their content digest"""
+        first = self.image_cache.fetch(f'{self.server.url}/small/bolt.jpg')
+        again = self.image_cache.fetch(f'{self.server.url}/small/bolt.jpg')
+        reprint = self.image_cache.fetch(f'{self.server.url}/small/bolt-reprint.jpg')
+        
+        self.assertEqual(first, again)
+        self.assertEqual((first[0], first[1]), (b'bolt' * 100, 'image/jpeg'))
+        self.assertEqual(reprint[2], first[2])
+        self.assertEqual(len(self.server.requests_for('/small/bolt.jpg')), 1)
+        self.assertEqual(self.image_cache.total_bytes, 400)
+        
+        self.assertIsNone(self.image_cache.fetch(f'{self.server.url}/page.html'))
+        self.assertIsNone(self.image_cache.fetch(f'{self.server.url}/small/missing.jpg'))
+        self.assertFalse(self.image_cache.is_allowed('https://example.com/small/bolt.jpg'))
+    
+    def test_redirects_are_checked_and_large_images_are_not_read_in_full(self):
+        """Redirects are followed only to allowed hosts, and downloads stop at the size cap"""
+        self.server.files['/small/moved.jpg'] = {'location': '/small/bolt.jpg'}
+        self.server.files['/small/away.jpg'] = {'location': 'http://169.254.169.254/latest/meta-data'}
+        self.server.files['/small/loop.jpg'] = {'location': '/small/loop.jpg'}
+        self.server.files['/small/huge.jpg'] = {'body': b'x' * 5000, 'content_type': 'image/jpeg'}
+        
+        moved = self.image_cache.fetch(f'{self.server.url}/small/moved.jpg')
+        self.assertEqual(moved[0], b'bolt' * 100)
+        self.assertIsNone(self.image_cache.fetch(f'{self.server.url}/small/away.jpg'))
+        self.assertIsNone(self.image_cache.fetch(f'{self.server.url}/small/loop.jpg'))
+        self.assertEqual(len(self.server.requests_for('/small/loop.jpg')), 4)
+        
+        chunks_read = []
+        real_iter_content = requests.models.Response.iter_content
+        
+        def counting_iter_content(response, *args, **kwargs):
+            for chunk in real_iter_content(response, *args, **kwargs):
+                chunks_read.append(len(chunk))
+                yield chunk
+        
+        with patch('app.IMAGE_MAX_BYTES', 1000), patch('app.IMAGE_STREAM_CHUNK_SIZE', 100), \
+             patch.object(requests.models.Response, 'iter_content', counting_iter_content):
+            self.assertIsNone(self.image_cache.fetch(f'{self.server.url}/small/huge.jpg'))
+        self.assertEqual(sum(chunks_read), 1100)
+        self.assertIsNone(self.image_cache.get(f'{self.server.url}/small/huge.jpg'))
+    
+    def test_blob_reads_happen_outside_the_index_lock(self):
+        """Serving a cached image holds the lock only for the index lookup"""
+        url = f'{self.server.url}/small/bolt.jpg'
+        self.image_cache.fetch(url)
+        lock_held_during_read = []
+        real_open = open
+        
+        def tracking_open(path, *args, **kwargs):
+            if path.startswith(self.image_cache.blob_dir):
+                lock_held_during_read.append(self.image_cache._lock.locked())
+            return real_open(path, *args, **kwargs)
+        
+        with patch('builtins.open', side_effect=tracking_open):
+            self.assertEqual(self.image_cache.get(url)[0], b'bolt' * 100)
+        self.assertEqual(lock_held_during_read, [False])
+        
+        # A blob that disappears after the lookup turns the hit into a miss
+        hits, misses = self.image_cache.hits, self.image_cache.misses
+        os.remove(self.image_cache._blob_path(self.image_cache.get(url)[2]))
+        self.assertIsNone(self.image_cache.get(url))
+        self.assertEqual((self.image_cache.hits, self.image_cache.misses), (hits + 1, misses + 1))
+    
+    def test_evicts_least_recently_served_images_over_the_size_cap(self):
+        """Going over max_bytes drops the least recently served URL and its blob"""
+        self.image_cache.fetch(f'{self.server.url}/small/bolt.jpg')
+        self.image_cache.fetch(f'{self.server.url}/small/shock.jpg')
+        with patch('app.time.time', return_value=time.time() + IMAGE_CACHE_TOUCH_INTERVAL + 1):
+            self.image_cache.fetch(f'{self.server.url}/small/bolt.jpg')
+            self.image_cache.fetch(f'{self.server.url}/small/spike.jpg')
+        
+        self.assertEqual(self.image_cache.stats()['evictions'], 1)
+        self.assertLessEqual(self.image_cache.total_bytes, 1000)
+        self.assertIsNotNone(self.image_cache.get(f'{self.server.url}/small/bolt.jpg'))
+        self.assertIsNone(self.image_cache.get(f'{self.server.url}/small/shock.jpg'))
+        blobs = [name for _, _, names in os.walk(self.image_cache.blob_dir) for name in names]
+        self.assertEqual(len(blobs), 2)
+    
+    def test_proxy_route_serves_cached_images_with_long_lived_headers(self):
+        """The proxy answers from disk once cached, even with the image server gone"""
+        url = f'{self.server.url}/small/bolt.jpg'
+        card = make_bulk_card('card1', 'Lightning Bolt', image_uris={'small': url})
+        with patch('app.image_cache', self.image_cache):
+            client = app.test_client()
+            response = client.get('/api/image', query_string={'url': url})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.data, b'bolt' * 100)
+            self.assertEqual(response.mimetype, 'image/jpeg')
+            self.assertIn('immutable', response.headers['Cache-Control'])
+            
+            self.server.close()
+            cached = client.get('/api/image', query_string={'url': url},
+                                headers={'If-None-Match': response.headers['ETag']})
+            self.assertEqual(cached.status_code, 304)
+            self.assertEqual(client.get('/api/image', query_string={'url': url}).data, b'bolt' * 100)
+            
+            self.assertEqual(client.get('/api/image', query_string={'url': 'http://169.254.169.254/'}).status_code, 400)
+            self.assertEqual(client.get('/api/image', query_string={'url': f'{self.server.url}/small/shock.jpg'}).status_code, 502)
+            self.assertEqual(app.jinja_env.filters['image_proxy'](url), f"/api/image?url={urllib.parse.quote(url, safe='')}")
+            self.assertEqual(app.jinja_env.filters['image_proxy']('https://example.com/a.jpg'), 'https://example.com/a.jpg')
+    
+    def test_prefetch_downloads_a_sets_thumbnails_in_the_background(self):
+        """Prefetching a set caches every thumbnail and reports progress when done"""
+        cards = [
+            make_bulk_card(f'card{n}', name, collector_number=str(n),
+                           image_uris={'small': f'{self.server.url}/small/{name.lower()}.jpg'})
+            for n, name in enumerate(('Bolt', 'Shock'), start=1)
+        ]
+        with patch('app.image_cache', self.image_cache), patch('app.ScryfallAPI.get_set_cards', return_value=cards):
+            response = app.test_client().post('/api/images/prefetch/neo')
+            prefetch_id = response.get_json()['prefetch_id']
+            self.assertEqual(response.get_json()['total'], 2)
+            
+            deadline = time.time() + 5
+            while get_import_progress(prefetch_id).get('status') != 'complete' and time.time() < deadline:
+                time.sleep(0.01)
+        
+        self.assertEqual(get_import_progress(prefetch_id)['cached'], 2)
+        self.assertIsNotNone(self.image_cache.get(f'{self.server.url}/small/shock.jpg'))
+
+
+class TestSetCardsLRU(unittest.TestCase):
+    """Test cases for the in-memory set card list cache"""
+    
+    def test_counts_hits_misses_and_generation_invalidation(self):
+        """Lookups hit only at the generation an entry was cached at"""
+        lru = SetCardsLRU()
+        cards = [make_bulk_card('card1', 'Lightning Bolt')]
+        
+        self.assertIsNone(lru.get('neo', 1))
+        lru.put('NEO', 1, cards)
+        self.assertIs(lru.get('neo', 1), cards)
+        self.assertIsNone(lru.get('neo', 2))
+        
+        stats = lru.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['sets'], stats['bytes']), (1, 2, 0, 0))
+    
+    def test_evicts_least_recently_used_sets_by_size(self):
+        """Sets are evicted oldest use first once the size budget is exceeded"""
+        sets = {code: [make_bulk_card(f'{code}{n}', f'Card {n}', set_code=code) for n in range(5)]
+                for code in ('aaa', 'bbb', 'ccc')}
+        lru = SetCardsLRU(max_bytes=SetCardsLRU.estimate_size(sets['aaa']) * 2)
+        
+        lru.put('aaa', 1, sets['aaa'])
+        lru.put('bbb', 1, sets['bbb'])
+        lru.get('aaa', 1)
+        lru.put('ccc', 1, sets['ccc'])
+        
+        self.assertIsNotNone(lru.get('aaa', 1))
+        self.assertIsNone(lru.get('bbb', 1))
+        self.assertIsNotNone(lru.get('ccc', 1))
+        self.assertEqual(lru.stats()['evictions'], 1)
+        self.assertLessEqual(lru.current_bytes, lru.max_bytes)
+        
+        # A list bigger than the whole budget is never cached
+        lru.put('huge', 1, sets['aaa'] + sets['bbb'] + sets['ccc'])
+        self.assertIsNone(lru.get('huge', 1))
+    
+    def test_serialized_cards_are_kept_with_their_entry(self):
+        """The serialized page payload is built once per cached list and counted in its size"""
+        lru = SetCardsLRU()
+        cards = [make_bulk_card('card1', 'Lightning Bolt', oracle_text='Deals 3 damage.')]
+        serialize = MagicMock(side_effect=serialize_slim_cards)
+        lru.put('neo', 1, cards)
+        size = lru.current_bytes
+        
+        first = lru.get_serialized('neo', 1, cards, serialize)
+        self.assertIs(lru.get_serialized('neo', 1, cards, serialize), first)
+        self.assertEqual(serialize.call_count, 1)
+        self.assertGreater(lru.current_bytes, size)
+        self.assertNotIn('oracle_text', json.loads(first)[0])
+        
+        # Lists that are not the cached entry, e.g. API results, are serialized each time
+        lru.get_serialized('neo', 1, list(cards), serialize)
+        lru.get_serialized('neo', 2, cards, serialize)
+        self.assertEqual(serialize.call_count, 3)
+
+
+class TestSetRegistry(unittest.TestCase):
+    """Test cases for the indexed set metadata registry"""
+    
+    SETS = [
+        {'code': 'neo', 'name': 'Kamigawa: Neon Dynasty', 'set_type': 'expansion', 'released_at': '2022-02-18'},
+        {'code': 'lea', 'name': 'Limited Edition Alpha', 'set_type': 'core', 'released_at': '1993-08-05'}
+    ]
+    
+    @patch('app.bulk_cache')
+    @patch('app.ScryfallAPI.get_sets')
+    def test_loads_once_and_reloads_on_generation_or_ttl(self, mock_get_sets, mock_cache):
+        """Lookups share one load until the cache generation changes or the TTL expires"""
+        mock_cache.generation = 1
+        mock_get_sets.return_value = self.SETS
+        registry = SetRegistry(ttl=60)
+        
+        self.assertEqual(registry.get_by_code('NEO')['name'], 'Kamigawa: Neon Dynasty')
+        self.assertEqual(registry.get_by_name('limited edition alpha')['code'], 'lea')
+        self.assertIsNone(registry.get_by_code('zzz'))
+        self.assertEqual(registry.all_sets(), self.SETS)
+        self.assertEqual(mock_get_sets.call_count, 1)
+        
+        mock_cache.generation = 2
+        registry.get_by_code('neo')
+        self.assertEqual(mock_get_sets.call_count, 2)
+        
+        with patch('app.time.monotonic', return_value=time.monotonic() + 61):
+            registry.get_by_code('neo')
+        self.assertEqual(mock_get_sets.call_count, 3)
+    
+    @patch('app.bulk_cache')
+    @patch('app.ScryfallAPI.get_sets')
+    def test_empty_set_list_is_retried(self, mock_get_sets, mock_cache):
+        """An empty result, e.g. while offline, is not kept for the whole TTL"""
+        mock_cache.generation = 1
+        mock_get_sets.return_value = []
+        registry = SetRegistry()
+        
+        self.assertIsNone(registry.get_by_code('neo'))
+        mock_get_sets.return_value = self.SETS
+        self.assertIsNotNone(registry.get_by_code('neo'))
+        self.assertEqual(mock_get_sets.call_count, 2)
+
+
+class TestBulkDataCacheIngest(unittest.TestCase):
+    """Test cases for streaming bulk data ingest into the card cache"""
+    
+    def setUp(self):
+        """Create a throwaway cache database"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache = BulkDataCache(
+            db_path=os.path.join(self.temp_dir.name, 'cache.db'),
+            staging_dir=os.path.join(self.temp_dir.name, 'staging')
+        )
+        self.cards = [
+            make_bulk_card('card1', 'Lightning Bolt', collector_number='1'),
+            make_bulk_card('card2', 'Counterspell \u2014 Æther', collector_number='2'),
+            make_bulk_card('card3', 'Black Lotus', set_code='lea', collector_number='232')
+        ]
+    
+    def tearDown(self):
+        self.cache.close_connections()
+        self.temp_dir.cleanup()
+    
+    def _mock_bulk_responses(self, mock_get, payload: bytes, chunk_size: int = 7):
+        """Serve bulk-data info and a chunked download from mocked requests.get"""
+        info_response = MagicMock()
+        info_response.raise_for_status.return_value = None
+        info_response.json.return_value = {'data': [{
+            'type': 'default_cards',
+            'download_uri': 'http://example.com/default-cards.json',
+            'updated_at': '2024-01-01T10:00:00.000+00:00',
+            'size': len(payload)
+        }]}
+        
+        download_response = MagicMock()
+        download_response.status_code = 200
+        download_response.headers = {}
+        download_response.raise_for_status.return_value = None
+        download_response.raw.stream.side_effect = lambda amt=None, decode_content=None: (
+            payload[i:i + chunk_size] for i in range(0, len(payload), chunk_size)
+        )
+        
+        sets_response = MagicMock()
+        sets_response.raise_for_status.return_value = None
+        sets_response.json.return_value = {'data': [{
+            'code': 'neo',
+            'name': 'Kamigawa: Neon Dynasty',
+            'set_type': 'expansion',
+            'released_at': '2022-02-18',
+            'icon_svg_uri': 'https://svgs.scryfall.io/sets/neo.svg'
+        }]}
+        
+        mock_get.side_effect = [info_response, download_response, sets_response]
+    
+    def test_get_cards_by_ids(self):
+        """Test looking up several cached cards by id at once"""
+        self.cache.cache_cards_batch(self.cards)
+        cards = self.cache.get_cards_by_ids(['card3', 'card1', 'missing'])
+        self.assertEqual(sorted(cards), ['card1', 'card3'])
+        self.assertEqual((cards['card3']['name'], cards['card3']['set_name']), ('Black Lotus', 'Kamigawa: Neon Dynasty'))
+        self.assertEqual(self.cache.get_cards_by_ids([]), {})
+    
+    def test_iter_json_array_handles_split_chunks(self):
+        """Elements split across chunk boundaries are decoded intact"""
+        document = json.dumps(self.cards)
+        chunks = [document[i:i + 5] for i in range(0, len(document), 5)]
+        
+        self.assertEqual(list(iter_json_array(chunks)), self.cards)
+        self.assertEqual(list(iter_json_array(['  [ ', ' ]'])), [])
+    
+    def test_iter_json_array_rejects_truncated_input(self):
+        """A truncated or non-array document raises ValueError"""
+        with self.assertRaises(ValueError):
+            list(iter_json_array(['[{"id": "a"}, {"id": ']))
+        with self.assertRaises(ValueError):
+            list(iter_json_array(['{"id": "a"}']))
+    
+    @patch('app.requests.get')
+    def test_download_streams_cards_into_cache(self, mock_get):
+        """Bulk data is parsed from the stream and written in batches"""
+        self._mock_bulk_responses(mock_get, json.dumps(self.cards, ensure_ascii=False).encode('utf-8'))
+        progress_updates = []
+        
+        with patch('app.BULK_INGEST_BATCH_SIZE', 2):
+            self.assertTrue(self.cache.download_and_cache_bulk_data(progress_updates.append))
+        
+        self.assertEqual(self.cache.get_cache_stats()['total_cards'], 3)
+        self.assertEqual(self.cache.find_card_in_cache('Counterspell \u2014 Æther', 'neo', '2')['id'], 'card2')
+        self.assertTrue(mock_get.call_args_list[1].kwargs['stream'])
+        
+        self.assertEqual(self.cache.last_refresh_stats['total_cards'], 3)
+        self.assertIn('peak_rss_mb', self.cache.last_refresh_stats)
+        self.assertEqual(progress_updates[-1]['status'], 'complete')
+        self.assertTrue(any(update['status'] == 'caching' for update in progress_updates))
+    
+    @patch('app.requests.get')
+    def test_download_reports_phase_timings_and_rebuilds_indexes(self, mock_get):
+        """The bulk loader times each phase and leaves every secondary index in place"""
+        self._mock_bulk_responses(mock_get, json.dumps(self.cards).encode('utf-8'))
+        
+        self.assertTrue(self.cache.download_and_cache_bulk_data())
+        
+        timings = self.cache.last_refresh_stats['timings']
+        self.assertEqual(set(timings), {'download', 'parse', 'insert', 'index'})
+        self.assertTrue(all(seconds >= 0 for seconds in timings.values()))
+        
+        conn = sqlite3.connect(self.cache.db_path)
+        index_names = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'cards_cache'"
+        )}
+        conn.close()
+        self.assertTrue(set(CARD_CACHE_INDEXES).issubset(index_names))
+    
+    @patch('app.requests.get')
+    def test_refresh_keeps_old_generation_visible_until_swap(self, mock_get):
+        """Readers see the previous cache contents while a refresh is loading"""
+        self.cache.cache_cards_batch([make_bulk_card('old-card', 'Old Card', collector_number='9')])
+        self._mock_bulk_responses(mock_get, json.dumps(self.cards).encode('utf-8'))
+        visible_during_load = []
+        
+        def progress_callback(progress):
+            if progress['status'] == 'caching':
+                visible_during_load.append((
+                    self.cache.find_card_in_cache('Old Card', 'neo', '9') is not None,
+                    self.cache.find_card_in_cache('Lightning Bolt', 'neo', '1') is not None
+                ))
+        
+        with patch('app.BULK_INGEST_BATCH_SIZE', 1):
+            self.assertTrue(self.cache.download_and_cache_bulk_data(progress_callback))
+        
+        self.assertTrue(visible_during_load)
+        self.assertTrue(all(old and not new for old, new in visible_during_load))
+        self.assertIsNone(self.cache.find_card_in_cache('Old Card', 'neo', '9'))
+        self.assertIsNotNone(self.cache.find_card_in_cache('Lightning Bolt', 'neo', '1'))
+    
+    @patch('app.requests.get')
+    def test_failed_refresh_leaves_old_data_untouched(self, mock_get):
+        """A refresh that fails mid-stream keeps the previous cache and drops the shadow table"""
+        self.cache.cache_cards_batch([make_bulk_card('old-card', 'Old Card', collector_number='9')])
+        truncated = json.dumps(self.cards).encode('utf-8')[:-40]
+        self._mock_bulk_responses(mock_get, truncated)
+        
+        self.assertFalse(self.cache.download_and_cache_bulk_data())
+        
+        self.assertIsNotNone(self.cache.find_card_in_cache('Old Card', 'neo', '9'))
+        self.assertEqual(self.cache.get_cache_stats()['total_cards'], 1)
+        conn = sqlite3.connect(self.cache.db_path)
+        shadow = conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'cards_cache_shadow'"
+        ).fetchone()
+        conn.close()
+        self.assertIsNone(shadow)
+    
+    @patch('app.requests.get')
+    def test_delta_refresh_only_writes_changed_cards(self, mock_get):
+        """A delta refresh counts and applies inserts, updates, unchanged rows and deletes"""
+        self.cache.cache_cards_batch(self.cards + [make_bulk_card('gone', 'Vanished Card', collector_number='99')])
+        
+        repriced = dict(self.cards[0], prices={'usd': '2.00', 'usd_foil': '4.00'})
+        new_card = make_bulk_card('card4', 'Brainstorm', collector_number='4')
+        payload = json.dumps([repriced, self.cards[1], self.cards[2], new_card]).encode('utf-8')
+        self._mock_bulk_responses(mock_get, payload)
+        
+        self.assertTrue(self.cache.download_and_cache_bulk_data(delta=True))
+        
+        stats = self.cache.last_refresh_stats
+        self.assertEqual(stats['mode'], 'delta')
+        self.assertEqual(
+            (stats['inserted'], stats['updated'], stats['unchanged'], stats['deleted']),
+            (1, 1, 2, 1)
+        )
+        self.assertEqual(self.cache.find_card_in_cache('Lightning Bolt', 'neo', '1')['prices']['usd'], '2.00')
+        self.assertIsNotNone(self.cache.find_card_in_cache('Brainstorm', 'neo', '4'))
+        self.assertIsNone(self.cache.find_card_in_cache('Vanished Card', 'neo', '99'))
+    
+    @patch('app.requests.get')
+    def test_delta_refresh_stages_changes_before_taking_the_write_lock(self, mock_get):
+        """Other writers get in while a delta refresh compares the file, and readers never see half of it"""
+        self.cache.cache_cards_batch(self.cards)
+        changed = [dict(card, prices={'usd': '9.00', 'usd_foil': None}) for card in self.cards]
+        self._mock_bulk_responses(mock_get, json.dumps(changed).encode('utf-8'))
+        writer_got_lock = []
+        old_price_visible = []
+        
+        def progress_callback(progress):
+            if progress['status'] == 'caching':
+                other = sqlite3.connect(self.cache.db_path, timeout=0)
+                try:
+                    other.execute('BEGIN IMMEDIATE')
+                    other.rollback()
+                    writer_got_lock.append(True)
+                except sqlite3.OperationalError:
+                    writer_got_lock.append(False)
+                finally:
+                    other.close()
+                card = self.cache.find_card_in_cache('Lightning Bolt', 'neo', '1')
+                old_price_visible.append(card['prices']['usd'] == self.cards[0]['prices']['usd'])
+        
+        with patch('app.BULK_INGEST_BATCH_SIZE', 1):
+            self.assertTrue(self.cache.download_and_cache_bulk_data(progress_callback, delta=True))
+        
+        self.assertEqual(len(writer_got_lock), len(self.cards))
+        self.assertTrue(all(writer_got_lock))
+        self.assertTrue(all(old_price_visible))
+        self.assertEqual(self.cache.last_refresh_stats['updated'], len(self.cards))
+        self.assertEqual(self.cache.find_card_in_cache('Lightning Bolt', 'neo', '1')['prices']['usd'], '9.00')
+    
+    @patch('app.requests.get')
+    def test_failed_delta_refresh_applies_nothing(self, mock_get):
+        """A delta refresh that fails mid-stream leaves every cached card as it was"""
+        self.cache.cache_cards_batch(self.cards)
+        generation = self.cache.generation
+        changed = [dict(card, prices={'usd': '9.00', 'usd_foil': None}) for card in self.cards]
+        self._mock_bulk_responses(mock_get, json.dumps(changed).encode('utf-8')[:-40])
+        
+        with patch('app.BULK_INGEST_BATCH_SIZE', 1):
+            self.assertFalse(self.cache.download_and_cache_bulk_data(delta=True))
+        
+        self.assertEqual(self.cache.find_card_in_cache('Lightning Bolt', 'neo', '1')['prices']['usd'],
+                         self.cards[0]['prices']['usd'])
+        self.assertEqual(self.cache.generation, generation)
+    
+    def _serve_bulk_file(self, server, cards, updated_at, etag='"v1"'):
+        """Publish bulk-data info and a bulk file on the stand-in server"""
+        payload = json.dumps(cards).encode('utf-8')
+        server.files['/bulk-data'] = {'body': json.dumps({'data': [{
+            'type': 'default_cards',
+            'download_uri': f'{server.url}/default-cards.json',
+            'updated_at': updated_at,
+            'size': len(payload),
+            'content_encoding': 'gzip'
+        }]}).encode('utf-8')}
+        server.files['/default-cards.json'] = {
+            'body': payload,
+            'etag': etag,
+            'last_modified': 'Mon, 01 Jan 2024 10:00:00 GMT'
+        }
+    
+    def test_refresh_skips_unchanged_bulk_data(self):
+        """Unchanged updated_at skips the transfer; an unchanged file answers 304"""
+        server = StandInHTTPServer()
+        self.addCleanup(server.close)
+        self._serve_bulk_file(server, self.cards, '2024-01-01T10:00:00.000+00:00')
+        
+        with patch.object(ScryfallAPI, 'BASE_URL', server.url):
+            # First refresh downloads and ingests the file
+            self.assertTrue(self.cache.download_and_cache_bulk_data())
+            self.assertEqual(self.cache.last_refresh_stats['mode'], 'full')
+            self.assertEqual(len(server.requests_for('/default-cards.json')), 1)
+            
+            # Same updated_at: no download request at all
+            self.assertTrue(self.cache.download_and_cache_bulk_data())
+            self.assertEqual(self.cache.last_refresh_stats['mode'], 'skipped')
+            self.assertEqual(len(server.requests_for('/default-cards.json')), 1)
+            
+            # New updated_at but identical file: conditional GET answers 304
+            self._serve_bulk_file(server, self.cards, '2024-01-02T10:00:00.000+00:00')
+            self.assertTrue(self.cache.download_and_cache_bulk_data())
+            download_requests = server.requests_for('/default-cards.json')
+            self.assertEqual(len(download_requests), 2)
+            self.assertEqual(download_requests[-1].get('If-None-Match'), '"v1"')
+            self.assertEqual(download_requests[-1].get('If-Modified-Since'), 'Mon, 01 Jan 2024 10:00:00 GMT')
+            self.assertEqual(self.cache.last_refresh_stats['mode'], 'skipped')
+            
+            # Changed file: downloaded and re-ingested
+            changed_cards = self.cards + [make_bulk_card('card4', 'Brainstorm', collector_number='4')]
+            self._serve_bulk_file(server, changed_cards, '2024-01-03T10:00:00.000+00:00', etag='"v2"')
+            self.assertTrue(self.cache.download_and_cache_bulk_data())
+            self.assertEqual(self.cache.last_refresh_stats['mode'], 'full')
+            self.assertEqual(self.cache.get_cache_stats()['total_cards'], 4)
+    
+    def test_forced_refresh_ignores_validators(self):
+        """force=True downloads even when the bulk data is unchanged"""
+        server = StandInHTTPServer()
+        self.addCleanup(server.close)
+        self._serve_bulk_file(server, self.cards, '2024-01-01T10:00:00.000+00:00')
+        
+        with patch.object(ScryfallAPI, 'BASE_URL', server.url):
+            self.assertTrue(self.cache.download_and_cache_bulk_data())
+            self.assertTrue(self.cache.download_and_cache_bulk_data(force=True))
+        
+        download_requests = server.requests_for('/default-cards.json')
+        self.assertEqual(len(download_requests), 2)
+        self.assertNotIn('If-None-Match', download_requests[-1])
+        self.assertEqual(self.cache.last_refresh_stats['mode'], 'full')
+    
+    def test_interrupted_download_resumes_with_range_request(self):
+        """A partial staged download is completed with a Range request, not restarted"""
+        server = StandInHTTPServer()
+        self.addCleanup(server.close)
+        self._serve_bulk_file(server, self.cards, '2024-01-01T10:00:00.000+00:00')
+        payload = server.files['/default-cards.json']['body']
+        
+        # Simulate a transfer that died halfway through
+        os.makedirs(self.cache.staging_dir)
+        with open(self.cache._staging_path('.part'), 'wb') as part_file:
+            part_file.write(payload[:len(payload) // 2])
+        with open(self.cache._staging_path('.part.json'), 'w') as part_meta_file:
+            json.dump({
+                'download_uri': f'{server.url}/default-cards.json',
+                'etag': '"v1"',
+                'last_modified': 'Mon, 01 Jan 2024 10:00:00 GMT',
+                'content_encoding': ''
+            }, part_meta_file)
+        
+        with patch.object(ScryfallAPI, 'BASE_URL', server.url):
+            self.assertTrue(self.cache.download_and_cache_bulk_data())
+        
+        download_request = server.requests_for('/default-cards.json')[-1]
+        self.assertEqual(download_request.get('Range'), f'bytes={len(payload) // 2}-')
+        self.assertEqual(self.cache.get_cache_stats()['total_cards'], 3)
+        self.assertFalse(os.path.exists(self.cache._staging_path('.part')))
+        
+        with gzip.open(self.cache.get_staged_bulk_data()['path'], 'rb') as staged_file:
+            self.assertEqual(staged_file.read(), payload)
+    
+    def test_gzip_transfer_is_staged_compressed_and_reingested(self):
+        """A gzip-encoded body is kept compressed on disk and can be re-ingested offline"""
+        server = StandInHTTPServer()
+        self.addCleanup(server.close)
+        self._serve_bulk_file(server, self.cards, '2024-01-01T10:00:00.000+00:00')
+        server.files['/default-cards.json']['gzip'] = True
+        server.files['/sets'] = {'body': json.dumps({'data': [{
+            'code': 'neo', 'name': 'Kamigawa: Neon Dynasty', 'set_type': 'expansion', 'released_at': '2022-02-18',
+            'icon_svg_uri': f'{server.url}/neo.svg'
+        }]}).encode('utf-8')}
+        
+        with patch.object(ScryfallAPI, 'BASE_URL', server.url):
+            self.assertTrue(self.cache.download_and_cache_bulk_data())
+        
+        download_request = server.requests_for('/default-cards.json')[-1]
+        self.assertIn('gzip', download_request.get('Accept-Encoding'))
+        staged = self.cache.get_staged_bulk_data()
+        self.assertEqual(staged['source_updated_at'], '2024-01-01T10:00:00.000+00:00')
+        self.assertEqual(
+            os.path.getsize(staged['path']),
+            len(gzip.compress(server.files['/default-cards.json']['body'], mtime=0))
+        )
+        
+        # Re-ingest from disk with the server gone; no request is made, and the
+        # set metadata from the online refresh is kept
+        server.close()
+        with patch.object(ScryfallAPI, 'BASE_URL', server.url), patch('app.requests.get') as network:
+            self.assertTrue(self.cache.ingest_staged_bulk_data(delta=True))
+        network.assert_not_called()
+        self.assertEqual(self.cache.last_refresh_stats['unchanged'], 3)
+        neo = next(s for s in self.cache.get_sets_from_cache() if s['code'] == 'neo')
+        self.assertEqual(neo['icon_svg_uri'], f'{server.url}/neo.svg')
+        
+        # A staged file that fails its checksum is not trusted
+        with open(staged['path'], 'ab') as staged_file:
+            staged_file.write(b'corrupt')
+        self.assertIsNone(self.cache.get_staged_bulk_data())
+        self.assertFalse(self.cache.ingest_staged_bulk_data())
+    
+    def test_zlib_payloads_decode_transparently(self):
+        """Cards stored compressed read back identically through every lookup"""
+        cache = BulkDataCache(
+            db_path=os.path.join(self.temp_dir.name, 'zlib.db'),
+            staging_dir=self.cache.staging_dir,
+            payload_format='zlib'
+        )
+        cache.cache_cards_batch(self.cards)
+        
+        conn = sqlite3.connect(cache.db_path)
+        stored_types = {row[0] for row in conn.execute('SELECT typeof(data_json) FROM cards_cache')}
+        conn.close()
+        self.assertEqual(stored_types, {'blob'})
+        
+        self.assertEqual(cache.find_card_in_cache('Lightning Bolt', 'neo', '1').to_dict(), self.cards[0])
+        self.assertEqual([card.to_dict() for card in cache.search_cards_in_cache('Black Lotus')], [self.cards[2]])
+        self.assertEqual([card.to_dict() for card in cache.get_set_cards_from_cache('neo')], self.cards[:2])
+    
+    def test_migrate_payload_format_round_trips(self):
+        """Migration re-encodes existing rows and is a no-op when already migrated"""
+        self.cache.cache_cards_batch(self.cards)
+        
+        self.assertEqual(self.cache.migrate_payload_format('zlib'), 3)
+        self.assertEqual(self.cache.migrate_payload_format('zlib'), 0)
+        self.assertEqual(self.cache.payload_format, 'zlib')
+        self.assertEqual([card.to_dict() for card in self.cache.get_set_cards_from_cache('lea')], [self.cards[2]])
+        
+        self.assertEqual(self.cache.migrate_payload_format('json'), 3)
+        self.assertEqual(self.cache.find_card_in_cache('Lightning Bolt', 'neo', '1').to_dict(), self.cards[0])
+        with self.assertRaises(ValueError):
+            self.cache.migrate_payload_format('msgpack')
+    
+    def test_generation_is_shared_by_caches_on_the_same_file(self):
+        """A write through one worker's cache moves the generation every worker sees"""
+        other = BulkDataCache(db_path=self.cache.db_path, staging_dir=self.cache.staging_dir)
+        self.addCleanup(other.close_connections)
+        before = other.generation
+        self.assertEqual(before, self.cache.generation)
+        
+        self.cache.cache_cards_batch(self.cards[:1])
+        self.assertEqual(other.generation, before + 1)
+        self.assertEqual(self.cache.generation, before + 1)
+        
+        other.cache_cards_batch(self.cards[1:])
+        self.assertEqual(self.cache.generation, before + 2)
+    
+    def test_known_generation_is_read_again_after_the_recheck_interval(self):
+        """The in-memory generation follows local writes at once and other workers' after the interval"""
+        other = BulkDataCache(db_path=self.cache.db_path, staging_dir=self.cache.staging_dir)
+        self.addCleanup(other.close_connections)
+        before = other.generation
+        
+        with patch('app.ETAG_STATE_RECHECK_SECONDS', 60):
+            self.cache.cache_cards_batch(self.cards[:1])
+            self.assertEqual(self.cache.known_generation(), before + 1)
+            with patch.object(BulkDataCache, '_connection', side_effect=AssertionError('read the database')):
+                self.assertEqual(other.known_generation(), before)
+        with patch('app.ETAG_STATE_RECHECK_SECONDS', 0):
+            self.assertEqual(other.known_generation(), before + 1)
+    
+    def test_migrated_payload_format_survives_restart(self):
+        """A reopened cache keeps writing the format the last migration chose"""
+        self.cache.cache_cards_batch(self.cards[:1])
+        self.cache.migrate_payload_format('zlib')
+        self.cache.close_connections()
+        
+        reopened = BulkDataCache(db_path=self.cache.db_path, staging_dir=self.cache.staging_dir)
+        self.assertEqual(reopened.payload_format, 'zlib')
+        reopened.cache_cards_batch(self.cards[1:])
+        conn = sqlite3.connect(reopened.db_path)
+        stored_types = {row[0] for row in conn.execute('SELECT typeof(data_json) FROM cards_cache')}
+        conn.close()
+        self.assertEqual(stored_types, {'blob'})
+        reopened.close_connections()
+        
+        # A format passed explicitly still wins for that instance
+        explicit = BulkDataCache(db_path=self.cache.db_path, staging_dir=self.cache.staging_dir, payload_format='json')
+        self.assertEqual(explicit.payload_format, 'json')
+        explicit.close_connections()
+    
+    def test_set_cards_come_from_projected_columns(self):
+        """Set loads skip the payload until a non-projected field is read"""
+        self.cards[0]['oracle_text'] = 'Lightning Bolt deals 3 damage to any target.'
+        self.cache.cache_cards_batch(self.cards)
+        
+        with patch.object(self.cache, 'get_card_payload', wraps=self.cache.get_card_payload) as get_payload:
+            cards = self.cache.get_set_cards_from_cache('neo')
+            self.assertEqual([card['name'] for card in cards], ['Lightning Bolt', 'Counterspell \u2014 Æther'])
+            self.assertEqual(cards[0]['image_uris']['small'], 'http://example.com/card1.jpg')
+            self.assertEqual(cards[0]['prices']['usd'], '0.10')
+            self.assertEqual(cards[0]['set_type'], 'expansion')
+            # A projected field absent from the row is absent from the payload as well
+            self.assertIsNone(cards[0].get('mana_cost'))
+            self.assertNotIn('type_line', cards[0])
+            get_payload.assert_not_called()
+            
+            cards[0]['_source'] = 'cache'
+            self.assertEqual(cards[0]['oracle_text'], 'Lightning Bolt deals 3 damage to any target.')
+            self.assertIsNone(cards[0].get('flavor_text'))
+            self.assertEqual(cards[0]['_source'], 'cache')
+            get_payload.assert_called_once_with('card1')
+    
+    def test_partially_projected_fields_load_the_rest_on_demand(self):
+        """Image sizes and prices outside the projection come from the payload when read"""
+        self.cards[0]['image_uris'] = {'small': 'http://example.com/card1.jpg', 'normal': 'http://example.com/n1.jpg',
+                                       'large': 'http://example.com/l1.jpg', 'art_crop': 'http://example.com/a1.jpg'}
+        self.cards[0]['prices'] = {'usd': '0.10', 'usd_foil': None, 'eur': '0.08'}
+        self.cache.cache_cards_batch(self.cards)
+        
+        with patch.object(self.cache, 'get_card_payload', wraps=self.cache.get_card_payload) as get_payload:
+            card = self.cache.get_set_cards_from_cache('neo')[0]
+            image_uris, prices = card['image_uris'], card['prices']
+            self.assertEqual((image_uris.get('normal'), prices['usd']), ('http://example.com/n1.jpg', '0.10'))
+            get_payload.assert_not_called()
+            
+            self.assertEqual(image_uris['large'], 'http://example.com/l1.jpg')
+            self.assertIn('art_crop', image_uris)
+            self.assertIsNone(image_uris.get('png'))
+            self.assertEqual(prices.get('eur'), '0.08')
+            self.assertEqual(card['image_uris'], self.cards[0]['image_uris'])
+            get_payload.assert_called_once_with('card1')
+    
+    def test_shared_card_loading_in_another_thread_still_finds_payload_fields(self):
+        """A card read while another thread is loading its payload loads it too rather than miss fields"""
+        self.cards[0]['oracle_text'] = 'Lightning Bolt deals 3 damage to any target.'
+        self.cache.cache_cards_batch(self.cards)
+        loading, release = threading.Event(), threading.Event()
+        get_payload = self.cache.get_card_payload
+        
+        def slow_first_load(card_id):
+            payload = get_payload(card_id)
+            if not loading.is_set():
+                loading.set()
+                release.wait(5)
+            return payload
+        
+        with patch.object(self.cache, 'get_card_payload', side_effect=slow_first_load):
+            card = self.cache.get_set_cards_from_cache('neo')[0]
+            first = threading.Thread(target=lambda: card.get('oracle_text'))
+            first.start()
+            try:
+                self.assertTrue(loading.wait(5))
+                self.assertEqual(card['oracle_text'], self.cards[0]['oracle_text'])
+            finally:
+                release.set()
+                first.join()
+    
+    def test_projected_columns_are_backfilled_for_old_databases(self):
+        """Opening a cache created before the projected columns fills them from data_json"""
+        db_path = os.path.join(self.temp_dir.name, 'old.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute('''
+            CREATE TABLE cards_cache (
+                id TEXT PRIMARY KEY, name TEXT, set_code TEXT, collector_number TEXT,
+                set_name TEXT, rarity TEXT, image_url TEXT, data_json TEXT, updated_at TEXT
+            )
+        ''')
+        card = make_bulk_card('old1', 'Shock', mana_cost='{R}', type_line='Instant')
+        conn.execute(
+            'INSERT INTO cards_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            ('old1', 'Shock', 'neo', '1', card['set_name'], 'common', '', json.dumps(card), '2024-01-01')
+        )
+        conn.commit()
+        conn.close()
+        
+        cache = BulkDataCache(db_path=db_path, staging_dir=self.cache.staging_dir)
+        conn = sqlite3.connect(db_path)
+        row = conn.execute('SELECT set_type, released_at, mana_cost, type_line FROM cards_cache').fetchone()
+        conn.close()
+        
+        self.assertEqual(row, ('expansion', '2022-02-18', '{R}', 'Instant'))
+        self.assertEqual(cache.get_sets_from_cache()[0]['card_count'], 1)
+        self.assertEqual(cache.get_set_cards_from_cache('neo')[0].collector_sort_key, collector_number_sort_key('1'))
+    
+    def test_lookups_reuse_per_thread_read_only_connections(self):
+        """Each thread keeps one read-only lookup connection until the pool is reset"""
+        self.cache.cache_cards_batch(self.cards)
+        self.cache.find_card_in_cache('Lightning Bolt', 'neo', '1')
+        reader = self.cache._connection()
+        
+        self.assertIs(self.cache._connection(), reader)
+        self.assertIsNot(self.cache._connection(read_only=False), reader)
+        with self.assertRaises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM cards_cache")
+        
+        other_thread_connections = []
+        worker = threading.Thread(target=lambda: other_thread_connections.append(self.cache._connection()))
+        worker.start()
+        worker.join()
+        self.assertIsNot(other_thread_connections[0], reader)
+        
+        # Refreshes retire pooled connections; exited threads' connections are closed
+        self.cache.reset_connections()
+        self.assertIsNot(self.cache._connection(), reader)
+        self.assertEqual(list(self.cache._pool), [threading.current_thread()])
+        with self.assertRaises(sqlite3.ProgrammingError):
+            other_thread_connections[0].execute('SELECT 1')
+    
+    @patch('app.requests.get')
+    def test_refresh_builds_sets_cache(self, mock_get):
+        """A refresh materializes the set list with Scryfall metadata and cached card counts"""
+        self._mock_bulk_responses(mock_get, json.dumps(self.cards).encode('utf-8'))
+        
+        self.assertTrue(self.cache.download_and_cache_bulk_data())
+        
+        sets = {s['code']: s for s in self.cache.get_sets_from_cache()}
+        self.assertEqual(sets['neo']['card_count'], 2)
+        self.assertEqual(sets['neo']['icon_svg_uri'], 'https://svgs.scryfall.io/sets/neo.svg')
+        # lea is missing from the Scryfall set data, so it is built from its cards
+        self.assertEqual(sets['lea']['card_count'], 1)
+        self.assertEqual(sets['lea']['name'], 'Kamigawa: Neon Dynasty')
+    
+    def test_sets_cache_filters_and_counts_incrementally(self):
+        """Non-playable and future sets are not listed; batch caching keeps counts current"""
+        self.cache.cache_cards_batch(self.cards + [
+            make_bulk_card('tok1', 'Spirit Token', set_code='tneo', set_type='token'),
+            make_bulk_card('fut1', 'Future Card', set_code='fut', released_at='2999-01-01')
+        ])
+        self.assertEqual(sorted(s['code'] for s in self.cache.get_sets_from_cache()), ['lea', 'neo'])
+        
+        self.cache.cache_cards_batch([make_bulk_card('card4', 'Brainstorm', collector_number='4')])
+        sets = {s['code']: s for s in self.cache.get_sets_from_cache()}
+        self.assertEqual(sets['neo']['card_count'], 3)
+        self.assertEqual(sets['lea']['card_count'], 1)
+    
+    def test_search_orders_exact_then_prefix_then_substring(self):
+        """Fuzzy search is case-insensitive and ranks exact, prefix and substring matches"""
+        self.cache.cache_cards_batch(self.cards + [
+            make_bulk_card('card4', 'Bolt', collector_number='4'),
+            make_bulk_card('card5', 'Bolt Bend', collector_number='5'),
+            make_bulk_card('card6', 'Bolt', set_code='M10', collector_number='146', set_name='Magic 2010')
+        ])
+        
+        self.assertEqual(
+            [card['id'] for card in self.cache.search_cards_in_cache('BOLT', 'NEO')],
+            ['card4', 'card5', 'card1']
+        )
+        self.assertEqual(
+            [card['id'] for card in self.cache.search_cards_in_cache('bolt', 'Kamigawa: Neon Dynasty')],
+            ['card4', 'card5', 'card1']
+        )
+        unscoped = [card['id'] for card in self.cache.search_cards_in_cache('Bolt')]
+        self.assertEqual(sorted(unscoped[:2]), ['card4', 'card6'])
+        self.assertEqual(unscoped[2:], ['card5', 'card1'])
+        self.assertEqual(self.cache.get_set_cards_from_cache('M10')[0]['set'], 'm10')
+        self.assertEqual(self.cache.search_cards_in_cache('Bolt', 'zzz'), [])
+    
+    def test_search_without_fts_matches_part_of_a_set_name(self):
+        """Without full-text search, a partial set name still scopes the search, after exact set matches"""
+        self.cache.cache_cards_batch(self.cards + [
+            make_bulk_card('card4', 'Lightning Bolt', set_code='M10', collector_number='146', set_name='Magic 2010')
+        ])
+        self.cache.fts_enabled = False
+        
+        self.assertEqual([card['id'] for card in self.cache.search_cards_in_cache('Lightning Bolt', 'Neon Dynasty')],
+                         ['card1'])
+        self.assertEqual([card['id'] for card in self.cache.search_cards_in_cache('bolt', 'magic 20')], ['card4'])
+        self.assertEqual([card['id'] for card in self.cache.search_cards_in_cache('Lightning Bolt', 'M10')], ['card4'])
+        self.assertEqual(self.cache.search_cards_in_cache('Lightning Bolt', 'Alpha'), [])
+    
+    @patch('app.requests.get')
+    def test_search_index_stays_in_sync(self, mock_get):
+        """Substring search sees batch writes, renames, deletes and full refreshes"""
+        self.assertTrue(self.cache.fts_enabled)
+        self.cache.cache_cards_batch(self.cards)
+        self.assertEqual([card['id'] for card in self.cache.search_cards_in_cache('IGHTNING')], ['card1'])
+        self.assertEqual([card['id'] for card in self.cache.search_cards_in_cache('æther', 'neo')], ['card2'])
+        
+        self.cache.cache_cards_batch([dict(self.cards[0], name='Chain Lightning')])
+        self.assertEqual([card['name'] for card in self.cache.search_cards_in_cache('ightning')], ['Chain Lightning'])
+        self.assertEqual(self.cache.search_cards_in_cache('ightning bolt'), [])
+        
+        # A full refresh swaps in a new table and rebuilds the index from it
+        self._mock_bulk_responses(mock_get, json.dumps(self.cards[1:]).encode('utf-8'))
+        self.assertTrue(self.cache.download_and_cache_bulk_data())
+        self.assertEqual(self.cache.search_cards_in_cache('ightning'), [])
+        self.assertEqual([card['id'] for card in self.cache.search_cards_in_cache('lotus')], ['card3'])
+        
+        # Without full-text search, substring matching falls back to the name indexes
+        self.cache.fts_enabled = False
+        self.assertEqual([card['id'] for card in self.cache.search_cards_in_cache('otu', 'lea')], ['card3'])
+        self.assertEqual([card['id'] for card in self.cache.search_cards_in_cache('otu')], ['card3'])
+    
+    @patch('app.requests.get')
+    def test_import_resolves_typos_offline_and_flags_low_confidence(self, mock_get):
+        """Misspelled CSV names match cached cards without API calls; doubtful ones are flagged"""
+        self.cache.cache_cards_batch(self.cards)
+        # A fresh bulk_metadata row keeps the import from starting a refresh
+        conn = sqlite3.connect(self.cache.db_path)
+        conn.execute(
+            "INSERT INTO bulk_metadata (data_type, updated_at) VALUES ('default_cards', ?)",
+            (datetime.now().isoformat(),)
+        )
+        conn.commit()
+        conn.close()
+        
+        csv_content = """Name,Set,Collector Number,Quantity,Foil,Condition,Language
+Lightening Bolt,NEO,1,2,No,Near Mint,English
+Blak Lots,LEA,232,1,No,Near Mint,English"""
+        with patch('app.bulk_cache', self.cache):
+            manager = CollectionManager()
+            result = manager.import_from_csv(csv_content)
+        
+        mock_get.assert_not_called()
+        self.assertEqual(result['imported_count'], 2)
+        self.assertEqual(result['api_calls'], 0)
+        self.assertEqual(manager.collection['card3']['name'], 'Black Lotus')
+        self.assertEqual([(match['row'], match['matched_name']) for match in result['low_confidence_matches']],
+                         [(3, 'Black Lotus')])
+        
+        # The matcher is rebuilt when the cache changes
+        self.cache.cache_cards_batch([make_bulk_card('card4', 'Brainstorm', collector_number='4')])
+        self.assertEqual(self.cache.get_name_matcher().match('Brainstrom')['name'], 'Brainstorm')
+    
+    def test_set_cards_come_back_in_natural_collector_order(self):
+        """Set pages are ordered by the stored sort key straight off the composite index"""
+        numbers = ['10', '2', '12b', '★2', 'S1', '1', '12', 'T', '12a', '100']
+        self.cache.cache_cards_batch([
+            make_bulk_card(f'tst{index}', f'Card {number}', set_code='tst', collector_number=number)
+            for index, number in enumerate(numbers)
+        ])
+        
+        cards = self.cache.get_set_cards_from_cache('TST')
+        
+        self.assertEqual([card['collector_number'] for card in cards],
+                         ['1', 'S1', '2', '★2', '10', '12', '12a', '12b', '100', 'T'])
+        self.assertEqual([card.collector_sort_key for card in cards],
+                         sorted(collector_number_sort_key(number) for number in numbers))
+        
+        conn = sqlite3.connect(self.cache.db_path)
+        self.addCleanup(conn.close)
+        plan = [row[3] for row in conn.execute(
+            f"EXPLAIN QUERY PLAN {CARD_PROJECTION_SELECT} WHERE set_code = 'tst' ORDER BY collector_sort_key"
+        )]
+        self.assertTrue(any('idx_cards_set_order' in detail for detail in plan), plan)
+        self.assertFalse(any('TEMP B-TREE' in detail for detail in plan), plan)
+    
+    def test_set_cards_page_sorts_filters_and_locates(self):
+        """Set pages come sorted and prefix-filtered off the set indexes, with card positions"""
+        names = ['Shock', 'Abrade', 'Shatter', 'Lava Spike', 'Shivan Dragon']
+        self.cache.cache_cards_batch([
+            make_bulk_card(f'tst{number}', name, set_code='tst', collector_number=str(number))
+            for number, name in enumerate(names, start=1)
+        ])
+        
+        cards, total = self.cache.get_set_cards_page('TST', offset=1, limit=2)
+        self.assertEqual(([card['name'] for card in cards], total), (['Abrade', 'Shatter'], 5))
+        cards, total = self.cache.get_set_cards_page('tst', sort='name', name_prefix='SH')
+        self.assertEqual(([card['name'] for card in cards], total), (['Shatter', 'Shivan Dragon', 'Shock'], 3))
+        
+        self.assertEqual(self.cache.get_set_card_position('tst', 'tst5', 'name', 'sh'), 1)
+        self.assertEqual(self.cache.get_set_card_position('tst', 'tst4'), 3)
+        self.assertIsNone(self.cache.get_set_card_position('tst', 'tst4', 'name', 'sh'))
+        
+        conn = sqlite3.connect(self.cache.db_path)
+        self.addCleanup(conn.close)
+        for sort, index_name in (('number', 'idx_cards_set_order'), ('name', 'idx_cards_set_name')):
+            with self.subTest(sort=sort):
+                where_sql, params = self.cache._set_page_filter('tst', 'sh' if sort == 'name' else '')
+                plan = [row[3] for row in conn.execute(
+                    f"EXPLAIN QUERY PLAN {CARD_PROJECTION_SELECT} {where_sql} "
+                    f"ORDER BY {', '.join(SET_CARD_SORT_COLUMNS[sort])} LIMIT 60", params
+                )]
+                self.assertTrue(any(index_name in detail for detail in plan), plan)
+                self.assertFalse(any('TEMP B-TREE' in detail for detail in plan), plan)
+        
+        with patch('app.bulk_cache', self.cache):
+            client = app.test_client()
+            response = client.get('/api/set/tst/cards?sort=name&q=sh&limit=2&locate=tst3')
+            data = response.get_json()
+            self.assertEqual([card['name'] for card in data['cards']], ['Shatter', 'Shivan Dragon'])
+            self.assertEqual((data['total'], data['position']), (3, 0))
+            self.assertNotIn('data_json', data['cards'][0])
+            
+            response = client.get('/api/set/tst/cards?sort=bogus&limit=100000&offset=-5')
+            data = response.get_json()
+            self.assertEqual((data['sort'], data['limit'], data['offset']), ('number', SET_CARDS_MAX_PAGE_SIZE, 0))
+            self.assertEqual(client.get('/api/set/tst/cards', headers={'If-None-Match': response.headers['ETag']}).status_code, 304)
+    
+    def test_tied_names_page_in_a_fixed_order(self):
+        """Cards sharing a name are ordered by collector number, and located at their own offset"""
+        self.cache.cache_cards_batch([
+            make_bulk_card(f'land{number}', name, set_code='tst', collector_number=str(number))
+            for number, name in ((3, 'Island'), (1, 'Forest'), (4, 'Island'), (2, 'Island'), (5, 'Forest'))
+        ])
+        
+        pages = [self.cache.get_set_cards_page('tst', offset, 2, 'name')[0] for offset in (0, 2, 4)]
+        self.assertEqual([card['id'] for page in pages for card in page],
+                         ['land1', 'land5', 'land2', 'land3', 'land4'])
+        self.assertEqual([self.cache.get_set_card_position('tst', f'land{number}', 'name') for number in (2, 3, 4)],
+                         [2, 3, 4])
+        self.assertEqual(self.cache.get_set_card_position('tst', 'land3', 'name', 'isl'), 1)
+        
+        # Caches built before the tiebreaker get the wider index on their next open
+        conn = sqlite3.connect(self.cache.db_path)
+        conn.execute('DROP INDEX idx_cards_set_name')
+        conn.execute('CREATE INDEX idx_cards_set_name ON cards_cache(set_code, name_lower)')
+        conn.commit()
+        BulkDataCache(db_path=self.cache.db_path, staging_dir=self.cache.staging_dir).close_connections()
+        index_sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'idx_cards_set_name'").fetchone()[0]
+        conn.close()
+        self.assertIn('name_lower, collector_sort_key, id', index_sql)
+    
+    def test_set_view_reads_only_the_first_page_of_a_cached_set(self):
+        """The set page embeds one page and the set's count without loading the whole set"""
+        self.cache.cache_cards_batch([
+            make_bulk_card(f'tst{number}', f'Card {number}', set_code='tst', collector_number=str(number))
+            for number in range(1, 6)
+        ])
+        set_info = {'code': 'tst', 'name': 'Test Set', 'set_type': 'expansion', 'released_at': '2022-01-01'}
+        with patch('app.bulk_cache', self.cache), patch('app.SET_CARDS_PAGE_SIZE', 2), \
+             patch('app.set_registry.get_by_code', return_value=set_info), \
+             patch.object(self.cache, 'get_set_cards_from_cache') as full_load, \
+             patch('app.ScryfallAPI.get_set_cards') as full_fetch:
+            html = app.test_client().get('/set/tst').get_data(as_text=True)
+        
+        full_load.assert_not_called()
+        full_fetch.assert_not_called()
+        embedded = json.loads(html.split('<script type="application/json" id="cardData">')[1].split('</script>')[0])
+        self.assertEqual([card['name'] for card in embedded], ['Card 1', 'Card 2'])
+        self.assertIn('const totalSetCards = 5;', html)
+        self.assertIn('5 cards from cache', ' '.join(html.split()))
+    
+    def test_lookup_queries_use_indexes(self):
+        """EXPLAIN QUERY PLAN for every lookup query shows no full table scan"""
+        self.cache.cache_cards_batch(self.cards)
+        statements = []
+        self.cache._connection().set_trace_callback(statements.append)
+        
+        self.cache.is_cache_valid()
+        self.cache.find_card_in_cache('Lightning Bolt', 'neo', '1')
+        self.cache.find_card_in_cache('Lightning Bolt', 'Kamigawa: Neon Dynasty')
+        self.cache.get_card_payload('card1')
+        for set_identifier in (None, 'neo', 'Kamigawa: Neon Dynasty'):
+            self.cache.search_cards_in_cache('zzz no match', set_identifier)
+        self.cache.get_set_cards_from_cache('NEO')
+        self.cache.get_set_completion_stats('neo')
+        self.cache.get_sets_from_cache()
+        self.cache.get_cache_stats()
+        
+        conn = sqlite3.connect(self.cache.db_path)
+        self.addCleanup(conn.close)
+        # FTS5 reads its own shadow tables internally; only the cache's queries are checked
+        selects = [
+            statement for statement in statements
+            if statement.lstrip().upper().startswith('SELECT') and "'main'." not in statement
+        ]
+        self.assertGreater(len(selects), 10)
+        for statement in selects:
+            for detail in [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {statement}')]:
+                with self.subTest(statement=' '.join(statement.split()), detail=detail):
+                    # Scanning a covering index reads only the narrow index, never the
+                    # table; full-text matches show up as virtual table scans
+                    self.assertFalse(
+                        detail.startswith('SCAN ') and 'COVERING INDEX' not in detail
+                        and 'CONSTANT ROW' not in detail and 'VIRTUAL TABLE' not in detail,
+                        detail
+                    )
+    
+    def test_cache_cards_batch_skips_malformed_cards(self):
+        """Batched API caching stores valid cards and skips ones missing required fields"""
+        cached = self.cache.cache_cards_batch(self.cards + [{'name': 'No Id'}])
+        
+        self.assertEqual(cached, 3)
+        self.assertEqual(self.cache.get_cache_stats()['total_cards'], 3)
+
+
+class TestCardNameMatcher(unittest.TestCase):
+    """Test cases for the offline fuzzy card name matcher"""
+    
+    def setUp(self):
+        self.matcher = CardNameMatcher([
+            'Lightning Bolt', 'Lightning Helix', 'Chain Lightning', 'Fire // Ice', 'Æther Vial', 'Counterspell'
+        ])
+    
+    def test_edit_distance_counts_transpositions_once(self):
+        """Swapped adjacent letters cost one edit and the early cutoff is respected"""
+        self.assertEqual(edit_distance('lightning', 'lihgtning'), 1)
+        self.assertEqual(edit_distance('lightening bolt', 'lightning bolt'), 1)
+        self.assertEqual(edit_distance('kitten', 'sitting'), 3)
+        self.assertEqual(edit_distance('kitten', 'sitting', max_distance=1), 2)
+    
+    def test_match_corrects_common_typos(self):
+        """Misspellings, accents and single faces resolve to the cached card name"""
+        match = self.matcher.match('Lightening Bolt')
+        self.assertEqual(match['name'], 'Lightning Bolt')
+        self.assertEqual(match['distance'], 1)
+        self.assertGreater(match['confidence'], 0.9)
+        
+        self.assertEqual(self.matcher.match('lihgtning helix')['name'], 'Lightning Helix')
+        self.assertEqual(self.matcher.match('Aether Vial')['confidence'], 1.0)
+        self.assertEqual(self.matcher.match('Fire')['name'], 'Fire // Ice')
+        self.assertLess(self.matcher.match('Countrspel')['confidence'], 0.9)
+        self.assertIsNone(self.matcher.match('   '))
 
 
 class TestCollectionManager(unittest.TestCase):
@@ -408,6 +1648,247 @@ class TestCollectionManager(unittest.TestCase):
         expected_value = (2 * 5.50) + (1 * 8.00)  # Only cards >= $1.00
         self.assertAlmostEqual(summary['total_value'], expected_value, places=2)
 
+    @staticmethod
+    def recompute_summary(collection):
+        """Compute the collection summary from scratch by walking every entry"""
+        def price(card, key):
+            try:
+                return float(card[key]) if card.get(key) else None
+            except ValueError:
+                return None
+        
+        total_cards, unique_cards, priced_cards, total_value, sets = 0, 0, 0, 0.0, set()
+        for card in collection.values():
+            reg_qty, foil_qty = card['quantity'] or 0, card['foil_quantity'] or 0
+            if reg_qty + foil_qty <= 0:
+                continue
+            total_cards += reg_qty + foil_qty
+            unique_cards += 1
+            sets.add(card['set'])
+            reg_price, foil_price = price(card, 'price_usd_regular'), price(card, 'price_usd_foil')
+            priced = False
+            if reg_qty and reg_price is not None:
+                priced = True
+                total_value += reg_price * reg_qty if reg_price >= 1 else 0
+            if foil_qty and card.get('price_usd_foil'):
+                if foil_price is not None:
+                    priced = True
+                    total_value += foil_price * foil_qty if foil_price >= 1 else 0
+            elif foil_qty and not reg_qty and reg_price is not None:
+                priced = True
+                total_value += reg_price * foil_qty if reg_price >= 1 else 0
+            priced_cards += priced
+        return total_cards, unique_cards, len(sets), round(total_value, 2), priced_cards
+    
+    def test_summary_totals_match_full_recompute(self):
+        """Test that the running summary totals agree with a full walk after every change"""
+        rng = random.Random(23)
+        prices = [None, '', 'n/a', '0.25', '0.99', '1.00', '3.10', '12.34']
+        cards = [
+            make_bulk_card(f'card{number}', f'Card {number}', set_code=rng.choice(['neo', 'lea', 'mh2']),
+                           collector_number=str(number),
+                           prices={'usd': rng.choice(prices), 'usd_foil': rng.choice(prices)})
+            for number in range(30)
+        ]
+        
+        def check(step):
+            summary = self.manager.get_collection_summary()
+            actual = (summary['total_cards'], summary['unique_cards'], summary['sets_represented'],
+                      round(summary['total_value'], 2), summary['priced_cards'])
+            self.assertEqual(actual, self.recompute_summary(self.manager.collection), step)
+            
+            # The set indexes agree with a scan of the collection
+            by_set = {}
+            for card_id, entry in self.manager.collection.items():
+                by_set.setdefault(entry['set'].lower(), {})[card_id] = entry
+                self.assertEqual(self.manager.find_entry(entry['set'], entry['collector_number']), (card_id, entry), step)
+            self.assertEqual({code: {'owned': len(entries)} for code, entries in by_set.items()},
+                             self.manager.get_collection_stats_by_set(), step)
+            for set_code in ('neo', 'LEA', 'mh2'):
+                self.assertEqual(self.manager.get_set_entries(set_code), by_set.get(set_code.lower(), {}), step)
+        
+        for step in range(400):
+            card = rng.choice(cards)
+            operation = rng.random()
+            if operation < 0.35:
+                self.manager.add_card(card, rng.randint(0, 4), foil=rng.random() < 0.4)
+            elif operation < 0.7:
+                self.manager.update_card_quantities(card, rng.randint(0, 3), rng.randint(0, 2))
+            elif operation < 0.9:
+                self.manager.update_quantities_batch([
+                    {'card_id': batch_card['id'], 'regular': rng.randint(0, 3), 'foil': rng.randint(0, 2), 'card': batch_card}
+                    for batch_card in rng.sample(cards, 5)
+                ])
+            elif operation < 0.98:
+                imported = rng.sample(cards, 4)
+                csv_content = "Name,Set,Collector Number,Quantity,Foil\n" + "\n".join(
+                    f"{imported_card['name']},{imported_card['set']},{imported_card['collector_number']},"
+                    f"{rng.randint(1, 3)},{rng.choice(['No', 'Yes'])}"
+                    for imported_card in imported
+                )
+                by_name = {imported_card['name']: imported_card for imported_card in imported}
+                with patch('app.bulk_cache.is_cache_valid', return_value=True), \
+                     patch.object(self.manager, '_find_card_by_details_hybrid',
+                                  side_effect=lambda name, *_: by_name[name]):
+                    self.manager.import_from_csv(csv_content)
+            else:
+                self.manager.clear_collection()
+            check(step)
+    
+    def test_import_skips_lookup_for_owned_cards(self):
+        """Test that rows for cards already in the collection are matched through the set index"""
+        self.manager.update_card_quantities(self.sample_card, 1, 0)
+        csv_content = """Name,Set,Collector Number,Quantity,Foil
+lightning bolt,NEO,123,4,No
+Lightning Bolt,NEO,123,2,Yes
+Lightning Bolt,NEO,999,1,No"""
+        with patch('app.bulk_cache.is_cache_valid', return_value=True), \
+             patch.object(self.manager, '_find_card_by_details_hybrid', return_value=None) as lookup:
+            result = self.manager.import_from_csv(csv_content)
+        
+        # Only the row whose collector number is not owned needed a lookup
+        lookup.assert_called_once_with('Lightning Bolt', 'NEO', '999')
+        self.assertEqual((result['imported_count'], result['cache_hits']), (2, 2))
+        entry = self.manager.collection[self.sample_card['id']]
+        self.assertEqual((entry['quantity'], entry['foil_quantity']), (4, 2))
+    
+    def test_import_matches_owned_cards_by_set_name(self):
+        """Test that a row naming the set in full still takes the owned-card path"""
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        cache = BulkDataCache(db_path=os.path.join(temp_dir.name, 'cache.db'), staging_dir=temp_dir.name)
+        self.addCleanup(cache.close_connections)
+        cache.cache_cards_batch([make_bulk_card(self.sample_card['id'], 'Lightning Bolt', collector_number='123')])
+        self.manager.update_card_quantities(self.sample_card, 1, 0)
+        csv_content = """Name,Edition,Card Number,Count
+Lightning Bolt,Kamigawa: Neon Dynasty,123,3"""
+        with patch('app.bulk_cache', cache), patch.object(cache, 'is_cache_valid', return_value=True), \
+             patch.object(self.manager, '_find_card_by_details_hybrid') as lookup:
+            result = self.manager.import_from_csv(csv_content)
+        
+        lookup.assert_not_called()
+        self.assertEqual(result['imported_count'], 1)
+        self.assertEqual(self.manager.collection[self.sample_card['id']]['quantity'], 3)
+    
+    def test_import_looks_up_owned_cards_removed_mid_row(self):
+        """Test that a row whose owned entry is removed before it applies gets a full entry from the lookup"""
+        self.manager.update_card_quantities(self.sample_card, 1, 0)
+        full_card = dict(self.sample_card, prices={'usd': '1.50', 'usd_foil': None})
+        
+        def remove_owned_entry(set_identifier):
+            # Another request deletes the card while the row is being resolved
+            self.manager.update_card_quantities(self.sample_card, 0, 0)
+            return [set_identifier.lower()]
+        
+        csv_content = """Name,Set,Collector Number,Quantity
+Lightning Bolt,NEO,123,2"""
+        with patch('app.bulk_cache.is_cache_valid', return_value=True), \
+             patch('app.bulk_cache.resolve_set_codes', side_effect=remove_owned_entry), \
+             patch.object(self.manager, '_find_card_by_details_hybrid', return_value=full_card) as lookup:
+            result = self.manager.import_from_csv(csv_content)
+        
+        lookup.assert_called_once_with('Lightning Bolt', 'NEO', '123')
+        self.assertEqual(result['imported_count'], 1)
+        entry = self.manager.collection[self.sample_card['id']]
+        self.assertEqual((entry['set_name'], entry['rarity'], entry['price_usd_regular'], entry['quantity']),
+                         ('Kamigawa: Neon Dynasty', 'common', '1.50', 2))
+    
+    def test_collection_lists_entries_in_insertion_order(self):
+        """Test that the collection and its export list cards in the order they were added, as a dict would"""
+        cards = {number: make_bulk_card(f'card{number}', f'Card {number}', collector_number=str(number))
+                 for number in (5, 1, 9, 3, 7, 2)}
+        for card in cards.values():
+            self.manager.add_card(card, 1)
+        self.manager.update_card_quantities(cards[1], 4, 0)  # An update keeps the card's place
+        self.manager.update_card_quantities(cards[9], 0, 0)
+        self.manager.add_card(cards[9], 1)  # Removed and added again goes last
+        
+        expected = ['card5', 'card1', 'card3', 'card7', 'card2', 'card9']
+        self.assertEqual(list(self.manager.collection), expected)
+        exported = csv.DictReader(io.StringIO(self.manager.export_to_csv('deckbox')))
+        self.assertEqual([row['Name'] for row in exported], [f'Card {card_id[4:]}' for card_id in expected])
+    
+    def test_collection_snapshots_are_read_only_and_stable(self):
+        """Test that a snapshot never changes once handed out"""
+        self.manager.update_card_quantities(self.sample_card, 2, 0)
+        snapshot = self.manager.collection
+        self.assertIs(self.manager.collection, snapshot)  # Reused while nothing changes
+        with self.assertRaises(TypeError):
+            snapshot['other'] = {}
+        
+        entry = snapshot[self.sample_card['id']]
+        self.manager.update_card_quantities(self.sample_card, 5, 1)
+        self.manager.add_card(make_bulk_card('card2', 'Counterspell'), 1)
+        self.assertEqual((entry['quantity'], entry['foil_quantity']), (2, 0))
+        self.assertEqual(list(snapshot), [self.sample_card['id']])
+        self.assertEqual(self.manager.collection[self.sample_card['id']]['quantity'], 5)
+        self.assertEqual(len(self.manager.collection), 2)
+    
+    def test_snapshots_share_unchanged_shards(self):
+        """Test that taking a snapshot copies nothing and a write copies only its own shard"""
+        entries = CollectionEntries({f'card{number}': {'quantity': number} for number in range(1000)})
+        snapshot = entries.snapshot()
+        self.assertTrue(all(shard is live for shard, live in zip(snapshot._shards, entries._shards)))
+        
+        entries['card1'] = {'quantity': 100}
+        entries.pop('card2')
+        changed = {entries._shard_index('card1'), entries._shard_index('card2')}
+        shared = [index for index in range(COLLECTION_SNAPSHOT_SHARDS) if snapshot._shards[index] is entries._shards[index]]
+        self.assertEqual(len(shared), COLLECTION_SNAPSHOT_SHARDS - len(changed))
+        
+        self.assertEqual((snapshot['card1'], len(snapshot), 'card2' in snapshot), ({'quantity': 1}, 1000, True))
+        self.assertEqual((entries['card1'], len(entries), 'card2' in entries), ({'quantity': 100}, 999, False))
+    
+    def test_reads_stay_consistent_during_import(self):
+        """Test that summaries, exports and snapshots read cleanly while an import writes"""
+        cards = {f'Card {number}': make_bulk_card(f'card{number}', f'Card {number}', collector_number=str(number),
+                                                  prices={'usd': '2.00'})
+                 for number in range(100)}
+        csv_content = "Name,Set,Collector Number,Quantity\n" + "\n".join(
+            f"{name},NEO,{card['collector_number']},1" for name, card in cards.items()
+        )
+        
+        def slow_lookup(name, *_):
+            time.sleep(0.0005)
+            return cards[name]
+        
+        errors = []
+        with patch('app.bulk_cache.is_cache_valid', return_value=True), \
+             patch.object(self.manager, '_find_card_by_details_hybrid', side_effect=slow_lookup):
+            importer = threading.Thread(target=lambda: self.manager.import_from_csv(csv_content))
+            importer.start()
+            try:
+                while importer.is_alive():
+                    summary = self.manager.get_collection_summary()
+                    # Every imported card is worth $2, so the totals move together
+                    self.assertEqual(summary['total_value'], summary['total_cards'] * 2)
+                    snapshot = self.manager.collection
+                    self.assertEqual(sum(card['quantity'] for card in snapshot.values()), len(snapshot))
+                    rows = self.manager.export_to_csv().strip().splitlines()
+                    self.assertGreaterEqual(len(rows) - 1, len(snapshot))
+                    # The combined read gives a summary of exactly the entries it returns
+                    version, snapshot, summary = self.manager.get_versioned_collection()
+                    self.assertEqual(summary['unique_cards'], len(snapshot))
+                    self.assertEqual(summary['total_cards'], sum(card['quantity'] for card in snapshot.values()))
+                    set_version, set_entries = self.manager.get_versioned_set_entries('neo')
+                    if set_version == version:
+                        self.assertEqual(set_entries, dict(snapshot))
+            except Exception as e:
+                errors.append(e)
+            importer.join()
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(self.manager.get_collection_summary()['total_cards'], 100)
+    
+    def test_summary_does_not_walk_the_collection(self):
+        """Test that reading the summary does no per-entry work"""
+        for number in range(20):
+            self.manager.update_card_quantities(make_bulk_card(f'card{number}', f'Card {number}'), 1, 0)
+        with patch('app.collection_entry_totals') as entry_totals:
+            summary = self.manager.get_collection_summary()
+        entry_totals.assert_not_called()
+        self.assertEqual((summary['total_cards'], summary['priced_cards']), (20, 20))
+
     def test_bulk_card_filtering(self):
         """Test that cards under $1 are excluded from estimated value"""
         # Add a card worth $0.50 (bulk)
@@ -585,7 +2066,178 @@ Nonexistent Card,neo,999,1,No,Near Mint,English"""
         # Check that we got a complete update
         complete_updates = [u for u in progress_updates if u['status'] == 'complete']
         self.assertEqual(len(complete_updates), 1)
-    
+
+
+class TestCollectionStore(unittest.TestCase):
+    """Test cases for the SQLite-backed collection store"""
+
+    def setUp(self):
+        """Open a store in a temporary directory"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'collection.db')
+        self.stores = []
+        self.card = make_bulk_card('card1', 'Lightning Bolt', rarity='common')
+
+    def tearDown(self):
+        """Close every store before removing the directory"""
+        for store in self.stores:
+            store.close()
+        self.temp_dir.cleanup()
+
+    def open_manager(self):
+        """Create a manager on a new connection to the shared store"""
+        store = CollectionStore(self.db_path)
+        self.stores.append(store)
+        return CollectionManager(store)
+
+    def test_changes_survive_restart(self):
+        """Test that every kind of change is written through and reloaded"""
+        manager = self.open_manager()
+        manager.add_card(self.card, 2)
+        manager.add_card(self.card, 1, foil=True)
+        manager.update_card_quantities(make_bulk_card('card2', 'Counterspell', collector_number='2'), 3, 0)
+        manager.update_card_quantities(make_bulk_card('card3', 'Brainstorm', collector_number='3'), 1, 0)
+        manager.add_card(make_bulk_card('card3', 'Brainstorm', collector_number='3'), 0)
+
+        restarted = self.open_manager()
+        self.assertEqual(restarted.collection, manager.collection)
+        self.assertEqual(restarted.collection['card1']['quantity'], 2)
+        self.assertEqual(restarted.collection['card1']['foil_quantity'], 1)
+        self.assertNotIn('card3', restarted.collection)
+        self.assertIsNotNone(restarted.load_seconds)
+        self.assertEqual(restarted.get_collection_summary(), manager.get_collection_summary())
+
+        manager.clear_collection()
+        self.assertEqual(self.open_manager().collection, {})
+
+    def test_import_written_in_batches(self):
+        """Test that imported entries reach the store"""
+        cards = {f'Card {number}': make_bulk_card(f'card{number}', f'Card {number}', collector_number=str(number))
+                 for number in range(1, 6)}
+        csv_content = "Name,Set,Collector Number,Quantity\n" + "\n".join(
+            f"{name},NEO,{card['collector_number']},1" for name, card in cards.items()
+        )
+        manager = self.open_manager()
+        with patch('app.bulk_cache.is_cache_valid', return_value=True), \
+             patch.object(manager, '_find_card_by_details_hybrid', side_effect=lambda name, *_: cards[name]), \
+             patch('app.COLLECTION_IMPORT_FLUSH_ROWS', 2), \
+             patch.object(manager.store, 'upsert_many', wraps=manager.store.upsert_many) as upsert_many:
+            result = manager.import_from_csv(csv_content)
+
+        self.assertEqual(result['imported_count'], 5)
+        self.assertEqual(upsert_many.call_count, 3)
+        self.assertEqual(set(self.open_manager().collection), {f'card{number}' for number in range(1, 6)})
+
+    def test_batch_update_written_in_one_transaction(self):
+        """Test that a batch of quantity updates reaches the store together"""
+        manager = self.open_manager()
+        manager.add_card(self.card, 1)
+        with patch.object(manager.store, 'apply_changes', wraps=manager.store.apply_changes) as apply_changes:
+            manager.update_quantities_batch([
+                {'card_id': 'card1', 'regular': 0, 'foil': 0},
+                {'card_id': 'card2', 'regular': 2, 'foil': 1,
+                 'card': make_bulk_card('card2', 'Counterspell', collector_number='2')}
+            ])
+        apply_changes.assert_called_once()
+        self.assertEqual(list(self.open_manager().collection), ['card2'])
+        self.assertEqual(self.open_manager().collection['card2']['foil_quantity'], 1)
+
+    def test_other_workers_changes_are_picked_up(self):
+        """Test that a manager reloads after another connection writes"""
+        first = self.open_manager()
+        second = self.open_manager()
+        version = second.version
+
+        first.add_card(self.card, 4)
+        self.assertEqual(second.collection['card1']['quantity'], 4)
+        self.assertGreater(second.version, version)
+
+        # A manager's own writes do not trigger a reload
+        version = first.version
+        first.add_card(self.card, 5)
+        self.assertEqual(first.version, version + 1)
+        self.assertEqual(second.collection['card1']['quantity'], 5)
+
+    def test_restart_keeps_insertion_order(self):
+        """Test that a reloaded collection lists cards in the order they were first added"""
+        manager = self.open_manager()
+        cards = [make_bulk_card(f'card{number}', f'Card {number}', collector_number=str(number))
+                 for number in (5, 1, 9, 3, 7, 2)]
+        for card in cards:
+            manager.add_card(card, 1)
+        manager.update_card_quantities(cards[0], 3, 1)
+        
+        self.assertEqual(list(self.open_manager().collection), [card['id'] for card in cards])
+
+    def test_etag_sequence_is_shared_by_workers(self):
+        """Managers on one store report the same sequence; another worker's write shows after the interval"""
+        first = self.open_manager()
+        second = self.open_manager()
+        first.add_card(self.card, 1)
+        with patch('app.ETAG_STATE_RECHECK_SECONDS', 0):
+            sequence = second.etag_sequence()
+        self.assertEqual(first.etag_sequence(), sequence)
+        
+        with patch('app.ETAG_STATE_RECHECK_SECONDS', 60):
+            first.add_card(self.card, 2)
+            self.assertEqual(first.etag_sequence(), sequence + 1)
+            with patch.object(CollectionStore, 'data_version', side_effect=AssertionError('read the store')):
+                self.assertEqual(second.etag_sequence(), sequence)
+        with patch('app.ETAG_STATE_RECHECK_SECONDS', 0):
+            self.assertEqual(second.etag_sequence(), sequence + 1)
+        
+        # A manager without a store has no shared state to tag
+        self.assertIsNone(CollectionManager().etag_sequence())
+
+    def test_other_workers_changes_are_applied_incrementally(self):
+        """Test that a sync reads back only the rows other workers changed, until a clear"""
+        first = self.open_manager()
+        first.update_card_quantities(self.card, 1, 0)
+        first.update_card_quantities(make_bulk_card('card2', 'Counterspell', collector_number='2'), 2, 0)
+        second = self.open_manager()
+
+        with patch.object(second.store, 'load', wraps=second.store.load) as load:
+            first.update_card_quantities(self.card, 3, 1)
+            first.add_card(make_bulk_card('card2', 'Counterspell', collector_number='2'), 0)
+            first.update_card_quantities(make_bulk_card('card3', 'Brainstorm', collector_number='3'), 1, 0)
+            self.assertEqual(second.collection, first.collection)
+            self.assertEqual(second.get_collection_summary(), first.get_collection_summary())
+            self.assertEqual(second.get_set_entries('neo'), first.get_set_entries('neo'))
+            load.assert_not_called()
+
+            # A clear leaves no tombstones, so the next sync loads everything
+            first.clear_collection()
+            first.add_card(self.card, 2)
+            self.assertEqual(dict(second.collection), {'card1': first.collection['card1']})
+            load.assert_called_once()
+
+        # Writes from the second manager reach the first the same way
+        second.add_card(self.card, 6)
+        self.assertEqual(first.collection['card1']['quantity'], 6)
+
+    def test_store_without_change_tracking_is_upgraded(self):
+        """Test that a store written before change tracking keeps its entries"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('CREATE TABLE collection (card_id TEXT PRIMARY KEY, name TEXT, set_code TEXT, set_name TEXT, '
+                     'collector_number TEXT, quantity INTEGER NOT NULL DEFAULT 0, foil_quantity INTEGER NOT NULL DEFAULT 0, '
+                     'condition TEXT, language TEXT, rarity TEXT, image_url TEXT, price_usd_regular TEXT, price_usd_foil TEXT)')
+        conn.execute("INSERT INTO collection (card_id, name, set_code, quantity) VALUES ('card1', 'Lightning Bolt', 'NEO', 2)")
+        conn.commit()
+        conn.close()
+
+        first = self.open_manager()
+        second = self.open_manager()
+        self.assertEqual(first.collection['card1']['quantity'], 2)
+        first.add_card(self.card, 5)
+        self.assertEqual(second.collection['card1']['quantity'], 5)
+
+    def test_in_memory_by_default(self):
+        """Test that a manager without a store keeps the collection in memory"""
+        manager = CollectionManager()
+        manager.add_card(self.card, 1)
+        self.assertIsNone(manager.store)
+        self.assertEqual(manager.collection['card1']['quantity'], 1)
+
 
 class TestFlaskRoutes(unittest.TestCase):
     """Test cases for Flask routes"""
@@ -597,6 +2249,7 @@ class TestFlaskRoutes(unittest.TestCase):
         
         # Clear collection before each test
         collection_manager.clear_collection()
+        set_registry.invalidate()
     
     @patch('app.ScryfallAPI.get_sets')
     def test_index_route(self, mock_get_sets):
@@ -711,6 +2364,160 @@ class TestFlaskRoutes(unittest.TestCase):
         self.assertIn(b'function clearFilter()', response.data)
         self.assertIn(b'function updateFilteredProgress()', response.data)
     
+    @patch('app.ScryfallAPI.get_set_cards')
+    @patch('app.ScryfallAPI.get_sets')
+    def test_set_pages_answer_conditional_gets(self, mock_get_sets, mock_get_set_cards):
+        """Set pages are tagged and revalidate with 304 until the collection or cache changes"""
+        mock_get_sets.return_value = [
+            {'code': 'neo', 'name': 'Kamigawa: Neon Dynasty', 'set_type': 'expansion', 'released_at': '2022-02-18'}
+        ]
+        card = make_bulk_card('card1', 'Lightning Bolt', mana_cost='{R}', rarity='common')
+        mock_get_set_cards.return_value = [card]
+        
+        for url in ('/set/neo', '/set/neo/rapid'):
+            with self.subTest(url=url):
+                mock_get_set_cards.reset_mock()
+                response = self.app.get(url)
+                etag = response.headers['ETag']
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+                
+                response = self.app.get(url, headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.data, b'')
+                self.assertEqual(mock_get_set_cards.call_count, 1)
+                
+                collection_manager.update_card_quantities(card, 1, 0)
+                response = self.app.get(url, headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response.headers['ETag'], etag)
+    
+    @patch('app.ScryfallAPI.get_set_cards')
+    @patch('app.ScryfallAPI.get_sets')
+    def test_set_pages_embed_slim_cards_accepted_by_updates(self, mock_get_sets, mock_get_set_cards):
+        """Set pages embed only the fields they use, and that form updates the collection"""
+        mock_get_sets.return_value = [
+            {'code': 'neo', 'name': 'Kamigawa: Neon Dynasty', 'set_type': 'expansion', 'released_at': '2022-02-18'}
+        ]
+        card = make_bulk_card(
+            'card1', 'Lightning Bolt', rarity='common', mana_cost='{R}', type_line='Instant',
+            oracle_text='Lightning Bolt deals 3 damage to any target.', legalities={'modern': 'legal'}
+        )
+        mock_get_set_cards.return_value = [card]
+        
+        for url in ('/set/neo', '/set/neo/rapid'):
+            with self.subTest(url=url):
+                html = self.app.get(url).get_data(as_text=True)
+                embedded = html.split('<script type="application/json" id="cardData">')[1].split('</script>')[0]
+                slim = json.loads(embedded)[0]
+                self.assertNotIn('oracle_text', slim)
+                self.assertNotIn('legalities', slim)
+                self.assertEqual((slim['type_line'], slim['image_uris']['small']),
+                                 ('Instant', 'http://example.com/card1.jpg'))
+        
+        response = self.app.post('/api/update_card_quantities', json={
+            'card': slim, 'regular_quantity': 2, 'foil_quantity': 1
+        })
+        self.assertEqual(response.status_code, 200)
+        entry = collection_manager.collection['card1']
+        self.assertEqual((entry['name'], entry['set'], entry['quantity'], entry['foil_quantity']),
+                         ('Lightning Bolt', 'NEO', 2, 1))
+        self.assertEqual((entry['image_url'], entry['price_usd_regular']), ('http://example.com/card1.jpg', '0.10'))
+    
+    @patch('app.ScryfallAPI.get_set_cards')
+    @patch('app.ScryfallAPI.get_sets')
+    def test_revalidations_read_neither_the_database_nor_the_collection(self, mock_get_sets, mock_get_set_cards):
+        """A matching If-None-Match is answered from the counters held in memory"""
+        mock_get_sets.return_value = [
+            {'code': 'neo', 'name': 'Kamigawa: Neon Dynasty', 'set_type': 'expansion', 'released_at': '2022-02-18'}
+        ]
+        mock_get_set_cards.return_value = [make_bulk_card('card1', 'Lightning Bolt', rarity='common')]
+        
+        with patch('app.ETAG_STATE_RECHECK_SECONDS', 60):
+            # The cache status comes last, after set views have moved the set list counters
+            for url in ('/set/neo', '/set/neo/rapid', '/collection', '/api/cache/status'):
+                with self.subTest(url=url):
+                    etag = self.app.get(url).headers['ETag']
+                    with patch.object(BulkDataCache, '_connection', side_effect=AssertionError('read the cache')), \
+                         patch.object(CollectionStore, 'data_version', side_effect=AssertionError('read the store')), \
+                         patch.object(collection_manager, 'get_versioned_set_entries', side_effect=AssertionError), \
+                         patch.object(collection_manager, 'get_versioned_collection', side_effect=AssertionError), \
+                         patch('app.render_template', side_effect=AssertionError):
+                        response = self.app.get(url, headers={'If-None-Match': etag})
+                    self.assertEqual(response.status_code, 304)
+    
+    def test_collection_and_cache_status_answer_conditional_gets(self):
+        """The collection page and cache status JSON revalidate with 304 while unchanged"""
+        for url in ('/collection', '/api/cache/status'):
+            with self.subTest(url=url):
+                etag = self.app.get(url).headers['ETag']
+                response = self.app.get(url, headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 304)
+        
+        etag = self.app.get('/collection').headers['ETag']
+        collection_manager.add_card(make_bulk_card('card1', 'Lightning Bolt', rarity='common'), 2)
+        response = self.app.get('/collection', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Lightning Bolt', response.data)
+
+    def test_batch_quantity_updates(self):
+        """Test that one batch request sets, removes and resolves many cards"""
+        collection_manager.add_card(make_bulk_card('owned', 'Counterspell', collector_number='2'), 3)
+        collection_manager.add_card(make_bulk_card('gone', 'Brainstorm', collector_number='3'), 1)
+        cached = {'cached': make_bulk_card('cached', 'Lightning Bolt')}
+        version = collection_manager.version
+
+        with patch('app.bulk_cache.get_cards_by_ids', side_effect=lambda ids: {i: cached[i] for i in ids if i in cached}) as lookup:
+            response = self.app.post('/api/update_card_quantities/batch', json={'updates': [
+                {'card_id': 'owned', 'regular': 1, 'foil': 2},
+                {'card_id': 'gone', 'regular': 0, 'foil': 0},
+                {'card_id': 'cached', 'regular': 1, 'foil': 0},
+                {'card_id': 'cached', 'regular': 4, 'foil': 0},
+                {'card_id': 'uncached', 'regular': 1, 'foil': 0},
+                {'card_id': 'supplied', 'regular': 0, 'foil': 1,
+                 'card': make_bulk_card('supplied', 'Ponder', collector_number='5')}
+            ]})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['cards'], {
+            'owned': {'regular': 1, 'foil': 2},
+            'gone': {'regular': 0, 'foil': 0},
+            'cached': {'regular': 4, 'foil': 0},
+            'supplied': {'regular': 0, 'foil': 1}
+        })
+        self.assertEqual(data['unresolved'], ['uncached'])
+        lookup.assert_called_once()
+        self.assertEqual(sorted(lookup.call_args[0][0]), ['cached', 'supplied', 'uncached'])
+
+        collection = collection_manager.collection
+        self.assertEqual(sorted(collection), ['cached', 'owned', 'supplied'])
+        self.assertEqual((collection['cached']['name'], collection['cached']['set']), ('Lightning Bolt', 'NEO'))
+        self.assertEqual(collection['supplied']['foil_quantity'], 1)
+        self.assertEqual(collection_manager.version, version + 1)
+
+    def test_batch_quantity_updates_rejects_bad_input(self):
+        """Test that malformed batches are refused without changing the collection"""
+        collection_manager.add_card(make_bulk_card('owned', 'Counterspell'), 3)
+        bad_bodies = [
+            {'updates': 'owned'},
+            [{'regular': 1}],
+            [{'card_id': 'owned', 'regular': 'many'}],
+            [{'card_id': 'owned', 'regular': -1}],
+            [{'card_id': 'owned', 'regular': 1, 'card': 'Counterspell'}],
+            [{'card_id': 'owned', 'regular': 1}] * (COLLECTION_BATCH_MAX_UPDATES + 1)
+        ]
+        for body in bad_bodies:
+            with self.subTest(body=str(body)[:60]):
+                response = self.app.post('/api/update_card_quantities/batch', json=body)
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(collection_manager.collection['owned']['quantity'], 3)
+
+        # A bare list of updates is accepted too
+        response = self.app.post('/api/update_card_quantities/batch', json=[{'card_id': 'owned', 'regular': 2}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(collection_manager.collection['owned']['quantity'], 2)
+
     @patch('app.ScryfallAPI.get_set_cards')
     @patch('app.ScryfallAPI.get_sets')
     def test_set_rapid_view_route(self, mock_get_sets, mock_get_set_cards):
@@ -762,6 +2569,23 @@ class TestFlaskRoutes(unittest.TestCase):
         self.assertIn(b'Space', response.data)
         self.assertIn(b'Enter', response.data)
 
+    @patch('app.ScryfallAPI.get_set_cards')
+    @patch('app.ScryfallAPI.get_sets')
+    def test_set_pages_embed_only_that_sets_entries(self, mock_get_sets, mock_get_set_cards):
+        """Test that set pages carry the requested set's owned entries and nothing else"""
+        mock_get_sets.return_value = [{'code': 'neo', 'name': 'Kamigawa: Neon Dynasty', 'set_type': 'expansion',
+                                       'released_at': '2022-02-18', 'card_count': 1}]
+        mock_get_set_cards.return_value = [make_bulk_card('card1', 'Lightning Bolt')]
+        collection_manager.add_card(make_bulk_card('card1', 'Lightning Bolt'), 2)
+        collection_manager.add_card(make_bulk_card('other', 'Black Lotus', set_code='lea'), 1)
+        
+        for url in ('/set/neo', '/set/neo/rapid'):
+            with self.subTest(url=url):
+                response = self.app.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn(b'Lightning Bolt', response.data)
+                self.assertNotIn(b'Black Lotus', response.data)
+
     def test_set_view_not_found(self):
         """Test set view with invalid set code"""
         response = self.app.get('/set/invalid')